@@ -0,0 +1,406 @@
+"""CSC111 Project 2021: The Network Analytics of the Project
+
+Description
+===========
+This file is where the network analytics of this project are found. It contains a function that
+analyses a whole subway system at once, computing for every station its betweenness centrality
+(Brandes' algorithm) and the impact of closing it (the change in the average number of stops
+between stations, and the number of pairs of stations it disconnects), and for every edge its
+betweenness and the number of pairs of stations its closure disconnects.
+
+Every station is the origin of exactly one breadth-first search. The impact of closing a station
+is derived from those same search trees: closing a station only changes the distances to the
+stations it dominates (the ones all of whose shortest paths pass through it), so only those are
+searched again. The searches can be spread over a pool of worker processes sharing the graph.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao.
+"""
+from __future__ import annotations
+import heapq
+import multiprocessing
+from typing import Optional
+import numpy as np
+import compact_graph
+import shared_graph
+
+
+class NetworkAnalysis:
+    """The analysis of the stations and edges of a subway system.
+
+    Distances are numbers of stops, and pairs of stations are unordered. Closed stations and
+    edges are treated as if they did not exist.
+
+    Instance Attributes:
+        - names: The name of every station.
+        - average_distance: The average distance between two connected stations.
+        - connected_pairs: The number of pairs of stations that are connected.
+        - betweenness: The betweenness centrality of every station.
+        - closure_distance_change: The change in average_distance if each station closed.
+        - closure_disconnected_pairs: The number of connected pairs of other stations that
+                                      each station's closure would disconnect.
+        - edges: An integer array of shape (m, 2) holding the station indices of every edge.
+        - edge_betweenness: The betweenness centrality of every edge.
+        - edge_disconnected_pairs: The number of connected pairs of stations that each edge's
+                                   closure would disconnect.
+    """
+    names: list[str]
+    average_distance: float
+    connected_pairs: int
+    betweenness: np.ndarray
+    closure_distance_change: np.ndarray
+    closure_disconnected_pairs: np.ndarray
+    edges: np.ndarray
+    edge_betweenness: np.ndarray
+    edge_disconnected_pairs: np.ndarray
+
+    def most_central_stations(self, k: int) -> list[tuple[str, float]]:
+        """Return the k stations with the highest betweenness centrality, with their
+        betweenness, most central first.
+        """
+        order = np.argsort(-self.betweenness, kind='stable')[:k]
+        return [(self.names[i], float(self.betweenness[i])) for i in order]
+
+    def most_critical_stations(self, k: int) -> list[tuple[str, int, float]]:
+        """Return the k stations whose closure hurts most, with the number of pairs their
+        closure disconnects and the change in average distance it causes.
+
+        Stations are ranked by the number of pairs they disconnect, and then by the change in
+        average distance.
+        """
+        order = np.lexsort((-self.closure_distance_change,
+                            -self.closure_disconnected_pairs))[:k]
+        return [(self.names[i], int(self.closure_disconnected_pairs[i]),
+                 float(self.closure_distance_change[i])) for i in order]
+
+    def most_critical_edges(self, k: int) -> list[tuple[str, str, int, float]]:
+        """Return the k edges whose closure hurts most, with the number of pairs their closure
+        disconnects and their betweenness.
+
+        Edges are ranked by the number of pairs they disconnect, and then by betweenness.
+        """
+        order = np.lexsort((-self.edge_betweenness, -self.edge_disconnected_pairs))[:k]
+        return [(self.names[self.edges[e, 0]], self.names[self.edges[e, 1]],
+                 int(self.edge_disconnected_pairs[e]), float(self.edge_betweenness[e]))
+                for e in order]
+
+
+def analyse(graph: compact_graph.CompactGraph, processes: int = 1,
+            chunk_size: int = 32) -> NetworkAnalysis:
+    """Return the analysis of the given graph, searching from chunks of chunk_size origins
+    at a time on the given number of worker processes (or in this process, if processes
+    is 1).
+
+    Preconditions:
+        - processes >= 1
+        - chunk_size >= 1
+    """
+    n = len(graph.names)
+    edges, slot_edges = _edge_ids(graph)
+    chunks = [range(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+
+    if processes == 1:
+        partials = [_analyse_origins(graph, slot_edges, chunk) for chunk in chunks]
+    else:
+        shared = shared_graph.SharedGraph.create(graph)
+        try:
+            with multiprocessing.Pool(processes, initializer=_attach_worker,
+                                      initargs=(shared.block.name, slot_edges)) as pool:
+                partials = pool.map(_analyse_worker_origins, chunks)
+        finally:
+            shared.unlink()
+
+    totals = [sum(values) for values in zip(*partials)]
+    betweenness, edge_betweenness, kept_sums, kept_pairs, reached_by, distance_sum, pairs = \
+        totals
+
+    analysis = NetworkAnalysis()
+    analysis.names = list(graph.names)
+    analysis.edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+    # Every unordered pair was counted from both of its ends
+    analysis.betweenness = betweenness / 2
+    analysis.edge_betweenness = edge_betweenness / 2
+    analysis.connected_pairs = int(pairs) // 2
+    analysis.average_distance = distance_sum / pairs if pairs > 0 else 0.0
+
+    # The pairs left after closing a station are the pairs not involving it (from either end)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kept_average = np.where(kept_pairs > 0, kept_sums / kept_pairs, 0.0)
+    analysis.closure_distance_change = kept_average - analysis.average_distance
+    # The graph is undirected, so every station reaches as many stations as reach it
+    pairs_without = pairs - 2 * reached_by
+    analysis.closure_disconnected_pairs = ((pairs_without - kept_pairs) // 2).astype(np.int64)
+    analysis.edge_disconnected_pairs = _bridge_disconnected_pairs(graph, edges, slot_edges)
+
+    return analysis
+
+
+def _edge_ids(graph: compact_graph.CompactGraph) -> tuple[list[tuple[int, int]], list[int]]:
+    """Return every edge (i, j) with i < j of the given graph, and the index in that list of
+    the edge held by every slot of graph.indices.
+    """
+    edges = []
+    ids = {}
+    slot_edges = [0] * len(graph.indices)
+
+    for i in range(len(graph.names)):
+        for slot in range(graph.indptr[i], graph.indptr[i + 1]):
+            j = graph.indices[slot]
+            key = (min(i, j), max(i, j))
+            if key not in ids:
+                ids[key] = len(edges)
+                edges.append(key)
+            slot_edges[slot] = ids[key]
+
+    return edges, slot_edges
+
+
+# The shared graph and slot edges used by the current worker process of analyse
+_worker_graph: Optional[shared_graph.SharedGraph] = None
+_worker_slot_edges: list[int] = []
+
+
+def _attach_worker(name: str, slot_edges: list[int]) -> None:
+    """Attach the current worker process to the shared graph with the given block name."""
+    global _worker_graph, _worker_slot_edges
+    _worker_graph = shared_graph.SharedGraph.attach(name)
+    _worker_slot_edges = slot_edges
+
+
+def _analyse_worker_origins(origins: range) -> tuple:
+    """Return _analyse_origins of the current worker's shared graph."""
+    return _analyse_origins(_worker_graph, _worker_slot_edges, origins)
+
+
+def _analyse_origins(graph: compact_graph.CompactGraph, slot_edges: list[int],
+                     origins: range) -> tuple:
+    """Return the contributions of the searches from the given origins to the analysis of
+    the given graph: the betweenness of every station and edge, the total distance and number
+    of ordered pairs that would be left after closing each station, the number of origins
+    reaching each station, and the total distance and number of connected ordered pairs.
+    """
+    n = len(graph.names)
+    indptr, indices = graph.indptr, graph.indices
+    station_open, edge_open = graph.station_open, graph.edge_open
+    betweenness = np.zeros(n)
+    edge_betweenness = np.zeros(max(slot_edges, default=-1) + 1)
+    adjustments = np.zeros(n)
+    pair_adjustments = np.zeros(n, dtype=np.int64)
+    reached_by = np.zeros(n, dtype=np.int64)
+    distance_sum = pairs = 0
+
+    for source in origins:
+        if not station_open[source]:
+            continue
+
+        # Breadth-first search, counting shortest paths and remembering predecessors
+        distance = {source: 0}
+        sigma = {source: 1}
+        predecessors = {source: []}
+        order = [source]
+        for u in order:
+            for slot in range(indptr[u], indptr[u + 1]):
+                v = indices[slot]
+                if not edge_open[slot] or not station_open[v]:
+                    continue
+                if v not in distance:
+                    distance[v] = distance[u] + 1
+                    sigma[v] = 0
+                    predecessors[v] = []
+                    order.append(v)
+                if distance[v] == distance[u] + 1:
+                    sigma[v] += sigma[u]
+                    predecessors[v].append((u, slot))
+
+        # Brandes' accumulation, from the furthest stations back to the source
+        delta = dict.fromkeys(order, 0.0)
+        for w in reversed(order):
+            for v, slot in predecessors[w]:
+                share = sigma[v] / sigma[w] * (1 + delta[w])
+                delta[v] += share
+                edge_betweenness[slot_edges[slot]] += share
+            if w != source:
+                betweenness[w] += delta[w]
+
+        source_sum = sum(distance.values())
+        source_pairs = len(order) - 1
+        distance_sum += source_sum
+        pairs += source_pairs
+        reached_by[order[1:]] += 1
+
+        # Every closure keeps this source's pairs, except the ones it changes below
+        adjustments += source_sum
+        pair_adjustments += source_pairs
+        adjustments[source] -= source_sum
+        pair_adjustments[source] -= source_pairs
+
+        children = _dominator_children(order, predecessors)
+        for s in order[1:]:
+            lost_sum, lost_pairs = distance[s], 1
+            if s in children:
+                decrease, unreachable = _search_dominated(graph, distance, children, s)
+                lost_sum += decrease
+                lost_pairs += unreachable
+            adjustments[s] -= lost_sum
+            pair_adjustments[s] -= lost_pairs
+
+    return (betweenness, edge_betweenness, adjustments, pair_adjustments, reached_by,
+            distance_sum, pairs)
+
+
+def _dominator_children(order: list[int], predecessors: dict[int, list[tuple[int, int]]]) \
+        -> dict[int, list[int]]:
+    """Return the children of every station with children in the dominator tree of the
+    shortest-path DAG with the given breadth-first order and predecessors.
+
+    A station dominates another if every shortest path from the source to the other station
+    passes through it.
+    """
+    parent = {order[0]: order[0]}
+    depth = {order[0]: 0}
+    children = {}
+
+    for w in order[1:]:
+        # The immediate dominator is the common ancestor of all of the predecessors
+        d = predecessors[w][0][0]
+        for v, _ in predecessors[w][1:]:
+            while v != d:
+                if depth[v] >= depth[d]:
+                    v = parent[v]
+                else:
+                    d = parent[d]
+        parent[w] = d
+        depth[w] = depth[d] + 1
+        children.setdefault(d, []).append(w)
+
+    return children
+
+
+def _search_dominated(graph: compact_graph.CompactGraph, distance: dict[int, int],
+                      children: dict[int, list[int]], s: int) -> tuple[int, int]:
+    """Return the decrease in the total distance from the source to the stations dominated by
+    the station s if s closed (where stations that become unreachable no longer count), and
+    the number of stations that become unreachable.
+
+    Only the dominated stations are searched again: the distances to every other station
+    stay the same.
+    """
+    dominated = []
+    stack = list(children[s])
+    while stack != []:
+        w = stack.pop()
+        dominated.append(w)
+        stack.extend(children.get(w, ()))
+
+    affected = set(dominated)
+    indptr, indices = graph.indptr, graph.indices
+    station_open, edge_open = graph.station_open, graph.edge_open
+
+    # Start from the unaffected neighbours of the dominated stations, then search inward
+    best = {}
+    for w in dominated:
+        for slot in range(indptr[w], indptr[w + 1]):
+            v = indices[slot]
+            if edge_open[slot] and v != s and v not in affected and v in distance:
+                best[w] = min(best.get(w, distance[v] + 1), distance[v] + 1)
+    queue = [(d, w) for w, d in best.items()]
+    heapq.heapify(queue)
+    done = {}
+
+    while queue != []:
+        d, w = heapq.heappop(queue)
+        if w in done:
+            continue
+        done[w] = d
+        for slot in range(indptr[w], indptr[w + 1]):
+            v = indices[slot]
+            if edge_open[slot] and station_open[v] and v in affected and v not in done and \
+                    d + 1 < best.get(v, d + 2):
+                best[v] = d + 1
+                heapq.heappush(queue, (d + 1, v))
+
+    return sum(distance[w] for w in dominated) - sum(done.values()), len(dominated) - len(done)
+
+
+def _bridge_disconnected_pairs(graph: compact_graph.CompactGraph, edges: list[tuple[int, int]],
+                               slot_edges: list[int]) -> np.ndarray:
+    """Return the number of pairs of stations that closing each edge would disconnect.
+
+    Only bridges (edges on no cycle) disconnect anything; they are found with an iterative
+    version of Tarjan's algorithm.
+    """
+    n = len(graph.names)
+    indptr, indices = graph.indptr, graph.indices
+    station_open, edge_open = graph.station_open, graph.edge_open
+    disconnected = np.zeros(len(edges), dtype=np.int64)
+    discovered = [-1] * n
+    low = [0] * n
+    size = [1] * n
+    counter = 0
+
+    for root in range(n):
+        if discovered[root] != -1 or not station_open[root]:
+            continue
+
+        component = []
+        discovered[root] = low[root] = counter
+        counter += 1
+        stack = [(root, -1, indptr[root])]
+        bridges = []
+
+        while stack != []:
+            u, parent_edge, slot = stack[-1]
+            if slot < indptr[u + 1]:
+                stack[-1] = (u, parent_edge, slot + 1)
+                v, edge = indices[slot], slot_edges[slot]
+                if not edge_open[slot] or not station_open[v] or edge == parent_edge:
+                    continue
+                if discovered[v] == -1:
+                    discovered[v] = low[v] = counter
+                    counter += 1
+                    stack.append((v, edge, indptr[v]))
+                else:
+                    low[u] = min(low[u], discovered[v])
+            else:
+                stack.pop()
+                component.append(u)
+                if stack != []:
+                    p = stack[-1][0]
+                    low[p] = min(low[p], low[u])
+                    size[p] += size[u]
+                    if low[u] > discovered[p]:
+                        bridges.append((parent_edge, u))
+
+        for edge, child in bridges:
+            disconnected[edge] = size[child] * (len(component) - size[child])
+
+    return disconnected
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'heapq', 'multiprocessing', 'numpy',
+                              'compact_graph', 'shared_graph'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136', 'W0603'],
+            'max-nested-blocks': 4
+        }
+    )
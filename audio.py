@@ -0,0 +1,166 @@
+"""CSC111 Project 2021: The Audio of the Project
+
+Description
+===========
+This file is where the audio of the pygame visualization of this project is found. It contains a
+class representing a bank of sound effects: the mixer is initialized once, every effect is
+decoded once (in a background thread, so that loading never delays the first frame), and each
+effect is played on a channel of its own. Playing a sound only hands it to the mixer, which
+mixes it in its own thread, so sounds never add latency to routing or drawing. Audio is
+optional: without an audio device or a sound file, the visualization runs silently.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+import threading
+from typing import Optional
+import pygame
+
+
+# The sound effects of the visualization, mapped to their files
+SOUND_FILES = {
+    'click': 'sounds/click.mp3',        # From www.zapsplat.com
+    'path': 'sounds/path.mp3',          # From www.zapsplat.com
+    'complete': 'sounds/complete.mp3'   # From www.zapsplat.com
+}
+
+MUSIC_FILE = 'sounds/background_music.mp3'  # From www.bensound.com
+MUSIC_VOLUME = 0.2
+
+
+class AudioBank:
+    """A bank of decoded sound effects, each played on a dedicated mixer channel.
+
+    Sound effects that are not loaded yet (or could not be loaded) are silently skipped when
+    they are played.
+    """
+    # Private Instance Attributes:
+    #   - _sound_files:
+    #       The sound effects of this bank, mapped to their files.
+    #   - _sounds:
+    #       The decoded sound effects of this bank, mapped to their names.
+    #   - _channels:
+    #       The mixer channel reserved for every decoded sound effect, mapped to its name.
+    #   - _loader:
+    #       The thread loading this bank, or None if loading was not started yet.
+    #   - _lock:
+    #       The lock held while loading is started.
+    _sound_files: dict[str, str]
+    _sounds: dict[str, pygame.mixer.Sound]
+    _channels: dict[str, pygame.mixer.Channel]
+    _loader: Optional[threading.Thread]
+    _lock: threading.Lock
+
+    def __init__(self, sound_files: dict[str, str]) -> None:
+        """Initialize an empty bank of the given sound effects (mapped to their files).
+        """
+        self._sound_files = sound_files
+        self._sounds = {}
+        self._channels = {}
+        self._loader = None
+        self._lock = threading.Lock()
+
+    def start(self, music: bool = True) -> None:
+        """Start loading this bank (and, if music is True, the background music) in a
+        background thread. Calling this method again does nothing.
+        """
+        with self._lock:
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._load, args=(music,), daemon=True)
+                self._loader.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until this bank finished loading, or for at most timeout seconds, and return
+        whether it finished loading.
+
+        Preconditions:
+            - self.start() was called
+        """
+        self._loader.join(timeout)
+        return not self._loader.is_alive()
+
+    def is_loaded(self, name: str) -> bool:
+        """Return whether the sound effect with the given name is loaded."""
+        return name in self._channels
+
+    def play(self, name: str) -> None:
+        """Play the sound effect with the given name on its channel, stopping the sound that
+        channel was playing. Return right away, without waiting for the sound.
+        """
+        # A sound is only visible in _channels once its channel is ready
+        channel = self._channels.get(name)
+        if channel is not None:
+            channel.play(self._sounds[name])
+
+    def fadeout(self, milliseconds: int) -> None:
+        """Fade out every sound effect and the background music over the given time."""
+        if pygame.mixer.get_init():
+            pygame.mixer.fadeout(milliseconds)
+            pygame.mixer.music.fadeout(milliseconds)
+
+    def _load(self, music: bool) -> None:
+        """Initialize the mixer (unless it already is), decode every sound effect of this bank,
+        reserve a channel for each of them, and start the background music if music is True.
+        """
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error:
+            return
+
+        # Reserved channels are never picked by Sound.play, so they stay free for this bank
+        names = list(self._sound_files)
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), len(names)))
+        pygame.mixer.set_reserved(len(names))
+
+        for number, name in enumerate(names):
+            try:
+                self._sounds[name] = pygame.mixer.Sound(self._sound_files[name])
+            except (pygame.error, FileNotFoundError):
+                continue
+            self._channels[name] = pygame.mixer.Channel(number)
+
+        if music:
+            try:
+                # Music is streamed from the file rather than decoded up front
+                pygame.mixer.music.load(MUSIC_FILE)
+                pygame.mixer.music.set_volume(MUSIC_VOLUME)
+                pygame.mixer.music.play(-1)  # Loop music
+            except pygame.error:
+                pass
+
+
+# The audio bank of the visualization
+_bank = AudioBank(SOUND_FILES)
+
+
+def get_audio_bank() -> AudioBank:
+    """Return the audio bank of the visualization (with every sound effect of SOUND_FILES).
+    """
+    return _bank
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'threading', 'pygame'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,895 @@
+"""CSC111 Project 2021: The Benchmarks of the Project
+
+Description
+===========
+This file is where the performance benchmarks of this project are found. Each benchmark is a
+function that returns its measurements in a dictionary, and running this file prints the
+results of all of them. Benchmarks that need pygame run headless, with SDL's dummy video and
+audio drivers.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# Startup should reach the first frame of the visualization well within this many seconds
+STARTUP_TARGET = 1.0
+
+# The program run in a fresh interpreter by benchmark_startup. It launches the visualization
+# the same way main.py does, with a QUIT event already queued so that the event loop stops
+# right after displaying its first frame.
+_STARTUP_PROGRAM = """
+import json, sys, time
+start = time.perf_counter()
+import pygame
+import data_wrangling
+import pygame_visualization
+imported = time.perf_counter()
+screen = pygame_visualization.initialize_screen((1200, 700), [pygame.MOUSEBUTTONDOWN], 'lightblue')
+subway = data_wrangling.read_csv_data(sys.argv[1], screen)
+loaded = time.perf_counter()
+pygame.event.post(pygame.event.Event(pygame.QUIT))
+pygame_visualization.run_visualization(screen, subway, sys.argv[2])
+displayed = time.perf_counter()
+print(json.dumps({'import': imported - start, 'load': loaded - imported,
+                  'first_frame': displayed - start,
+                  'plotly_imported': 'plotly' in sys.modules}))
+"""
+
+
+def _headless_environment() -> dict[str, str]:
+    """Return a copy of the environment in which pygame runs without a window or sound card.
+    """
+    environment = dict(os.environ)
+    environment['SDL_VIDEODRIVER'] = 'dummy'
+    environment['SDL_AUDIODRIVER'] = 'dummy'
+    environment['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    return environment
+
+
+def benchmark_startup(csv_filepath: str = 'data/vancouver_subway.csv',
+                      image_filepath: str = 'images/vancouver_subway_system.png',
+                      repeats: int = 5) -> dict[str, float]:
+    """Return the best import time, data loading time and time to first frame (in seconds)
+    of the pygame visualization over the given number of fresh interpreters.
+
+    The result also records whether plotly was imported before the first frame
+    (it should not be) and whether the first frame was under STARTUP_TARGET.
+
+    Preconditions:
+        - repeats >= 1
+    """
+    runs = []
+
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', _STARTUP_PROGRAM,
+                                 csv_filepath, image_filepath],
+                                env=_headless_environment(), capture_output=True,
+                                text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    results = {key: min(run[key] for run in runs) for key in ('import', 'load', 'first_frame')}
+    results['plotly_imported'] = any(run['plotly_imported'] for run in runs)
+    results['within_target'] = results['first_frame'] < STARTUP_TARGET
+
+    return results
+
+
+def _init_headless_screen(screen_size: tuple[int, int]) -> 'pygame.Surface':
+    """Initialize pygame with SDL's dummy drivers and return a screen of the given size.
+    """
+    os.environ.update(_headless_environment())
+    import pygame
+    pygame.display.init()
+    return pygame.display.set_mode(screen_size)
+
+
+def _synthetic_rows(n: int, world_size: tuple[int, int]) \
+        -> list[tuple[str, tuple[float, float], tuple[int, int], list[str]]]:
+    """Return the (name, location, coordinates, neighbour names) of the n stations of a
+    synthetic subway system: a square grid of stations spread over world_size pixels,
+    each joined to the stations beside it.
+    """
+    side = max(int(n ** 0.5), 1)
+    rows = []
+
+    for i in range(n):
+        row, column = divmod(i, side)
+        neighbours = [f'Station {j}' for j in (i - side, i - 1, i + 1, i + side)
+                      if 0 <= j < n and (j // side == row or j % side == column)]
+        rows.append((f'Station {i}', (49.0 + row * 0.001, -123.0 + column * 0.001),
+                     (column * world_size[0] // side, row * world_size[1] // side), neighbours))
+
+    return rows
+
+
+def _surface_bytes(surfaces: list) -> int:
+    """Return the number of bytes of pixel data held by the distinct given pygame Surfaces.
+
+    Pixel data is allocated by SDL rather than Python, so tracemalloc does not see it.
+    """
+    distinct = {id(surface): surface for surface in surfaces}.values()
+    return sum(s.get_bytesize() * s.get_width() * s.get_height() for s in distinct)
+
+
+def benchmark_station_memory(n: int = 20000, screen_size: tuple[int, int] = (1200, 700),
+                             world_scale: int = 10) -> dict[str, float]:
+    """Return the bytes per station of a synthetic subway system with n stations, stored as
+    one sprite per station (the original _Station) and as compact records with sprites created
+    only for displayed stations (subway_system.Subway).
+
+    The stations are spread over world_scale times the screen size in each direction, so only
+    some of them are displayed. Bytes include the Python objects traced by tracemalloc and
+    the pixel data of the stations' images.
+
+    Preconditions:
+        - n >= 1
+    """
+    screen = _init_headless_screen(screen_size)
+    import pygame
+    import subway_system
+
+    class _SpriteStation(pygame.sprite.Sprite):
+        """A station stored the way _Station stored it before it became a compact record."""
+
+        def __init__(self, name: str, location: tuple[float, float],
+                     coordinates: tuple[int, int]) -> None:
+            pygame.sprite.Sprite.__init__(self)
+            self.name = name
+            self.location = location
+            self.neighbours = set()
+            self.image = pygame.image.load('images/grey_circle.png').convert_alpha()
+            self.rect = self.image.get_rect()
+            self.rect.center = coordinates
+
+    rows = _synthetic_rows(n, (screen_size[0] * world_scale, screen_size[1] * world_scale))
+    results = {}
+
+    # Before: every station is a sprite with its own image
+    tracemalloc.start()
+    stations, group = {}, pygame.sprite.Group()
+    for name, location, coordinates, _ in rows:
+        stations[name] = _SpriteStation(name, location, coordinates)
+        group.add(stations[name])
+    for name, _, _, neighbours in rows:
+        for neighbour_name in neighbours:
+            stations[name].neighbours.add(stations[neighbour_name])
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    pixels = _surface_bytes([station.image for station in stations.values()])
+    results['sprite_bytes_per_station'] = (traced + pixels) / n
+    del stations, group
+
+    # After: compact records, with sprites only for the stations on the screen
+    tracemalloc.start()
+    subway = subway_system.Subway(screen)
+    for name, location, coordinates, _ in rows:
+        subway.add_station(name, location, coordinates)
+    for name, _, _, neighbours in rows:
+        for neighbour_name in neighbours:
+            subway.add_edge(name, neighbour_name)
+    subway.draw_stations()
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    pixels = _surface_bytes([sprite.image for sprite in subway._sprites])
+    results['compact_bytes_per_station'] = (traced + pixels) / n
+    results['displayed_stations'] = len(subway._sprites)
+
+    results['reduction'] = results['sprite_bytes_per_station'] / \
+        results['compact_bytes_per_station']
+
+    return results
+
+
+def stress_test_snapshots(n: int = 2000, readers: int = 8, writes: int = 500) \
+        -> dict[str, float]:
+    """Return the number of reads, the reads per second and the number of inconsistent reads
+    seen by the given number of reader threads routing on snapshots of a ring of n stations,
+    while one writer thread applies the given number of batches of changes. Also return the
+    number of times the main thread drew the stations meanwhile, and the number of those
+    draws that were inconsistent.
+
+    Exactly one edge of the ring is closed at any time: every batch of the writer reopens it,
+    closes the next edge of the ring, adds a new station joined to the ring, moves the station
+    added by the previous batch and removes the one added before it. A read is inconsistent
+    if its snapshot does not have exactly one closed edge, if the snapshot's arrays disagree
+    on the number of stations, or if the route it finds (which must exist) uses a closed edge.
+    A draw is inconsistent if it raises an error or if the sprites drawn are not the sprites
+    of the displayed stations, and the stations displayed once the writer is done must be
+    exactly the stations of the subway system.
+
+    Preconditions:
+        - n >= 4
+        - readers >= 1
+    """
+    screen = _init_headless_screen((1200, 700))
+    import subway_system
+
+    subway = subway_system.Subway(screen)
+    ring = [f'Station {i}' for i in range(n)]
+    for i, name in enumerate(ring):
+        subway.add_station(name, (49.0, -123.0 + i * 0.001), (0, 0))
+    for i in range(n):
+        subway.add_edge(ring[i], ring[(i + 1) % n])
+    subway.set_edge_open(ring[0], ring[1], False)
+
+    done = threading.Event()
+    counts = {'reads': 0, 'inconsistent': 0}
+    counts_lock = threading.Lock()
+
+    def write() -> None:
+        for k in range(writes):
+            with subway.writing():
+                subway.set_edge_open(ring[k % n], ring[(k + 1) % n], True)
+                subway.set_edge_open(ring[(k + 1) % n], ring[(k + 2) % n], False)
+                subway.add_station(f'Spur {k}', (49.001, -123.0 + k * 0.001), (0, 0))
+                subway.add_edge(f'Spur {k}', ring[k % n])
+                subway.move_station(f'Spur {k - 1}', (49.002, -123.0), (k % 1200, 10))
+                subway.remove_station(f'Spur {k - 2}')
+        done.set()
+
+    def read(seed: int) -> None:
+        reads = inconsistent = 0
+        while not done.is_set():
+            graph = subway.snapshot()
+            path = graph.path_indices(seed % n, (seed + n // 2) % n, set())
+            consistent = graph.edge_open.count(0) == 2 and \
+                len(graph.indptr) == len(graph.names) + 1 == len(graph.station_open) + 1 and \
+                path is not None and \
+                all(graph.is_edge_open(graph.names[u], graph.names[v])
+                    for u, v in zip(path, path[1:]))
+            reads += 1
+            inconsistent += not consistent
+        with counts_lock:
+            counts['reads'] += reads
+            counts['inconsistent'] += inconsistent
+
+    threads = [threading.Thread(target=read, args=(seed * 7919,)) for seed in range(readers)]
+    threads.append(threading.Thread(target=write))
+
+    def draw() -> bool:
+        try:
+            subway.draw_stations()
+            subway.update_all_stations('grey', (-100, -100))
+        except RuntimeError:
+            return False
+        sprites = subway._station_sprites
+        return set(subway._sprites) == set(sprites.values()) and \
+            all(sprite.name == name for name, sprite in sprites.items())
+
+    draws = inconsistent_draws = 0
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    # pygame may only be used from the main thread, so draw here while the others run
+    while not done.is_set():
+        draws += 1
+        inconsistent_draws += not draw()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    draws += 1
+    inconsistent_draws += not draw() or \
+        set(subway._station_sprites) != set(subway.snapshot().names)
+
+    return {'reads': counts['reads'], 'writes': writes,
+            'reads_per_second': counts['reads'] / elapsed,
+            'inconsistent_reads': counts['inconsistent'],
+            'draws': draws, 'inconsistent_draws': inconsistent_draws}
+
+
+def _synthetic_graph(n: int) -> 'compact_graph.CompactGraph':
+    """Return the compact graph of the synthetic subway system with n stations (see
+    _synthetic_rows).
+    """
+    from array import array
+    import compact_graph
+
+    rows = _synthetic_rows(n, (1, 1))
+    index = {name: i for i, (name, _, _, _) in enumerate(rows)}
+    return compact_graph.CompactGraph(
+        [name for name, _, _, _ in rows], array('d', [location[0] for _, location, _, _ in rows]),
+        array('d', [location[1] for _, location, _, _ in rows]),
+        [[index[neighbour] for neighbour in neighbours] for _, _, _, neighbours in rows])
+
+
+def _regional_graph(towns: int, town_side: int) -> 'compact_graph.CompactGraph':
+    """Return the compact graph of a synthetic regional network: a square grid of towns, each a
+    square grid of town_side by town_side stations with a fifth of its edges missing, where
+    every town is joined to the towns beside it by two or three rail lines.
+    """
+    from array import array
+    import random
+    import compact_graph
+
+    randomizer = random.Random(111)
+    names, latitudes, longitudes, adjacency = [], array('d'), array('d'), []
+    index = {}
+    for key in itertools.product(range(towns), range(towns), range(town_side), range(town_side)):
+        index[key] = len(names)
+        names.append('Station {}.{}.{}.{}'.format(*key))
+        latitudes.append(49.0 + key[0] * 0.1 + key[2] * 0.001)
+        longitudes.append(-123.0 + key[1] * 0.1 + key[3] * 0.001)
+        adjacency.append([])
+
+    def join(u: tuple[int, ...], v: tuple[int, ...]) -> None:
+        adjacency[index[u]].append(index[v])
+        adjacency[index[v]].append(index[u])
+
+    for row, column, i, j in index:
+        if i + 1 < town_side and randomizer.random() < 0.8:
+            join((row, column, i, j), (row, column, i + 1, j))
+        if j + 1 < town_side and randomizer.random() < 0.8:
+            join((row, column, i, j), (row, column, i, j + 1))
+
+    middle, last = town_side // 2, town_side - 1
+    for row, column in itertools.product(range(towns), range(towns)):
+        if column + 1 < towns:
+            join((row, column, middle, last), (row, column + 1, middle, 0))
+            join((row, column, 1, last), (row, column + 1, 1, 0))
+        if row + 1 < towns:
+            join((row, column, last, middle), (row + 1, column, 0, middle))
+
+    return compact_graph.CompactGraph(names, latitudes, longitudes, adjacency)
+
+
+def benchmark_csv_loading(n: int = 20000) -> dict[str, float]:
+    """Return the rows per second of loading a csv file of a synthetic subway system with n
+    stations row by row (the original read_csv_data) and with data_wrangling.load_csv_data.
+
+    Preconditions:
+        - n >= 1
+    """
+    import csv
+    import tempfile
+    import data_wrangling
+    import subway_system
+
+    screen = _init_headless_screen((1200, 700))
+    rows = _synthetic_rows(n, (1200, 700))
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, 'synthetic_subway.csv')
+        with open(filepath, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['station', 'latitude', 'longitude', 'x-coordinate', 'y-coordinate',
+                             'neighbours'])
+            for name, location, coordinates, neighbours in rows:
+                writer.writerow([name, *location, *coordinates, ','.join(neighbours)])
+
+        # Before: add every station and both sides of every edge while reading each row
+        start = time.perf_counter()
+        with open(filepath) as file:
+            reader = csv.reader(file)
+            next(reader)
+            subway = subway_system.Subway(screen)
+            for row in reader:
+                subway.add_station(row[0], (float(row[1]), float(row[2])),
+                                   (int(row[3]), int(row[4])))
+                for neighbour_name in str.split(row[5], ','):
+                    subway.add_edge(row[0], neighbour_name)
+        row_by_row = n / (time.perf_counter() - start)
+
+        # After: parse the whole file, then add the deduplicated edges in one batch
+        _, report = data_wrangling.load_csv_data(filepath, screen)
+
+    return {'row_by_row_rows_per_second': row_by_row,
+            'bulk_rows_per_second': report.rows_per_second(),
+            'valid': report.is_valid()}
+
+
+def _anonymous_memory_kib() -> int:
+    """Return the resident anonymous (not file or shared memory backed) memory of the current
+    process, in KiB. Only available on Linux.
+    """
+    with open('/proc/self/status', encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+
+    return 0
+
+
+def _attached_worker_memory(block_name: str, trips: list[tuple[str, str]]) -> int:
+    """Return the anonymous memory (in KiB) that attaching to the shared graph with the given
+    block name and routing the given trips added to the current process.
+    """
+    import shared_graph
+
+    before = _anonymous_memory_kib()
+    graph = shared_graph.SharedGraph.attach(block_name)
+    for name1, name2 in trips:
+        graph.shortest_path(name1, name2)
+    after = _anonymous_memory_kib()
+    graph.close()
+
+    return after - before
+
+
+def benchmark_shared_routing(n: int = 10000, trips: int = 500,
+                             processes: tuple[int, ...] = (1, 2, 4)) -> dict[str, float]:
+    """Return the trips routed per second by pools of each of the given numbers of worker
+    processes sharing one shared-memory graph of a synthetic subway system with n stations,
+    and the memory each worker added by attaching to the graph.
+
+    Preconditions:
+        - n >= 2
+        - trips >= 1
+    """
+    import multiprocessing
+    import random
+    import shared_graph
+
+    graph = _synthetic_graph(n)
+    random.seed(111)
+    sample = [tuple(random.sample(graph.names, 2)) for _ in range(trips)]
+    shared = shared_graph.SharedGraph.create(graph)
+    results = {'shared_bytes': shared.block.size}
+
+    try:
+        for count in processes:
+            start = time.perf_counter()
+            shared_graph.route_in_workers(shared, sample, count)
+            results[f'trips_per_second_{count}_workers'] = \
+                trips / (time.perf_counter() - start)
+
+        with multiprocessing.Pool(1) as pool:
+            results['worker_attach_kib'] = pool.apply(_attached_worker_memory,
+                                                      (shared.block.name, sample[:100]))
+    finally:
+        shared.unlink()
+
+    return results
+
+
+def benchmark_analytics(n: int = 1000, processes: tuple[int, ...] = (1, 2, 4)) \
+        -> dict[str, float]:
+    """Return the time (in seconds) the full analysis of a synthetic subway system with n
+    stations takes on each of the given numbers of worker processes.
+
+    Preconditions:
+        - n >= 2
+    """
+    import analytics
+
+    graph = _synthetic_graph(n)
+    results = {}
+
+    for count in processes:
+        start = time.perf_counter()
+        analytics.analyse(graph, processes=count)
+        results[f'seconds_{count}_workers'] = time.perf_counter() - start
+
+    return results
+
+
+def _synthetic_subway(n: int) -> tuple['subway_system.Subway', list[str]]:
+    """Return a subway system of n synthetic stations (see _synthetic_rows) drawn on a headless
+    screen, and the names of its stations.
+    """
+    import subway_system
+
+    screen = _init_headless_screen((1200, 700))
+    rows = _synthetic_rows(n, (1200, 700))
+    subway = subway_system.Subway(screen)
+    subway.add_network([(name, location, coordinates) for name, location, coordinates, _ in rows],
+                       [(name, neighbour) for name, _, _, neighbours in rows
+                        for neighbour in neighbours if name < neighbour])
+
+    return subway, [name for name, _, _, _ in rows]
+
+
+def benchmark_route_cache(n: int = 10000, sessions: int = 20, clicks: int = 10,
+                          on_route_fraction: float = 0.25) -> dict[str, float]:
+    """Return the reuse rate of a route cache, and the time (in seconds) taken with and without
+    it, over the given number of what-if sessions on a synthetic subway system with n stations.
+
+    Every session picks a random origin and destination, then avoids one more station after
+    every click and routes again, like a user re-pressing GO!. The avoided station is one of
+    the current route with probability on_route_fraction, and any other station otherwise.
+    Every cached route is checked to avoid the avoided stations and to have as few stations
+    as the route found by a new search.
+
+    Preconditions:
+        - n >= 4
+        - 0 <= on_route_fraction <= 1
+    """
+    import random
+    import route_cache
+
+    subway, names = _synthetic_subway(n)
+    cache = route_cache.RouteCache(subway)
+    randomizer = random.Random(111)
+    seconds = {'cached': 0.0, 'uncached': 0.0}
+    mismatches = 0
+
+    for _ in range(sessions):
+        origin, destination = randomizer.sample(names, 2)
+        avoided = set()
+
+        for _ in range(clicks + 1):
+            start = time.perf_counter()
+            cached = cache.find_route(origin, destination, avoided)
+            seconds['cached'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            searched = subway.find_route(origin, destination, avoided)
+            seconds['uncached'] += time.perf_counter() - start
+
+            mismatches += len(cached) != len(searched) or not avoided.isdisjoint(cached.names)
+
+            on_route = cached.names[1:-1]
+            if on_route != [] and randomizer.random() < on_route_fraction:
+                avoided.add(randomizer.choice(on_route))
+            else:
+                avoided.add(randomizer.choice(names))
+            avoided.discard(origin)
+            avoided.discard(destination)
+
+    return {'queries': cache.stats.queries(), 'reuse_rate': cache.stats.reuse_rate(),
+            'seconds_cached': seconds['cached'], 'seconds_uncached': seconds['uncached'],
+            'mismatches': mismatches}
+
+
+def benchmark_audio(presses: int = 20) -> dict[str, float]:
+    """Return the time (in milliseconds) the sounds of one GO! press take before the route is
+    animated: initializing the mixer and decoding the sounds on every press (before), and
+    playing them from the preloaded audio bank (after). Uses SDL's dummy audio driver.
+
+    Preconditions:
+        - presses >= 1
+    """
+    _init_headless_screen((1, 1))
+    import pygame
+    import audio
+
+    start = time.perf_counter()
+    for _ in range(presses):
+        pygame.mixer.init()
+        pygame.mixer.Sound(audio.SOUND_FILES['path']).play()
+        pygame.mixer.Sound(audio.SOUND_FILES['complete']).play()
+    before = (time.perf_counter() - start) / presses
+
+    bank = audio.AudioBank(audio.SOUND_FILES)
+    bank.start(music=False)
+    bank.wait()
+    start = time.perf_counter()
+    for _ in range(presses):
+        bank.play('path')
+        bank.play('complete')
+    after = (time.perf_counter() - start) / presses
+    pygame.mixer.quit()
+
+    return {'ms_per_press_decoding': before * 1000, 'ms_per_press_bank': after * 1000}
+
+
+def benchmark_route_rendering(routes: int = 200, processes: tuple[int, ...] = (1, 2, 4),
+                              csv_filepath: str = 'data/vancouver_subway.csv',
+                              image_filepath: str = 'images/vancouver_subway_system.png') \
+        -> dict[str, float]:
+    """Return the number of route diagrams per second saved by route_rendering.render_routes
+    on each of the given numbers of worker processes, for the given number of routes between
+    stations of the given subway system.
+
+    Preconditions:
+        - routes >= 1
+    """
+    import tempfile
+    import data_wrangling
+    import route_rendering
+
+    screen = _init_headless_screen((1200, 700))
+    subway = data_wrangling.read_csv_data(csv_filepath, screen)
+    names = subway.get_station_names()
+    trips = [subway.find_route(names[k % len(names)], names[(7 * k + 3) % len(names)], set())
+             for k in range(routes)]
+    results = {}
+
+    for count in processes:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            route_rendering.render_routes(subway, image_filepath, trips, directory,
+                                          processes=count)
+            results[f'diagrams_per_second_{count}_workers'] = \
+                routes / (time.perf_counter() - start)
+
+    return results
+
+
+def benchmark_input_replay(sessions: int = 20, repeat: int = 3,
+                           csv_filepath: str = 'data/vancouver_subway.csv',
+                           image_filepath: str = 'images/vancouver_subway_system.png') \
+        -> dict[str, dict[str, float]]:
+    """Return the latency distributions of replaying a scripted recording of the given number
+    of what-if sessions (see input_replay.replay) the given number of times.
+
+    Every session left-clicks two stations, right-clicks a third one to avoid it, presses GO!
+    and then RESET, all at the positions a user would click them on a 1200 by 700 screen.
+
+    Preconditions:
+        - sessions >= 1
+        - repeat >= 1
+    """
+    import tempfile
+    import data_wrangling
+    import input_recording
+    import input_replay
+
+    screen = _init_headless_screen((1200, 700))
+    coordinates = list(data_wrangling.read_csv_data(csv_filepath, screen)
+                       .get_coordinates().values())
+    recorder = input_recording.InputRecorder((1200, 700))
+    go, reset = (1200 - 150, 330), (1200 - 150, 430)
+
+    for k in range(sessions):
+        for button, pos in [(1, coordinates[k % len(coordinates)]),
+                            (1, coordinates[(7 * k + 3) % len(coordinates)]),
+                            (3, coordinates[(3 * k + 1) % len(coordinates)]), (1, go), (1, reset)]:
+            recorder.record(input_recording.RecordedClick(0.0, button, pos).to_event())
+
+    # Go through a file, like a recording of a real session
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, 'session.json')
+        recorder.recording.save(filepath)
+        recording = input_recording.load_recording(filepath)
+
+    return input_replay.replay(recording, csv_filepath, image_filepath, repeat).summary()
+
+
+def benchmark_itinerary(n: int = 10000, stops: tuple[int, ...] = (2, 5, 10, 20, 40, 60),
+                        pairwise_limit: int = 20) -> dict[int, dict[str, float]]:
+    """Return, for every given number of stops k, the time (in seconds) itinerary.plan_itinerary
+    takes to plan an itinerary through k random stops of a synthetic subway system with n
+    stations, and the number of stops of that itinerary.
+
+    For k up to pairwise_limit, also return the time O(k^2) separate shortest path searches
+    take to build the same distance matrix, and the number of stops of the itinerary found by
+    the heuristic alone (for k up to itinerary.EXACT_STOP_LIMIT, whose exact answer is known).
+
+    Preconditions:
+        - n >= max(stops) + 1
+    """
+    import random
+    import itinerary
+
+    graph = _synthetic_graph(n)
+    randomizer = random.Random(111)
+    results = {}
+
+    for k in stops:
+        start, *waypoints = randomizer.sample(list(graph.names), k + 1)
+
+        begin = time.perf_counter()
+        planned = itinerary.plan_itinerary(graph, start, waypoints)
+        results[k] = {'seconds_plan': time.perf_counter() - begin, 'hops': planned.hops,
+                      'exact': planned.exact}
+
+        if k <= pairwise_limit:
+            begin = time.perf_counter()
+            for name1 in [start] + waypoints:
+                for name2 in [start] + waypoints:
+                    graph.shortest_path(name1, name2)
+            results[k]['seconds_pairwise_matrix'] = time.perf_counter() - begin
+
+        if k <= itinerary.EXACT_STOP_LIMIT:
+            results[k]['heuristic_hops'] = \
+                itinerary.plan_itinerary(graph, start, waypoints, exact_limit=0).hops
+
+    return results
+
+
+def benchmark_query_warming(n: int = 10000, logged: int = 5000, session: int = 300,
+                            origins: int = 20, destinations: int = 40) -> dict[str, float]:
+    """Return the mean time (in milliseconds) a route query takes in a new session on a
+    synthetic subway system with n stations: with a cold route cache, with a cache warmed from
+    a query log, and with a cache that already answered the same session (the steady state).
+
+    The log holds the given number of earlier queries, whose origins (one of the given number)
+    and destinations (one of the given number per origin) are chosen with Zipf-like
+    popularity, and the session makes the given number of new queries chosen the same way.
+    Also return the fraction of the queries the warmed cache answered without a new search,
+    the time (in seconds) the warming took, the size of the log per query (in bytes), and the
+    number of warmed routes whose number of stations differs from a new search.
+
+    Preconditions:
+        - n >= origins + destinations
+    """
+    import random
+    import tempfile
+    import query_log
+    import route_cache
+
+    subway, names = _synthetic_subway(n)
+    randomizer = random.Random(111)
+    popular = randomizer.sample(names, origins)
+    pairs = [(origin, destination) for origin in popular
+             for destination in randomizer.sample(names, destinations)]
+    weights = [1 / (1 + rank) for rank in range(len(pairs))]
+
+    directory = tempfile.mkdtemp()
+    filepath = os.path.join(directory, 'queries.log')
+    log = query_log.QueryLog(filepath)
+    for origin, destination in randomizer.choices(pairs, weights, k=logged):
+        log.record(origin, destination)
+    log.close()
+    log_bytes = os.path.getsize(filepath)
+
+    queries = randomizer.choices(pairs, weights, k=session)
+    cold, warmed = route_cache.RouteCache(subway), route_cache.RouteCache(subway)
+
+    start = time.perf_counter()
+    warmed.start_warming(query_log.read_queries(filepath)).join()
+    warm_seconds = time.perf_counter() - start
+    os.remove(filepath)
+    os.rmdir(directory)
+
+    milliseconds = {}
+    mismatches = 0
+    for label, cache in (('cold', cold), ('warmed', warmed), ('steady', cold)):
+        start = time.perf_counter()
+        for origin, destination in queries:
+            cache.find_route(origin, destination, ())
+        milliseconds[label] = (time.perf_counter() - start) * 1000 / session
+
+    reuse_rate = warmed.stats.reuse_rate()
+    for origin, destination in set(queries):
+        mismatches += len(warmed.find_route(origin, destination, ())) \
+            != len(subway.find_route(origin, destination, set()))
+
+    return {'ms_cold': milliseconds['cold'], 'ms_warmed': milliseconds['warmed'],
+            'ms_steady': milliseconds['steady'], 'warmed_reuse_rate': reuse_rate,
+            'seconds_warming': warm_seconds,
+            'log_bytes_per_query': log_bytes / logged, 'mismatches': mismatches}
+
+
+def benchmark_overlay_routing(towns: tuple[int, ...] = (5, 10, 14), town_side: int = 15,
+                              queries: int = 100) -> dict[int, dict[str, float]]:
+    """Return, for every given number of towns per side of a synthetic regional network (see
+    _regional_graph), the mean time (in milliseconds) of a shortest path query with a
+    breadth-first search and with an overlay router, and the number of routes of the router
+    with a different number of stations.
+
+    Also return the time (in seconds) the router takes to partition the network and compute
+    every overlay, the number of edges between its smallest cells, and the time it takes to
+    update its overlays after one station is closed.
+
+    Preconditions:
+        - all(count >= 1 for count in towns)
+        - town_side >= 2
+    """
+    import random
+    import overlay_routing
+
+    results = {}
+    for count in towns:
+        graph = _regional_graph(count, town_side)
+        randomizer = random.Random(111)
+        trips = [(randomizer.randrange(len(graph.names)), randomizer.randrange(len(graph.names)))
+                 for _ in range(queries)]
+        router = overlay_routing.OverlayRouter()
+
+        start = time.perf_counter()
+        router.update(graph)
+        preprocessing = time.perf_counter() - start
+
+        start = time.perf_counter()
+        searched = [graph.path_indices(source, target, set()) for source, target in trips]
+        flat = time.perf_counter() - start
+
+        start = time.perf_counter()
+        routed = [router.path_indices(graph, source, target, set()) for source, target in trips]
+        overlay = time.perf_counter() - start
+
+        closed = graph.copy()
+        closed.station_open[randomizer.randrange(len(graph.names))] = 0
+        start = time.perf_counter()
+        router.update(closed)
+        update = time.perf_counter() - start
+
+        results[len(graph.names)] = {
+            'ms_flat': flat * 1000 / queries, 'ms_overlay': overlay * 1000 / queries,
+            'mismatches': sum(len(a or []) != len(b or []) for a, b in zip(searched, routed)),
+            'seconds_preprocessing': preprocessing, 'boundary_edges': router.boundary_edges(),
+            'seconds_update': update}
+
+    return results
+
+
+
+def benchmark_schematic_layout(towns: int = 7, town_side: int = 15) -> dict[str, float]:
+    """Return the time (in seconds) schematic_layout takes to lay out a synthetic regional
+    network (see _regional_graph) with towns by towns towns, its stations moved a few tens of
+    metres from their places on the grid so that its edges are not all straight, and to load
+    the layout again from its cache directory and from memory. Also return the fraction of
+    edges within 5 degrees of a multiple of 45 degrees.
+
+    Also return the time one step of the layout takes to compute the push between every two
+    stations exactly and with the Barnes-Hut scheme, and the median error of the Barnes-Hut
+    push of a station, relative to the mean exact push.
+
+    Preconditions:
+        - towns >= 1
+        - town_side >= 2
+    """
+    import math
+    import tempfile
+    import numpy as np
+    import schematic_layout
+
+    graph = _regional_graph(towns, town_side)
+    randomizer = np.random.default_rng(111)
+    locations = np.stack([np.array(graph.latitudes), np.array(graph.longitudes)], axis=1)
+    locations += randomizer.normal(0.0, 0.0003, locations.shape)
+    locations = [(latitude, longitude) for latitude, longitude in locations]
+    edges = graph.edges()
+    size = (900, 700)
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        coordinates = schematic_layout.layout_network(locations, edges, size, directory)
+        layout = time.perf_counter() - start
+
+        schematic_layout._layouts.clear()
+        start = time.perf_counter()
+        schematic_layout.layout_network(locations, edges, size, directory)
+        disk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        schematic_layout.layout_network(locations, edges, size, directory)
+        memory = time.perf_counter() - start
+        schematic_layout._layouts.clear()
+
+    points, pairs = np.array(coordinates), np.array(edges)
+    delta = points[pairs[:, 1]] - points[pairs[:, 0]]
+    angles = np.degrees(np.arctan2(delta[:, 1], delta[:, 0])) % 45
+
+    positions = schematic_layout._project(np.array(locations))
+    k = math.sqrt(1.0 / len(positions))
+    start = time.perf_counter()
+    exact = schematic_layout._push(positions, k)
+    direct = time.perf_counter() - start
+    start = time.perf_counter()
+    approximate = schematic_layout._push_barnes_hut(positions, k)
+    barnes_hut = time.perf_counter() - start
+    error = np.sqrt(((exact - approximate) ** 2).sum(axis=1))
+    mean_push = np.sqrt((exact ** 2).sum(axis=1)).mean()
+
+    return {'stations': len(locations), 'seconds_layout': layout, 'seconds_from_disk': disk,
+            'seconds_from_memory': memory,
+            'octilinear': float((np.minimum(angles, 45 - angles) < 5).mean()),
+            'seconds_push_direct': direct, 'seconds_push_barnes_hut': barnes_hut,
+            'median_relative_error': float(np.median(error) / mean_push)}
+
+
+if __name__ == '__main__':
+    print('startup:', benchmark_startup())
+    print('station memory:', benchmark_station_memory())
+    snapshot_stress = stress_test_snapshots()
+    print('snapshot stress test:', snapshot_stress)
+    assert snapshot_stress['inconsistent_reads'] == snapshot_stress['inconsistent_draws'] == 0
+    print('shared routing:', benchmark_shared_routing())
+    print('analytics:', benchmark_analytics())
+    print('csv loading:', benchmark_csv_loading())
+    print('route cache:', benchmark_route_cache())
+    print('audio:', benchmark_audio())
+    print('route rendering:', benchmark_route_rendering())
+    print('input replay:', benchmark_input_replay())
+    print('itinerary:', benchmark_itinerary())
+    print('query warming:', benchmark_query_warming())
+    print('overlay routing:', benchmark_overlay_routing())
+    print('schematic layout:', benchmark_schematic_layout())
@@ -0,0 +1,379 @@
+"""CSC111 Project 2021: The Compact Graph of the Project
+
+Description
+===========
+This file is where the compact graph representation of a subway system is found. It contains a
+class that stores the stations and edges of a subway system in packed arrays (compressed sparse
+rows), together with flags that open and close individual stations and edges in constant time,
+and a breadth-first search that finds shortest paths while honouring those flags. It also
+contains a function that evaluates a planned-maintenance scenario (a set of closures) against
+many trips at once.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+from array import array
+from typing import Iterable, Optional
+import numpy as np
+import geo
+
+
+class CompactGraph:
+    """The stations and edges of a subway system stored in packed arrays.
+
+    The neighbours of the station with index i are indices[indptr[i]:indptr[i + 1]]. Every
+    edge is stored twice (once from each side), and each of these two slots has the same
+    weight and the same open flag.
+
+    The station and edge arrays are never changed once the graph is built; only the open
+    flags are. A graph that has been shared with other threads (such as a snapshot published
+    by a Subway) must not have its flags changed either: change the flags of a copy instead.
+
+    Instance Attributes:
+        - names: The name of every station.
+        - latitudes: The latitude of every station.
+        - longitudes: The longitude of every station.
+        - indptr: Where the neighbours of every station start in indices (and end, for the
+                  last station).
+        - indices: The neighbouring stations of every station.
+        - weights: The length (in kilometres) of the edge in every slot of indices.
+        - station_open: 1 for every station that is open and 0 for every closed station.
+        - edge_open: 1 for every slot of indices whose edge is open and 0 if it is closed.
+        - version: The version of the subway system this graph was built from.
+
+    Representation Invariants:
+        - len(self.indptr) == len(self.names) + 1
+        - len(self.indices) == len(self.weights) == len(self.edge_open) == self.indptr[-1]
+        - len(self.station_open) == len(self.names)
+    """
+    names: list[str]
+    latitudes: array
+    longitudes: array
+    indptr: array
+    indices: array
+    weights: array
+    station_open: bytearray
+    edge_open: bytearray
+    version: int
+
+    # Private Instance Attributes:
+    #   - _index:
+    #       A dictionary mapping each station name to its index in names.
+    _index: dict[str, int]
+
+    def __init__(self, names: list[str], latitudes: array, longitudes: array,
+                 adjacency: list[list[int]], version: int = 0) -> None:
+        """Initialize a graph of the given stations, where adjacency[i] lists the indices
+        of the neighbours of station i. Every station and edge starts open.
+
+        Preconditions:
+            - len(names) == len(latitudes) == len(longitudes) == len(adjacency)
+            - all(i in adjacency[j] for i in range(len(adjacency)) for j in adjacency[i])
+        """
+        self.names = names
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.version = version
+        self._index = {name: i for i, name in enumerate(names)}
+
+        self.indptr = array('i', [0])
+        self.indices = array('i')
+        for neighbours in adjacency:
+            self.indices.extend(sorted(neighbours))
+            self.indptr.append(len(self.indices))
+
+        # The length of every edge, computed for all of them at once
+        rows = np.repeat(np.arange(len(names)), np.diff(np.asarray(self.indptr)))
+        columns = np.asarray(self.indices)
+        station_latitudes = np.asarray(latitudes, dtype=np.float64)
+        station_longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.weights = array('d')
+        self.weights.frombytes(geo.haversine(station_latitudes[rows], station_longitudes[rows],
+                                             station_latitudes[columns],
+                                             station_longitudes[columns]).tobytes())
+
+        self.station_open = bytearray(b'\x01') * len(names)
+        self.edge_open = bytearray(b'\x01') * len(self.indices)
+
+    def copy(self) -> CompactGraph:
+        """Return a copy of this graph whose open flags can be changed without affecting
+        this graph.
+
+        Only the flags are copied; the copy shares the (never changed) station and edge
+        arrays with this graph.
+        """
+        graph = type(self).__new__(type(self))
+        graph.__dict__.update(self.__dict__)
+        graph.station_open = bytearray(self.station_open)
+        graph.edge_open = bytearray(self.edge_open)
+
+        return graph
+
+    def edges(self) -> list[tuple[int, int]]:
+        """Return every edge of this graph exactly once, as a pair (i, j) of station indices
+        with i < j.
+        """
+        edges = self._edge_array()
+        return list(zip(edges[:, 0].tolist(), edges[:, 1].tolist()))
+
+    def geometry(self) -> geo.StationGeometry:
+        """Return the geometry of the stations and edges of this graph.
+
+        The geometry of a snapshot of a subway system is consistent even if the subway system
+        is changed by another thread at the same time.
+        """
+        return geo.StationGeometry(list(self.names), np.array(self.latitudes, dtype=np.float64),
+                                   np.array(self.longitudes, dtype=np.float64),
+                                   self._edge_array())
+
+    def _edge_array(self) -> np.ndarray:
+        """Return an integer array of shape (m, 2) holding every edge (i, j) of this graph with
+        i < j exactly once, read straight from the packed arrays.
+        """
+        rows = np.repeat(np.arange(len(self.names)), np.diff(np.asarray(self.indptr)))
+        columns = np.asarray(self.indices, dtype=np.int64)
+        forward = rows < columns
+
+        return np.stack([rows[forward], columns[forward]], axis=1)
+
+    def _slot_of(self, i: int, j: int) -> int:
+        """Return the slot of indices holding the edge from station i to station j.
+
+        Preconditions:
+            - j is a neighbour of i
+        """
+        # The neighbours of every station are sorted, so use a binary search
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.indices[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def _edge_slots(self, i: int, j: int) -> tuple[int, int]:
+        """Return the slots of indices holding the edge between stations i and j, from the
+        side of the station with the smaller index first.
+
+        Preconditions:
+            - j is a neighbour of i
+        """
+        i, j = min(i, j), max(i, j)
+        return self._slot_of(i, j), self._slot_of(j, i)
+
+    def index_of(self, name: str) -> int:
+        """Return the index of the station with the given name.
+
+        Preconditions:
+            - self.has_station(name)
+        """
+        return self._index[name]
+
+    def has_station(self, name: str) -> bool:
+        """Return whether this graph has a station with the given name."""
+        return name in self._index
+
+    def has_edge(self, name1: str, name2: str) -> bool:
+        """Return whether this graph has an edge between the two stations with the given
+        names (whether it is open or closed).
+        """
+        if not (self.has_station(name1) and self.has_station(name2)):
+            return False
+
+        i, j = self.index_of(name1), self.index_of(name2)
+        slot = self._slot_of(i, j)
+        return slot < self.indptr[i + 1] and self.indices[slot] == j
+
+    def set_station_open(self, name: str, is_open: bool) -> None:
+        """Open or close the station with the given name.
+
+        Preconditions:
+            - self.has_station(name)
+        """
+        self.station_open[self.index_of(name)] = is_open
+
+    def set_edge_open(self, name1: str, name2: str, is_open: bool) -> None:
+        """Open or close the edge between the two stations with the given names.
+
+        Preconditions:
+            - self.has_edge(name1, name2)
+        """
+        slot1, slot2 = self._edge_slots(self.index_of(name1), self.index_of(name2))
+        self.edge_open[slot1] = is_open
+        self.edge_open[slot2] = is_open
+
+    def edge_weight(self, i: int, j: int) -> float:
+        """Return the length (in kilometres) of the edge between stations i and j.
+
+        Preconditions:
+            - j is a neighbour of i
+        """
+        return self.weights[self._edge_slots(i, j)[0]]
+
+    def is_station_open(self, name: str) -> bool:
+        """Return whether the station with the given name is open.
+
+        Preconditions:
+            - self.has_station(name)
+        """
+        return self.station_open[self.index_of(name)] == 1
+
+    def is_edge_open(self, name1: str, name2: str) -> bool:
+        """Return whether the edge between the two stations with the given names is open.
+
+        Preconditions:
+            - self.has_edge(name1, name2)
+        """
+        slot, _ = self._edge_slots(self.index_of(name1), self.index_of(name2))
+        return self.edge_open[slot] == 1
+
+    def shortest_path(self, name1: str, name2: str, visited: Iterable[str] = ()) -> list[str]:
+        """Return the shortest path (with the fewest stations) between the two stations with
+        the given names without visiting any of the stations in visited, or any closed station
+        or edge.
+
+        Return [] if no such path exists.
+
+        Preconditions:
+            - self.has_station(name1) and self.has_station(name2)
+            - all(self.has_station(name) for name in visited)
+        """
+        avoid = {self.index_of(name) for name in visited}
+        path = self.path_indices(self.index_of(name1), self.index_of(name2), avoid)
+
+        if path is None:
+            return []
+        else:
+            return [self.names[i] for i in path]
+
+    def path_indices(self, source: int, target: int, avoid: set[int]) -> Optional[list[int]]:
+        """Return the indices of the stations on the shortest path from source to target
+        that avoids the stations in avoid and every closed station and edge, or None if there
+        is no such path.
+        """
+        if source in avoid or target in avoid or not self.station_open[source] \
+                or not self.station_open[target]:
+            return None
+
+        parent, _ = self.search_tree(source, avoid, {target})
+        if target not in parent:
+            return None
+
+        return tree_path(parent, source, target)
+
+    def search_tree(self, source: int, avoid: set[int], targets: Optional[set[int]] = None,
+                    max_hops: Optional[int] = None) -> tuple[dict[int, int], dict[int, int]]:
+        """Return the parent and the number of stops from source of every station reached by
+        a breadth-first search from source that avoids the stations in avoid and every closed
+        station and edge. The search stops once every station of targets is reached (it
+        reaches every station it can if targets is None), and never goes further than
+        max_hops stops from source (unless max_hops is None).
+
+        Preconditions:
+            - max_hops is None or max_hops >= 0
+        """
+        parent, hops = {source: source}, {source: 0}
+        if source in avoid or not self.station_open[source]:
+            return parent, hops
+
+        indptr, indices = self.indptr, self.indices
+        station_open, edge_open = self.station_open, self.edge_open
+        remaining = len(targets - {source}) if targets is not None else len(self.names)
+        frontier = [source]
+        depth = 0
+
+        # Breadth-first search, one layer of stations at a time
+        while frontier != [] and remaining > 0 and (max_hops is None or depth < max_hops):
+            depth += 1
+            next_frontier = []
+
+            for u in frontier:
+                for slot in range(indptr[u], indptr[u + 1]):
+                    v = indices[slot]
+                    if edge_open[slot] and v not in parent and station_open[v] \
+                            and v not in avoid:
+                        parent[v] = u
+                        hops[v] = depth
+                        next_frontier.append(v)
+                        remaining -= targets is None or v in targets
+
+            frontier = next_frontier
+
+        return parent, hops
+
+
+def tree_path(parent: dict[int, int], source: int, target: int) -> list[int]:
+    """Return the path from source to target in the search tree with the given parents (see
+    CompactGraph.search_tree).
+
+    Preconditions:
+        - target in parent
+    """
+    path = [target]
+    while path[-1] != source:
+        path.append(parent[path[-1]])
+    path.reverse()
+
+    return path
+
+
+def evaluate_scenario(graph: CompactGraph, closed_stations: Iterable[str],
+                      closed_edges: Iterable[tuple[str, str]],
+                      trips: list[tuple[str, str]]) -> list[list[str]]:
+    """Return the shortest path of every trip (a pair of station names) in the given graph
+    while the given stations and edges are closed.
+
+    The closures are only in effect during this call: the flags they change are restored
+    afterwards, so scenarios can be evaluated one after another in a loop. To evaluate a
+    scenario on a snapshot of a subway system, pass a copy of the snapshot.
+
+    Preconditions:
+        - all(graph.has_station(name) for name in closed_stations)
+        - all(graph.has_edge(name1, name2) for name1, name2 in closed_edges)
+        - all(graph.has_station(a) and graph.has_station(b) for a, b in trips)
+    """
+    # Remember the flags that are about to change, so they can be restored exactly
+    stations = [(name, graph.is_station_open(name)) for name in closed_stations]
+    edges = [(name1, name2, graph.is_edge_open(name1, name2)) for name1, name2 in closed_edges]
+
+    for name, _ in stations:
+        graph.set_station_open(name, False)
+    for name1, name2, _ in edges:
+        graph.set_edge_open(name1, name2, False)
+
+    try:
+        return [graph.shortest_path(name1, name2) for name1, name2 in trips]
+    finally:
+        for name, was_open in reversed(stations):
+            graph.set_station_open(name, was_open)
+        for name1, name2, was_open in reversed(edges):
+            graph.set_edge_open(name1, name2, was_open)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'array', 'numpy', 'geo'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
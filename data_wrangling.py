@@ -4,7 +4,11 @@ Description
 ===========
 This file is where the data wrangling of this project occurs. It contains a function
 that reads from a csv file with a format matching the 'vancouver_subway.csv' file and
-returns a Subway graph class representation of the subway system csv file given.
+returns a Subway graph class representation of the subway system csv file given, along with
+a report of the problems found in the file (such as neighbours that have no row) and of how
+fast it was loaded. A csv file may leave out the pygame coordinates of its stations (the
+x-coordinate and y-coordinate columns, or some of their values), in which case the subway
+system is laid out from its locations and edges by schematic_layout.
 
 Copyright and Usage Information
 ===============================
@@ -16,10 +20,64 @@ This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
 and Jennifer Cao.
 """
 import csv
+import gc
+import time
 import pygame
+import schematic_layout
 import subway_system
 
 
+class LoadReport:
+    """A report of loading a subway system from a csv file.
+
+    Instance Attributes:
+        - rows: The number of station rows read.
+        - stations: The number of stations loaded.
+        - edges: The number of distinct edges loaded.
+        - duplicate_stations: The names of stations with more than one row (only the first
+                              row of each is loaded).
+        - asymmetric_edges: The edges (name, neighbour) listed by one of their stations but not
+                            by the other one. They are still loaded.
+        - missing_neighbours: The pairs (name, neighbour) where neighbour has no row. These
+                              edges are not loaded.
+        - seconds: The time (in seconds) loading took.
+        - laid_out: Whether the csv file left out pygame coordinates, so that the subway
+                    system was laid out by schematic_layout (and has no background image).
+        - empty: Whether the csv file was empty (without even a header row), so that an empty
+                 subway system was loaded.
+    """
+    rows: int
+    stations: int
+    edges: int
+    duplicate_stations: list[str]
+    asymmetric_edges: list[tuple[str, str]]
+    missing_neighbours: list[tuple[str, str]]
+    seconds: float
+    laid_out: bool
+    empty: bool
+
+    def __init__(self) -> None:
+        """Initialize an empty report."""
+        self.rows = self.stations = self.edges = 0
+        self.duplicate_stations = []
+        self.asymmetric_edges = []
+        self.missing_neighbours = []
+        self.seconds = 0.0
+        self.laid_out = False
+        self.empty = False
+
+    def rows_per_second(self) -> float:
+        """Return the number of rows loaded per second."""
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+    def is_valid(self) -> bool:
+        """Return whether the csv file was not empty and had no duplicate stations, asymmetric
+        edges or missing neighbours.
+        """
+        return not self.empty and self.duplicate_stations == [] and \
+            self.asymmetric_edges == [] and self.missing_neighbours == []
+
+
 def read_csv_data(filepath: str, screen: pygame.Surface) -> subway_system.Subway:
     """Return a Subway graph class representing the subway system of the given filepath.
 
@@ -27,29 +85,109 @@ def read_csv_data(filepath: str, screen: pygame.Surface) -> subway_system.Subway
 
     Preconditions:
         - the csv file of the corresponding filepath matches the format of 'vancouver_subway.csv'
+          (with or without pygame coordinates)
     """
-    with open(filepath) as file:
-        reader = csv.reader(file)
+    return load_csv_data(filepath, screen)[0]
 
-        # Skip header row
-        next(reader)
 
-        # Initialize a subway system
-        subway = subway_system.Subway(screen)
+def load_csv_data(filepath: str, screen: pygame.Surface) \
+        -> tuple[subway_system.Subway, LoadReport]:
+    """Return a Subway graph class representing the subway system of the given filepath,
+    and a report of loading it.
 
-        for row in reader:
-            # Determine the name, location, coordinates, and neighbours of the current station
-            name = row[0]
-            location = (float(row[1]), float(row[2]))
-            coordinates = (int(row[3]), int(row[4]))
-            neighbours = str.split(row[5], ',')
+    The whole file is parsed first, and the edges are then resolved and deduplicated in a
+    single batch, so the order of the rows does not matter and every edge is added once.
 
-            # Add the current station to the subway system
-            subway.add_station(name, location, coordinates)
+    screen is the pygame Surface the subway system will be later displayed on.
 
-            # Add edges between the current station and its neighbours
-            for neighbour_name in neighbours:
-                subway.add_edge(name, neighbour_name)
+    Preconditions:
+        - the csv file of the corresponding filepath matches the format of 'vancouver_subway.csv'
+          (with or without pygame coordinates)
+    """
+    start = time.perf_counter()
+    report = LoadReport()
+
+    with open(filepath, newline='') as file:
+        rows = list(csv.reader(file))
+
+    if rows == []:
+        # An empty file has no header row to check, and loads an empty subway system
+        report.empty = True
+        header = []
+    else:
+        header = rows.pop(0)
+
+    if 'x-coordinate' not in header:
+        # Give the rows empty coordinates, so that the subway system is laid out
+        rows = [row[:3] + ['', ''] + row[3:] for row in rows]
+
+    # Loading creates many objects that all stay alive, so collecting garbage in the middle of
+    # it only wastes time
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        subway = _load_rows(rows, screen, report)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    report.seconds = time.perf_counter() - start
+
+    return subway, report
+
+
+def _load_rows(rows: list[list[str]], screen: pygame.Surface, report: LoadReport) \
+        -> subway_system.Subway:
+    """Return a Subway graph class representing the subway system of the given csv rows (not
+    including the header row), and fill in everything but the time of the given report.
+    """
+    # Keep the first row of every station
+    stations = {}
+    for row in rows:
+        if row[0] in stations:
+            report.duplicate_stations.append(row[0])
+        else:
+            stations[row[0]] = row
+
+    # The distinct neighbours listed by every station
+    listed = {name: set(row[5].split(',')) for name, row in stations.items()}
+
+    # Check every listed pair once, and keep one orientation of every edge
+    edges = []
+    for name, neighbour_names in listed.items():
+        neighbour_names.discard('')
+        neighbour_names.discard(name)
+        for neighbour_name in neighbour_names:
+            reverse = listed.get(neighbour_name)
+            if reverse is None:
+                report.missing_neighbours.append((name, neighbour_name))
+            elif name not in reverse:
+                report.asymmetric_edges.append((name, neighbour_name))
+                edges.append((name, neighbour_name))
+            elif name < neighbour_name:
+                edges.append((name, neighbour_name))
+
+    report.missing_neighbours.sort()
+    report.asymmetric_edges.sort()
+
+    locations = [(float(row[1]), float(row[2])) for row in stations.values()]
+    if all(row[3] != '' and row[4] != '' for row in stations.values()):
+        coordinates = [(int(row[3]), int(row[4])) for row in stations.values()]
+    else:
+        # Lay the subway system out in the part of the screen left of the sidebar
+        index = {name: i for i, name in enumerate(stations)}
+        coordinates = schematic_layout.layout_network(
+            locations, [(index[name1], index[name2]) for name1, name2 in edges],
+            (screen.get_width() - schematic_layout.SIDEBAR_WIDTH, screen.get_height()))
+        report.laid_out = True
+
+    # Initialize a subway system, and add all the stations and edges to it at once
+    subway = subway_system.Subway(screen)
+    subway.add_network(list(zip(stations, locations, coordinates)), edges)
+
+    report.rows = len(rows)
+    report.stations = len(stations)
+    report.edges = len(edges)
 
     return subway
 
@@ -65,9 +203,10 @@ if __name__ == '__main__':
     python_ta.check_all(
         config={
             # The names (strs) of imported modules
-            'extra-imports': ['python_ta.contracts', 'csv', 'pygame', 'subway_system'],
+            'extra-imports': ['python_ta.contracts', 'csv', 'gc', 'time', 'pygame',
+                              'schematic_layout', 'subway_system'],
             # The names (strs) of functions that call print/open/input
-            'allowed-io': ['read_csv_data'],
+            'allowed-io': ['load_csv_data'],
             'max-line-length': 100,
             'disable': ['E1136']
         }
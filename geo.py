@@ -0,0 +1,242 @@
+"""CSC111 Project 2021: The Geographic Computations of the Project
+
+Description
+===========
+This file is where the vectorized geographic computations of this project occur. It contains
+a class that stores the latitudes and longitudes of every station of a subway system in NumPy
+arrays, and functions that work on whole arrays of coordinates at once: projecting them onto a
+pygame screen of any size or zoom, computing great-circle (haversine) distances, and computing
+bounding boxes.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088  # Mean radius of the Earth
+
+
+def haversine(lat1: np.ndarray, lon1: np.ndarray,
+              lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Return the great-circle distances (in kilometres) between the points (lat1, lon1)
+    and (lat2, lon2), computed element-wise.
+
+    The arguments are in degrees and may be any arrays (or floats) that broadcast together.
+
+    >>> round(float(haversine(49.0, -123.0, 49.0, -123.0)), 6)
+    0.0
+    >>> round(float(haversine(0.0, 0.0, 0.0, 1.0)), 2)
+    111.2
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(latitudes: np.ndarray, longitudes: np.ndarray) \
+        -> tuple[float, float, float, float]:
+    """Return the bounding box (min latitude, min longitude, max latitude, max longitude)
+    of the given coordinates.
+
+    Preconditions:
+        - len(latitudes) == len(longitudes) > 0
+
+    >>> bounding_box(np.array([49.2, 49.3]), np.array([-123.1, -122.9]))
+    (49.2, -123.1, 49.3, -122.9)
+    """
+    return (float(latitudes.min()), float(longitudes.min()),
+            float(latitudes.max()), float(longitudes.max()))
+
+
+def project_to_screen(latitudes: np.ndarray, longitudes: np.ndarray,
+                      screen_size: tuple[int, int],
+                      bounds: tuple[float, float, float, float],
+                      zoom: float = 1.0, center: Optional[tuple[float, float]] = None,
+                      margin: int = 20) -> np.ndarray:
+    """Return an integer array of shape (n, 2) containing the pygame (x, y) coordinates of the
+    given latitudes and longitudes.
+
+    The coordinates are projected with an equirectangular projection (longitudes are scaled
+    by the cosine of the latitude at the centre of bounds). At a zoom of 1.0, the given bounds
+    fit inside the screen, leaving margin pixels on every side. center is the (latitude,
+    longitude) placed at the centre of the screen and defaults to the centre of bounds.
+
+    Preconditions:
+        - len(latitudes) == len(longitudes)
+        - screen_size[0] > 2 * margin and screen_size[1] > 2 * margin
+        - zoom > 0
+
+    >>> project_to_screen(np.array([0.0, 1.0]), np.array([0.0, 1.0]), (120, 120),
+    ...                   (0.0, 0.0, 1.0, 1.0), margin=10).tolist()
+    [[10, 110], [110, 10]]
+    """
+    min_lat, min_lon, max_lat, max_lon = bounds
+    if center is None:
+        center = ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2)
+
+    reference_latitude = (min_lat + max_lat) / 2
+    pixels = pixels_per_degree(bounds, screen_size, margin) * zoom
+
+    plane = project_to_plane(latitudes, longitudes, reference_latitude)
+    plane_center = project_to_plane(np.array([center[0]]), np.array([center[1]]),
+                                    reference_latitude)
+
+    width, height = screen_size
+    return np.rint((plane - plane_center) * pixels + (width / 2, height / 2)).astype(np.int64)
+
+
+def project_to_plane(latitudes: np.ndarray, longitudes: np.ndarray,
+                     reference_latitude: float) -> np.ndarray:
+    """Return a float array of shape (n, 2) containing the equirectangular projection of the
+    given latitudes and longitudes, measured in degrees of latitude.
+
+    Longitudes are scaled by the cosine of reference_latitude so that distances near that
+    latitude look right, and the second column grows southwards (like pygame's y-coordinates).
+
+    >>> project_to_plane(np.array([60.0]), np.array([10.0]), 60.0).round(6).tolist()
+    [[5.0, -60.0]]
+    """
+    plane = np.empty((len(latitudes), 2), dtype=np.float64)
+    plane[:, 0] = longitudes * np.cos(np.radians(reference_latitude))
+    # Latitudes grow upwards, but pygame's y-coordinates grow downwards
+    plane[:, 1] = -latitudes
+
+    return plane
+
+
+def pixels_per_degree(bounds: tuple[float, float, float, float],
+                      screen_size: tuple[int, int], margin: int = 20) -> float:
+    """Return the number of pixels per degree of latitude at which the given bounds fit inside
+    a screen of the given size, leaving margin pixels on every side.
+
+    Preconditions:
+        - screen_size[0] > 2 * margin and screen_size[1] > 2 * margin
+    """
+    min_lat, min_lon, max_lat, max_lon = bounds
+    x_scale = np.cos(np.radians((min_lat + max_lat) / 2))
+
+    width, height = screen_size
+    span_x = max((max_lon - min_lon) * x_scale, 1e-9)
+    span_y = max(max_lat - min_lat, 1e-9)
+
+    return float(min((width - 2 * margin) / span_x, (height - 2 * margin) / span_y))
+
+
+class StationGeometry:
+    """The coordinates of all the stations of a subway system, stored in NumPy arrays.
+
+    Instance Attributes:
+        - names: The names of the stations. The station names[i] is at
+                 (latitudes[i], longitudes[i]).
+        - latitudes: The latitudes of the stations.
+        - longitudes: The longitudes of the stations.
+        - edges: An integer array of shape (m, 2), where each row holds the indices
+                 of the two stations joined by an edge.
+
+    Representation Invariants:
+        - len(self.names) == len(self.latitudes) == len(self.longitudes)
+        - all(0 <= i < len(self.names) for i in self.edges.flatten())
+    """
+    names: list[str]
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    edges: np.ndarray
+
+    # Private Instance Attributes:
+    #   - _index:
+    #       A dictionary mapping each station name to its index in names.
+    _index: dict[str, int]
+
+    def __init__(self, names: list[str], latitudes: np.ndarray, longitudes: np.ndarray,
+                 edges: np.ndarray) -> None:
+        """Initialize the geometry of the given stations and edges.
+
+        Preconditions:
+            - len(names) == len(latitudes) == len(longitudes)
+            - edges.shape == (len(edges), 2)
+        """
+        self.names = names
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def index_of(self, name: str) -> int:
+        """Return the index of the station with the given name.
+
+        Preconditions:
+            - name in self.names
+        """
+        return self._index[name]
+
+    def bounding_box(self) -> tuple[float, float, float, float]:
+        """Return the bounding box (min latitude, min longitude, max latitude, max longitude)
+        of the stations.
+
+        Preconditions:
+            - len(self.names) > 0
+        """
+        return bounding_box(self.latitudes, self.longitudes)
+
+    def project(self, screen_size: tuple[int, int], zoom: float = 1.0,
+                center: Optional[tuple[float, float]] = None, margin: int = 20) -> np.ndarray:
+        """Return an integer array of shape (n, 2) containing the pygame coordinates of
+        every station, for a screen of the given size, zoom and center.
+
+        See project_to_screen for the meaning of the arguments.
+
+        Preconditions:
+            - len(self.names) > 0
+        """
+        return project_to_screen(self.latitudes, self.longitudes, screen_size,
+                                 self.bounding_box(), zoom, center, margin)
+
+    def edge_lengths(self) -> np.ndarray:
+        """Return the length (in kilometres) of every edge, in the same order as edges.
+        """
+        first, second = self.edges[:, 0], self.edges[:, 1]
+        return haversine(self.latitudes[first], self.longitudes[first],
+                         self.latitudes[second], self.longitudes[second])
+
+    def distances_from(self, latitude: float, longitude: float) -> np.ndarray:
+        """Return the distance (in kilometres) from the given point to every station.
+        """
+        return haversine(latitude, longitude, self.latitudes, self.longitudes)
+
+    def nearest_station(self, latitude: float, longitude: float) -> str:
+        """Return the name of the station closest to the given point.
+
+        Preconditions:
+            - len(self.names) > 0
+        """
+        return self.names[int(np.argmin(self.distances_from(latitude, longitude)))]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'numpy'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,136 @@
+"""CSC111 Project 2021: The Input Recording of the Project
+
+Description
+===========
+This file is where the mouse clicks of pygame visualization sessions are recorded. It contains a
+class that records every MOUSEBUTTONDOWN event of a session (when it happened, which button was
+pressed and where) and saves them as a JSON file, and a function that loads such a file back,
+so that the session can later be replayed without a user (see input_replay.py).
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import json
+import time
+import pygame
+
+
+class RecordedClick:
+    """A mouse click recorded in a pygame visualization session.
+
+    Instance Attributes:
+        - seconds: The time (in seconds) from the start of the session to the click.
+        - button: The mouse button pressed (1 for left, 2 for middle, 3 for right).
+        - pos: The pygame coordinates (x, y) of the click.
+
+    Representation Invariants:
+        - self.seconds >= 0
+    """
+    seconds: float
+    button: int
+    pos: tuple[int, int]
+
+    def __init__(self, seconds: float, button: int, pos: tuple[int, int]) -> None:
+        """Initialize a click of the given button at the given time and position."""
+        self.seconds = seconds
+        self.button = button
+        self.pos = pos
+
+    def to_event(self) -> pygame.event.Event:
+        """Return the MOUSEBUTTONDOWN event of this click."""
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=self.button, pos=self.pos)
+
+
+class Recording:
+    """The mouse clicks of a pygame visualization session.
+
+    Instance Attributes:
+        - screen_size: The size (width, height) of the screen of the session.
+        - clicks: The clicks of the session, in the order they happened.
+    """
+    screen_size: tuple[int, int]
+    clicks: list[RecordedClick]
+
+    def __init__(self, screen_size: tuple[int, int],
+                 clicks: list[RecordedClick]) -> None:
+        """Initialize a recording of the given clicks on a screen of the given size."""
+        self.screen_size = screen_size
+        self.clicks = clicks
+
+    def save(self, filepath: str) -> None:
+        """Save this recording as a JSON file with the given filepath."""
+        contents = {'screen_size': list(self.screen_size),
+                    'clicks': [[click.seconds, click.button, list(click.pos)]
+                               for click in self.clicks]}
+
+        with open(filepath, 'w') as file:
+            json.dump(contents, file)
+
+
+def load_recording(filepath: str) -> Recording:
+    """Return the recording saved in the JSON file with the given filepath.
+
+    Preconditions:
+        - the file was saved by Recording.save
+    """
+    with open(filepath) as file:
+        contents = json.load(file)
+
+    return Recording(tuple(contents['screen_size']),
+                     [RecordedClick(seconds, button, tuple(pos))
+                      for seconds, button, pos in contents['clicks']])
+
+
+class InputRecorder:
+    """A recorder of the mouse clicks of a pygame visualization session.
+
+    Instance Attributes:
+        - recording: The clicks recorded so far.
+    """
+    recording: Recording
+
+    # Private Instance Attributes:
+    #   - _start:
+    #       The time (from time.perf_counter) the session started.
+    _start: float
+
+    def __init__(self, screen_size: tuple[int, int]) -> None:
+        """Start recording a session on a screen of the given size."""
+        self.recording = Recording(screen_size, [])
+        self._start = time.perf_counter()
+
+    def record(self, event: pygame.event.Event) -> None:
+        """Record the given event.
+
+        Preconditions:
+            - event.type == pygame.MOUSEBUTTONDOWN
+        """
+        self.recording.clicks.append(RecordedClick(time.perf_counter() - self._start,
+                                                   event.button, tuple(event.pos)))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'json', 'time', 'pygame'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': ['Recording.save', 'load_recording'],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,254 @@
+"""CSC111 Project 2021: The Input Replay of the Project
+
+Description
+===========
+This file is where recorded pygame visualization sessions (see input_recording.py) are replayed
+to measure how long the visualization takes to respond to each click. The clicks are fed, as
+fast as possible and without a window (with SDL's dummy video and audio drivers), through the
+same mouse click handlers the visualization uses, each followed by the frame the visualization
+would draw after it. The latencies of every click, of every handler and of every frame are
+collected into distributions, which can be checked against a latency budget so that UI
+performance regressions are caught automatically.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import os
+import time
+from typing import Callable, Optional
+import numpy as np
+import pygame
+import data_wrangling
+import input_recording
+import pygame_mouse_click_handling
+import pygame_visualization
+
+
+# The mouse click handlers called by pygame_mouse_click_handling.handle_mouse_click, whose
+# latencies are measured separately
+HANDLERS = ('handle_left_click_station', 'handle_right_click_station', 'handle_click_reset',
+            'handle_click_go', 'handle_click_map_view')
+
+# The percentiles reported for every latency distribution
+PERCENTILES = (50, 90, 99)
+
+# The SDL drivers a replay runs with, so that it opens no window and plays no sound
+_HEADLESS_DRIVERS = {'SDL_VIDEODRIVER': 'dummy', 'SDL_AUDIODRIVER': 'dummy'}
+
+
+class LatencyStats:
+    """The distribution of the latencies (in milliseconds) of one step of handling clicks.
+
+    Instance Attributes:
+        - samples: The latencies measured, in the order they were measured.
+    """
+    samples: list[float]
+
+    def __init__(self) -> None:
+        """Initialize a distribution with no latencies."""
+        self.samples = []
+
+    def add(self, milliseconds: float) -> None:
+        """Add the given latency to this distribution."""
+        self.samples.append(milliseconds)
+
+    def percentile(self, percent: float) -> float:
+        """Return the given percentile of this distribution (0.0 if it has no latencies).
+
+        Preconditions:
+            - 0 <= percent <= 100
+        """
+        if self.samples == []:
+            return 0.0
+
+        return float(np.percentile(self.samples, percent))
+
+    def summary(self) -> dict[str, float]:
+        """Return the number of latencies, and their mean, maximum and PERCENTILES, of this
+        distribution.
+        """
+        summary = {'count': len(self.samples),
+                   'mean_ms': float(np.mean(self.samples)) if self.samples != [] else 0.0,
+                   'max_ms': max(self.samples, default=0.0)}
+        for percent in PERCENTILES:
+            summary[f'p{percent}_ms'] = self.percentile(percent)
+
+        return summary
+
+
+class ReplayReport:
+    """The latencies measured while replaying a recorded session.
+
+    Instance Attributes:
+        - events: The latency of every click, from the start of its handling to the end of the
+                  frame drawn after it.
+        - handling: The latency of handle_mouse_click for every click.
+        - frames: The latency of drawing the frame after every click.
+        - handlers: The latencies of every handler in HANDLERS, mapped to its name.
+    """
+    events: LatencyStats
+    handling: LatencyStats
+    frames: LatencyStats
+    handlers: dict[str, LatencyStats]
+
+    def __init__(self) -> None:
+        """Initialize a report with no latencies."""
+        self.events = LatencyStats()
+        self.handling = LatencyStats()
+        self.frames = LatencyStats()
+        self.handlers = {name: LatencyStats() for name in HANDLERS}
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return the summary of every distribution of this report, mapped to its name."""
+        summary = {'event': self.events.summary(), 'handle_mouse_click': self.handling.summary(),
+                   'frame': self.frames.summary()}
+        for name, stats in self.handlers.items():
+            summary[name] = stats.summary()
+
+        return summary
+
+    def over_budget(self, budget_ms: float, percent: float = 99) -> list[str]:
+        """Return the names (as in summary) of the distributions of this report whose given
+        percentile is more than budget_ms milliseconds.
+        """
+        distributions = {'event': self.events, 'handle_mouse_click': self.handling,
+                         'frame': self.frames, **self.handlers}
+
+        return [name for name, stats in distributions.items()
+                if stats.percentile(percent) > budget_ms]
+
+
+def _timed(function: Callable, stats: LatencyStats) -> Callable:
+    """Return a function that calls the given function and adds the latency of every call to
+    the given distribution.
+    """
+    def timed_function(*args: object) -> object:
+        start = time.perf_counter()
+        result = function(*args)
+        stats.add((time.perf_counter() - start) * 1000)
+        return result
+
+    return timed_function
+
+
+def replay(recording: input_recording.Recording, csv_filepath: str,
+           subway_image_filename: Optional[str], repeat: int = 1,
+           animation_delay: int = 0) -> ReplayReport:
+    """Replay the given recording on the subway system of the given csv file and image (or
+    drawn edges, if subway_image_filename is None) the given number of times, and return the
+    latencies measured.
+
+    Every replay starts from a freshly loaded subway system, like a new session. The time
+    between displaying the stations of a shortest path is animation_delay milliseconds
+    (instead of pygame_mouse_click_handling.PATH_ANIMATION_DELAY), and MAP VIEW writes its maps
+    without opening them in the web browser.
+
+    The replay opens no window: a display the caller already initialized is quit first (closing
+    its window), and the display is quit again once the replay is over.
+
+    Preconditions:
+        - repeat >= 1
+        - animation_delay >= 0
+    """
+    report = ReplayReport()
+    handlers = {name: getattr(pygame_mouse_click_handling, name) for name in HANDLERS}
+    settings = (pygame_mouse_click_handling.PATH_ANIMATION_DELAY,
+                pygame_mouse_click_handling.OPEN_MAPS_IN_BROWSER)
+
+    # handle_mouse_click looks its handlers up when it is called, so timed versions of them
+    # are swapped in for the duration of the replay
+    for name, handler in handlers.items():
+        setattr(pygame_mouse_click_handling, name, _timed(handler, report.handlers[name]))
+    pygame_mouse_click_handling.PATH_ANIMATION_DELAY = animation_delay
+    pygame_mouse_click_handling.OPEN_MAPS_IN_BROWSER = False
+
+    # Replay headlessly whatever drivers the caller chose, and give them back afterwards. SDL
+    # only reads the video driver when the display is initialized, so a display the caller
+    # initialized must be quit for the dummy driver to take effect
+    drivers = {name: os.environ.get(name) for name in _HEADLESS_DRIVERS}
+    os.environ.update(_HEADLESS_DRIVERS)
+    pygame.display.quit()
+
+    try:
+        screen = pygame_visualization.initialize_screen(recording.screen_size,
+                                                        [pygame.MOUSEBUTTONDOWN], 'lightblue')
+        for _ in range(repeat):
+            _replay_session(screen, recording, csv_filepath, subway_image_filename, report)
+    finally:
+        for name, handler in handlers.items():
+            setattr(pygame_mouse_click_handling, name, handler)
+        pygame_mouse_click_handling.PATH_ANIMATION_DELAY, \
+            pygame_mouse_click_handling.OPEN_MAPS_IN_BROWSER = settings
+        pygame.display.quit()
+        _restore_environment(drivers)
+
+    return report
+
+
+def _restore_environment(values: dict[str, Optional[str]]) -> None:
+    """Set every given environment variable back to its given value (or unset it if its
+    value is None).
+    """
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def _replay_session(screen: pygame.Surface, recording: input_recording.Recording,
+                    csv_filepath: str, subway_image_filename: Optional[str],
+                    report: ReplayReport) -> None:
+    """Replay the given recording once on the given screen, from the start of a new session,
+    and add the latencies measured to the given report.
+    """
+    subway = data_wrangling.read_csv_data(csv_filepath, screen)
+    buttons = pygame_visualization.draw_background(screen, subway_image_filename, subway)
+    pygame_visualization.draw_frame(screen, subway, buttons)
+
+    selected_stations = []
+    removed_stations = set()
+    shortest_path = subway.empty_route()
+
+    for click in recording.clicks:
+        event = click.to_event()
+
+        start = time.perf_counter()
+        shortest_path = pygame_mouse_click_handling.handle_mouse_click(
+            screen, subway, buttons, event, selected_stations, removed_stations, shortest_path)
+        handled = time.perf_counter()
+        pygame_visualization.draw_frame(screen, subway, buttons)
+        drawn = time.perf_counter()
+
+        report.handling.add((handled - start) * 1000)
+        report.frames.add((drawn - handled) * 1000)
+        report.events.add((drawn - start) * 1000)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'os', 'time', 'numpy', 'pygame',
+                              'data_wrangling', 'input_recording', 'pygame_mouse_click_handling',
+                              'pygame_visualization'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,172 @@
+"""CSC111 Project 2021: The Isochrones of the Project
+
+Description
+===========
+This file is where the reachability (isochrone) queries of this project are found. Instead of
+asking for the path between two stations, these queries ask for every station reachable from an
+origin within some number of stops or minutes, without visiting a set of avoided stations. Each
+query is answered by a single search from the origin that stops at the limit, and returns the
+distance of every station as a NumPy array indexed like the stations of a compact graph. There
+is also a batched version that answers the same query from many origins at once.
+
+The subway data has no timetables, so travel times in minutes are estimated from the lengths of
+the edges and AVERAGE_SPEED_KMH.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao.
+"""
+from __future__ import annotations
+import heapq
+import math
+from typing import Iterable, Optional
+import numpy as np
+import compact_graph
+
+
+# The average speed of a train between stations, including the time spent stopped at them
+AVERAGE_SPEED_KMH = 40.0
+
+UNREACHED_HOPS = -1
+
+
+def hops_from(graph: compact_graph.CompactGraph, origin: str,
+              max_hops: Optional[int] = None, avoid: Iterable[str] = ()) -> np.ndarray:
+    """Return the number of stops from the given origin to every station of the given graph,
+    without visiting any station in avoid, or any closed station or edge.
+
+    Stations that cannot be reached within max_hops stops (or at all, if max_hops is None)
+    have UNREACHED_HOPS instead. The array is indexed like graph.names.
+
+    Preconditions:
+        - graph.has_station(origin)
+        - all(graph.has_station(name) for name in avoid)
+        - max_hops is None or max_hops >= 0
+    """
+    hops = np.full(len(graph.names), UNREACHED_HOPS, dtype=np.int32)
+    avoided = {graph.index_of(name) for name in avoid}
+    source = graph.index_of(origin)
+
+    if source in avoided or not graph.station_open[source]:
+        return hops
+
+    _, reached = graph.search_tree(source, avoided, max_hops=max_hops)
+    hops[list(reached)] = list(reached.values())
+
+    return hops
+
+
+def minutes_from(graph: compact_graph.CompactGraph, origin: str,
+                 max_minutes: Optional[float] = None, avoid: Iterable[str] = (),
+                 speed_kmh: float = AVERAGE_SPEED_KMH) -> np.ndarray:
+    """Return the estimated travel time (in minutes) from the given origin to every station of
+    the given graph at the given average speed, without visiting any station in avoid, or any
+    closed station or edge.
+
+    Stations that cannot be reached within max_minutes (or at all, if max_minutes is None)
+    have infinity instead. The array is indexed like graph.names.
+
+    Preconditions:
+        - graph.has_station(origin)
+        - all(graph.has_station(name) for name in avoid)
+        - speed_kmh > 0
+    """
+    minutes = np.full(len(graph.names), math.inf)
+    avoided = {graph.index_of(name) for name in avoid}
+    source = graph.index_of(origin)
+
+    if source in avoided or not graph.station_open[source]:
+        return minutes
+
+    limit = math.inf if max_minutes is None else max_minutes
+    minutes_per_km = 60 / speed_kmh
+    indptr, indices, weights = graph.indptr, graph.indices, graph.weights
+    station_open, edge_open = graph.station_open, graph.edge_open
+    best = {source: 0.0}
+    done = set()
+    queue = [(0.0, source)]
+
+    # Dijkstra's algorithm, stopping at the first station that is further than the limit
+    while queue != [] and queue[0][0] <= limit:
+        time, u = heapq.heappop(queue)
+        if u in done:
+            continue
+        done.add(u)
+
+        for slot in range(indptr[u], indptr[u + 1]):
+            v = indices[slot]
+            arrival = time + weights[slot] * minutes_per_km
+            if edge_open[slot] and station_open[v] and v not in avoided and \
+                    arrival < best.get(v, math.inf):
+                best[v] = arrival
+                heapq.heappush(queue, (arrival, v))
+
+    minutes[list(done)] = [best[u] for u in done]
+
+    return minutes
+
+
+def isochrones(graph: compact_graph.CompactGraph, origins: Optional[list[str]] = None,
+               max_hops: Optional[int] = None, max_minutes: Optional[float] = None,
+               avoid: Iterable[str] = ()) -> np.ndarray:
+    """Return a two-dimensional array whose row i holds the distances from origins[i] to every
+    station of the given graph, as returned by hops_from (if max_minutes is None) or by
+    minutes_from (otherwise). If origins is None, every station of the graph is an origin.
+
+    Origins in avoid (or closed origins) reach no station at all.
+
+    Preconditions:
+        - origins is None or all(graph.has_station(name) for name in origins)
+        - all(graph.has_station(name) for name in avoid)
+        - max_hops is None or max_minutes is None
+    """
+    if origins is None:
+        origins = list(graph.names)
+    avoid = list(avoid)
+
+    if max_minutes is None:
+        rows = [hops_from(graph, origin, max_hops, avoid) for origin in origins]
+        dtype = np.int32
+    else:
+        rows = [minutes_from(graph, origin, max_minutes, avoid) for origin in origins]
+        dtype = np.float64
+
+    if rows == []:
+        return np.empty((0, len(graph.names)), dtype=dtype)
+
+    return np.stack(rows)
+
+
+def reached(distances: np.ndarray) -> np.ndarray:
+    """Return the indices of the stations reached in the given distances (as returned by
+    hops_from or minutes_from).
+    """
+    if distances.dtype == np.int32:
+        return np.nonzero(distances != UNREACHED_HOPS)[0]
+    else:
+        return np.nonzero(np.isfinite(distances))[0]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'heapq', 'math', 'numpy', 'compact_graph'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,218 @@
+"""CSC111 Project 2021: The Itineraries of the Project
+
+Description
+===========
+This file is where multi-stop itineraries are planned. An itinerary starts at one station,
+visits a number of required stops in whichever order makes it shortest, and optionally ends at
+a given station. The number of stops between every two of these waypoints (the distance
+matrix) comes from one breadth-first search per waypoint, which also keeps the shortest path
+to every other waypoint, so the legs of the itinerary are stitched together without searching
+again. The visiting order is found exactly (with the Held-Karp dynamic program) for a few stops,
+and with a nearest-neighbour tour improved by 2-opt moves for more stops.
+
+As for shortest paths, distances are numbers of stops, and closed stations and edges (and any
+avoided station) are never used.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao.
+"""
+from __future__ import annotations
+import math
+from typing import Iterable, Optional
+import compact_graph
+import route
+
+
+# Visiting orders of at most this many stops are found exactly. Held-Karp takes
+# O(2^k * k^2) time for k stops, so this keeps planning well under a second.
+EXACT_STOP_LIMIT = 10
+
+
+class Itinerary:
+    """A route from a start station through a number of stops.
+
+    An itinerary whose route has no stations means that the stops could not all be reached.
+
+    Instance Attributes:
+        - waypoints: The names of the start station, the stops (in visiting order) and the end
+                     station (if any) of this itinerary.
+        - legs: The route between every two consecutive waypoints.
+        - route: The whole route of this itinerary (just the start station if there are no
+                 stops or end station, and no stations if the stops could not all be reached).
+        - exact: Whether the visiting order is the best one possible (rather than one found
+                 by a heuristic).
+
+    Representation Invariants:
+        - len(self.route) == 0 or len(self.legs) == len(self.waypoints) - 1
+    """
+    waypoints: list[str]
+    legs: list[route.Route]
+    route: route.Route
+    exact: bool
+
+    def __init__(self, waypoints: list[str], legs: list[route.Route], found: route.Route,
+                 exact: bool) -> None:
+        """Initialize an itinerary through the given waypoints, made of the given legs."""
+        self.waypoints = waypoints
+        self.legs = legs
+        self.route = found
+        self.exact = exact
+
+    @property
+    def hops(self) -> int:
+        """The number of edges of this itinerary."""
+        return self.route.hops
+
+
+def plan_itinerary(graph: compact_graph.CompactGraph, start: str, stops: Iterable[str],
+                   end: Optional[str] = None, avoid: Iterable[str] = (),
+                   exact_limit: int = EXACT_STOP_LIMIT) -> Itinerary:
+    """Return the shortest itinerary of the given graph from start through every station of
+    stops, ending at end (or at the last stop visited, if end is None), without visiting any
+    station in avoid, or any closed station or edge.
+
+    Stops that are repeated, or that are the start or end station, are only visited once.
+    The visiting order is exact if there are at most exact_limit stops.
+
+    Preconditions:
+        - graph.has_station(start)
+        - all(graph.has_station(name) for name in stops)
+        - end is None or graph.has_station(end)
+        - all(graph.has_station(name) for name in avoid)
+    """
+    stops = [name for name in dict.fromkeys(stops) if name != start and name != end]
+    waypoints = [start] + stops + ([] if end is None else [end])
+    indices = [graph.index_of(name) for name in waypoints]
+    avoided = {graph.index_of(name) for name in avoid}
+
+    # One search per distinct waypoint gives its row of the distance matrix and its legs
+    trees = {}
+    for source in dict.fromkeys(indices):
+        trees[source] = graph.search_tree(source, avoided, set(indices))
+    matrix = [[trees[a][1].get(b, math.inf) for b in indices] for a in indices]
+
+    # The graph is undirected, so every waypoint is reachable if the start reaches all of them
+    if any(math.isinf(distance) for distance in matrix[0]):
+        return Itinerary(waypoints, [], route.Route(graph, []), True)
+
+    exact = len(stops) <= exact_limit
+    if exact:
+        order = _held_karp(matrix, len(stops), end is not None)
+    else:
+        order = _two_opt(matrix, _nearest_neighbour(matrix, len(stops)), end is not None)
+
+    visits = [0] + order + ([len(waypoints) - 1] if end is not None else [])
+    legs = []
+    for a, b in zip(visits, visits[1:]):
+        path = compact_graph.tree_path(trees[indices[a]][0], indices[a], indices[b])
+        legs.append(route.Route(graph, path))
+
+    stations = [indices[0]]
+    for leg in legs:
+        stations.extend(leg.stations[1:])
+
+    return Itinerary([waypoints[v] for v in visits], legs, route.Route(graph, stations), exact)
+
+
+def _held_karp(matrix: list[list[float]], k: int, has_end: bool) -> list[int]:
+    """Return the best order to visit the stops 1, ..., k of the given distance matrix from
+    waypoint 0 (and then end at waypoint k + 1 if has_end), found with the Held-Karp dynamic
+    program.
+    """
+    if k == 0:
+        return []
+
+    # best[mask][j] is the length of the shortest path from waypoint 0 through the stops of
+    # mask (bit j - 1 for stop j), ending at stop j
+    full = (1 << k) - 1
+    best = [[math.inf] * (k + 1) for _ in range(full + 1)]
+    previous = [[0] * (k + 1) for _ in range(full + 1)]
+    for j in range(1, k + 1):
+        best[1 << (j - 1)][j] = matrix[0][j]
+
+    for mask in range(1, full + 1):
+        row = best[mask]
+        for j in range(1, k + 1):
+            if row[j] == math.inf:
+                continue
+            for nxt in range(1, k + 1):
+                bit = 1 << (nxt - 1)
+                if not mask & bit and row[j] + matrix[j][nxt] < best[mask | bit][nxt]:
+                    best[mask | bit][nxt] = row[j] + matrix[j][nxt]
+                    previous[mask | bit][nxt] = j
+
+    closing = [matrix[j][k + 1] if has_end else 0.0 for j in range(k + 1)]
+    last = min(range(1, k + 1), key=lambda j: best[full][j] + closing[j])
+
+    order, mask = [], full
+    while last != 0:
+        order.append(last)
+        mask, last = mask & ~(1 << (last - 1)), previous[mask][last]
+    order.reverse()
+
+    return order
+
+
+def _nearest_neighbour(matrix: list[list[float]], k: int) -> list[int]:
+    """Return an order to visit the stops 1, ..., k of the given distance matrix from waypoint
+    0 that always goes to the closest stop not visited yet.
+    """
+    order, unvisited, current = [], set(range(1, k + 1)), 0
+    while unvisited:
+        current = min(unvisited, key=matrix[current].__getitem__)
+        unvisited.remove(current)
+        order.append(current)
+
+    return order
+
+
+def _two_opt(matrix: list[list[float]], order: list[int], has_end: bool) -> list[int]:
+    """Return the given order to visit stops after waypoint 0 (and before the last waypoint,
+    if has_end), improved by reversing parts of it for as long as that makes it shorter.
+    """
+    order = list(order)
+    end = len(matrix) - 1 if has_end else None
+    improved = True
+
+    while improved:
+        improved = False
+        for i in range(len(order)):
+            before = matrix[order[i - 1] if i > 0 else 0]
+            for j in range(i + 1, len(order)):
+                # Reversing order[i:j + 1] only changes the edges at both ends of it
+                after = order[j + 1] if j + 1 < len(order) else end
+                change = before[order[j]] - before[order[i]]
+                if after is not None:
+                    change += matrix[order[i]][after] - matrix[order[j]][after]
+
+                if change < 0:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+
+    return order
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'math', 'compact_graph', 'route'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -8,7 +8,8 @@ SkyTrain subway system in Canada and the Kobe subway system in Japan. The user c
 stations and the stations they want to avoid. We will find the shortest path between those two
 stations while avoiding the stations they don't want to visit. There is also a "Map View" option
 available for the user to see a plotly map visualization of their selected stations and the
-shortest path between them.
+shortest path between them. A pannable, zoomable map of the whole subway system can be run
+instead of the visualization (see USE_MAP_VIEW).
 
 Copyright and Usage Information
 ===============================
@@ -21,25 +22,68 @@ and Jennifer Cao.
 """
 import pygame
 import data_wrangling
+import input_recording
+import map_view
 import pygame_visualization
+import route_cache
 
 
 SCREEN_SIZE = (1200, 700)  # (width, height)
 
+# Set this to a filepath to record the mouse clicks of the session into it (as a JSON file that
+# input_replay.replay can replay), or leave it as None to not record them
+INPUT_RECORDING_FILEPATH = None
+
+# Set this to a filepath to log the routes asked for into it, and to compute the routes most
+# often asked for in earlier sessions in the background as the visualization starts, or leave
+# it as None to not log them
+QUERY_LOG_FILEPATH = None
+
+# Set this to True to run the pannable, zoomable map of the subway system (see map_view.py)
+# instead of the visualization. Its clicks are not recorded or logged.
+USE_MAP_VIEW = False
+
 
 if __name__ == '__main__':
-    # Initialize the pygame screen, allowing for mouse click events
-    screen = pygame_visualization.initialize_screen(SCREEN_SIZE, [pygame.MOUSEBUTTONDOWN],
-                                                    'lightblue')
-
-    # Create a Subway class of the Vancouver subway system
-    # and run the pygame visualization of the Vancouver subway system
-    vancouver_subway = data_wrangling.read_csv_data('data/vancouver_subway.csv', screen)
-    pygame_visualization.run_visualization(screen, vancouver_subway,
-                                           'images/vancouver_subway_system.png')
-
-    # Create a Subway class of the Kobe subway system
-    # and run the pygame visualization of the Kobe subway system
-    # UNCOMMENT THE TWO LINES BELOW AND COMMENT OUT THE THREE UNCOMMENTED LINES ABOVE
-    # kobe_subway = data_wrangling.read_csv_data('data/kobe_subway.csv', screen)
-    # pygame_visualization.run_visualization(screen, kobe_subway, 'images/kobe_subway_system.png')
+    if USE_MAP_VIEW:
+        # Initialize the pygame screen, allowing for the mouse and key events of the map, and
+        # run the map of the Vancouver subway system
+        screen = pygame_visualization.initialize_screen(
+            SCREEN_SIZE, [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION,
+                          pygame.MOUSEWHEEL, pygame.KEYDOWN], 'lightblue')
+        map_view.run_map_visualization(
+            screen, data_wrangling.read_csv_data('data/vancouver_subway.csv', screen))
+    else:
+        # Initialize the pygame screen, allowing for mouse click events
+        screen = pygame_visualization.initialize_screen(SCREEN_SIZE, [pygame.MOUSEBUTTONDOWN],
+                                                        'lightblue')
+
+        # Record the mouse clicks of the session, if they are to be saved
+        recorder = None
+        if INPUT_RECORDING_FILEPATH is not None:
+            recorder = input_recording.InputRecorder(SCREEN_SIZE)
+
+        # Create a Subway class of the Vancouver subway system
+        # and run the pygame visualization of the Vancouver subway system
+        vancouver_subway = data_wrangling.read_csv_data('data/vancouver_subway.csv', screen)
+        if QUERY_LOG_FILEPATH is not None:
+            route_cache.start_query_log(vancouver_subway, QUERY_LOG_FILEPATH)
+        pygame_visualization.run_visualization(screen, vancouver_subway,
+                                               'images/vancouver_subway_system.png', recorder)
+
+        # Create a Subway class of the Kobe subway system
+        # and run the pygame visualization of the Kobe subway system
+        # UNCOMMENT THE FIVE LINES BELOW AND COMMENT OUT THE FIVE UNCOMMENTED LINES ABOVE
+        # kobe_subway = data_wrangling.read_csv_data('data/kobe_subway.csv', screen)
+        # if QUERY_LOG_FILEPATH is not None:
+        #     route_cache.start_query_log(kobe_subway, QUERY_LOG_FILEPATH)
+        # pygame_visualization.run_visualization(screen, kobe_subway,
+        #                                        'images/kobe_subway_system.png', recorder)
+
+        # A csv file without pygame coordinates (x-coordinate and y-coordinate) is laid out from
+        # the locations and edges of its stations, and its visualization drawn without an image,
+        # e.g.
+        # pygame_visualization.run_visualization(screen, subway, None, recorder)
+
+        if INPUT_RECORDING_FILEPATH is not None:
+            recorder.recording.save(INPUT_RECORDING_FILEPATH)
@@ -0,0 +1,274 @@
+"""CSC111 Project 2021: The Map Export of the Project
+
+Description
+===========
+This file is where the plotly map export pipeline of this project is found. It contains a class
+that serializes the base layer of a subway system (all of its stations and edges) once, and then
+writes self-contained HTML maps of individual routes (or of the stations reachable from a
+station) on top of that base layer to a content-addressed cache directory. Maps can be exported
+one at a time (e.g. when the user presses MAP VIEW) or in batches without a browser (e.g. for
+offline kiosks).
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import weakref
+from typing import Optional
+import numpy as np
+import isochrone
+import route
+import subway_system
+
+
+DEFAULT_CACHE_DIRECTORY = 'map_cache'
+PLOTLY_JS_FILENAME = 'plotly.min.js'
+
+# The HTML page of a map. Only the route and layout are serialized for each page, the base
+# layer is inserted as an already serialized string.
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8" /></head>
+<body style="margin: 0">
+{script}
+<div id="map" style="width: 100vw; height: 100vh"></div>
+<script type="text/javascript">
+Plotly.newPlot("map", {base}.concat([{route}]), {layout}, {{"responsive": true}});
+</script>
+</body>
+</html>
+"""
+
+
+class MapExporter:
+    """A class that writes HTML maps of routes in a subway system to a cache directory.
+
+    Each map is stored in a file whose name is a hash of the subway system's base layer and
+    the route, so a route that was already exported is never written again, and maps of a
+    subway system that has changed are never mistaken for maps of the old one.
+
+    Instance Attributes:
+        - cache_directory: The directory the maps are written to.
+        - self_contained: Whether each map includes its own copy of plotly.js. If False,
+                          plotly.js is written once to the cache directory and shared by
+                          all the maps in it.
+        - version: The version of the subway system when its base layer was serialized.
+    """
+    cache_directory: str
+    self_contained: bool
+    version: int
+
+    # Private Instance Attributes:
+    #   - _locations:
+    #       A dictionary mapping every station name to its location (latitude, longitude).
+    #   - _base:
+    #       The serialized plotly traces of every edge and station of the subway system.
+    #   - _base_hash:
+    #       The hash of _base.
+    #   - _plotly_js:
+    #       The source code of plotly.js, or None if it has not been loaded yet.
+    _locations: dict[str, tuple[float, float]]
+    _base: str
+    _base_hash: str
+    _plotly_js: Optional[str]
+
+    def __init__(self, subway: subway_system.Subway,
+                 cache_directory: str = DEFAULT_CACHE_DIRECTORY,
+                 self_contained: bool = True) -> None:
+        """Initialize an exporter of maps of the given subway system, serializing the
+        subway system's base layer.
+        """
+        self.cache_directory = cache_directory
+        self.self_contained = self_contained
+        # Serialize a single snapshot, so the base layer is consistent even if the subway
+        # system is changed by another thread at the same time
+        graph = subway.snapshot()
+        self.version = graph.version
+        self._locations = {name: (graph.latitudes[i], graph.longitudes[i])
+                           for i, name in enumerate(graph.names)}
+        self._plotly_js = None
+
+        # Edges are drawn as one trace, with null separating the segments
+        edge_lat, edge_lon = [], []
+        for i, j in graph.edges():
+            edge_lat.extend([graph.latitudes[i], graph.latitudes[j], None])
+            edge_lon.extend([graph.longitudes[i], graph.longitudes[j], None])
+
+        stations = list(self._locations)
+        base = [
+            {'type': 'scattermapbox', 'mode': 'lines', 'lat': edge_lat, 'lon': edge_lon,
+             'line': {'color': 'grey', 'width': 2}, 'hoverinfo': 'skip', 'showlegend': False},
+            {'type': 'scattermapbox', 'mode': 'markers', 'text': stations,
+             'lat': [self._locations[name][0] for name in stations],
+             'lon': [self._locations[name][1] for name in stations],
+             'marker': {'size': 6, 'color': 'grey'}, 'showlegend': False}
+        ]
+        self._base = json.dumps(base, separators=(',', ':'))
+        self._base_hash = hashlib.sha256(self._base.encode()).hexdigest()
+
+    def route_filepath(self, path: route.Route) -> str:
+        """Return the path of the file the map of the given route is (or will be) stored in.
+        """
+        return self._filepath(json.dumps(path.names).encode())
+
+    def _filepath(self, contents: bytes) -> str:
+        """Return the path of the file the map with the given contents (drawn on top of the
+        base layer) is stored in.
+        """
+        key = hashlib.sha256(self._base_hash.encode() + contents).hexdigest()
+        return os.path.join(self.cache_directory, f'{key[:32]}.html')
+
+    def export_route(self, path: route.Route) -> str:
+        """Write the map of the given route to the cache directory (if it is not already
+        there) and return the path of its file.
+
+        Preconditions:
+            - len(path) > 0
+            - path.graph.version == self.version
+        """
+        filepath = self.route_filepath(path)
+
+        if not os.path.exists(filepath):
+            self._write_page(filepath, self._route_trace(path), self._layout(path.names[0]))
+
+        return filepath
+
+    def export_isochrone(self, origin: str, distances: np.ndarray) -> str:
+        """Write the map of the stations reached from origin in the given distances (as
+        returned by a function of the isochrone module) to the cache directory (if it is not
+        already there) and return the path of its file.
+
+        Reached stations are shaded from yellow (the closest) to red (the furthest).
+
+        Preconditions:
+            - origin in self._locations
+            - distances was computed on a snapshot of the same version as this exporter
+        """
+        filepath = self._filepath(json.dumps([origin, distances.dtype.str]).encode()
+                                  + distances.tobytes())
+
+        if not os.path.exists(filepath):
+            stations = list(self._locations)
+            reached = isochrone.reached(distances).tolist()
+            distances = distances.tolist()
+            trace = {'type': 'scattermapbox', 'mode': 'markers',
+                     'text': [f'{stations[i]}: {distances[i]:g}' for i in reached],
+                     'lat': [self._locations[stations[i]][0] for i in reached],
+                     'lon': [self._locations[stations[i]][1] for i in reached],
+                     'marker': {'size': 10, 'color': [distances[i] for i in reached],
+                                'colorscale': 'YlOrRd', 'showscale': True},
+                     'showlegend': False}
+            self._write_page(filepath, json.dumps(trace, separators=(',', ':')),
+                             self._layout(origin))
+
+        return filepath
+
+    def _write_page(self, filepath: str, trace: str, layout: str) -> None:
+        """Write the map made of the base layer, the given serialized trace and the given
+        serialized layout to the file at filepath.
+        """
+        os.makedirs(self.cache_directory, exist_ok=True)
+        page = _PAGE_TEMPLATE.format(script=self._script_tag(), base=self._base,
+                                     route=trace, layout=layout)
+
+        # Write to a temporary file first so that a half-written map is never served
+        temporary_filepath = f'{filepath}.{os.getpid()}.tmp'
+        with open(temporary_filepath, 'w', encoding='utf-8') as file:
+            file.write(page)
+        os.replace(temporary_filepath, filepath)
+
+    def export_routes(self, routes: list[route.Route]) -> list[str]:
+        """Write the maps of all the given routes to the cache directory and return the paths
+        of their files, in the same order as routes.
+
+        Preconditions:
+            - all(len(path) > 0 for path in routes)
+            - all(path.graph.version == self.version for path in routes)
+        """
+        return [self.export_route(path) for path in routes]
+
+    def _route_trace(self, path: route.Route) -> str:
+        """Return the serialized plotly trace of the given route.
+        """
+        latitudes, longitudes = path.graph.latitudes, path.graph.longitudes
+        trace = {'type': 'scattermapbox', 'mode': 'markers+lines', 'text': path.names,
+                 'lat': [latitudes[i] for i in path.stations],
+                 'lon': [longitudes[i] for i in path.stations],
+                 'marker': {'size': 10}, 'showlegend': False}
+        return json.dumps(trace, separators=(',', ':'))
+
+    def _layout(self, center: str) -> str:
+        """Return the serialized plotly layout of a map centred on the given station.
+        """
+        layout = {'margin': {'l': 0, 't': 0, 'b': 0, 'r': 0},
+                  'mapbox': {'center': {'lat': self._locations[center][0],
+                                        'lon': self._locations[center][1]},
+                             'style': 'open-street-map',
+                             'zoom': 12}}
+        return json.dumps(layout, separators=(',', ':'))
+
+    def _script_tag(self) -> str:
+        """Return the HTML tag that loads plotly.js in a map.
+        """
+        if self._plotly_js is None:
+            # Importing plotly is slow, so only do it the first time a map is written
+            import plotly.offline
+            self._plotly_js = plotly.offline.get_plotlyjs()
+
+        if self.self_contained:
+            return f'<script type="text/javascript">{self._plotly_js}</script>'
+
+        shared_filepath = os.path.join(self.cache_directory, PLOTLY_JS_FILENAME)
+        if not os.path.exists(shared_filepath):
+            # Write to a temporary file first so that every map loads either all of plotly.js
+            # or none of it, even if another exporter writes it at the same time
+            temporary_filepath = f'{shared_filepath}.{os.getpid()}.tmp'
+            with open(temporary_filepath, 'w', encoding='utf-8') as file:
+                file.write(self._plotly_js)
+            os.replace(temporary_filepath, shared_filepath)
+
+        return f'<script src="{PLOTLY_JS_FILENAME}"></script>'
+
+
+# A MapExporter for every subway system maps were exported for
+_exporters = weakref.WeakKeyDictionary()
+
+
+def get_exporter(subway: subway_system.Subway) -> MapExporter:
+    """Return the MapExporter of the given subway system, creating it the first time this
+    function is called with that subway system, and again whenever the subway system changed.
+    """
+    if subway not in _exporters or _exporters[subway].version != subway.get_version():
+        _exporters[subway] = MapExporter(subway)
+
+    return _exporters[subway]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'hashlib', 'json', 'os', 'weakref',
+                              'plotly.offline', 'numpy', 'isochrone', 'route', 'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': ['MapExporter._write_page', 'MapExporter._script_tag'],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,440 @@
+"""CSC111 Project 2021: The Map View of the Project
+
+Description
+===========
+This file is where the pannable and zoomable map view of this project is found. Instead of
+blitting a pre-drawn background image, the map view projects the locations of the stations with
+the geo module and draws the edges procedurally from the subway system's adjacency. Stations
+outside the visible area are culled, and at low zoom nearby stations are aggregated into
+clusters, so the amount of drawing per frame stays bounded no matter how big the subway system
+is. It also contains a function that runs a pygame visualization using the map view.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+import pygame
+from pygame.colordict import THECOLORS
+import geo
+import isochrone
+import subway_system
+
+
+MAX_MARKERS = 400    # Stations are clustered when more than this many would be drawn
+CLUSTER_SIZE = 40    # The width (in pixels) of the grid cells stations are clustered into
+MIN_ZOOM = 0.5
+MAX_ZOOM = 200.0
+CLICK_RADIUS = 10    # How close (in pixels) a click must be to a station to select it
+ISOCHRONE_HOPS = 10  # How many stops the isochrone of a middle-clicked station reaches
+
+
+class MapView:
+    """A pannable, zoomable view of a subway system drawn onto an area of a pygame screen.
+
+    Instance Attributes:
+        - zoom: The current zoom of this view (1.0 fits the whole subway system in the area).
+    """
+    zoom: float
+
+    # Private Instance Attributes:
+    #   - _screen:
+    #       The pygame Surface this view is drawn on.
+    #   - _area:
+    #       The part of _screen this view is drawn in.
+    #   - _names:
+    #       The names of the stations, indexed like _world.
+    #   - _index:
+    #       A dictionary mapping each station name to its index in _names.
+    #   - _world:
+    #       A float array of shape (n, 2) holding the projected station locations,
+    #       measured in degrees of latitude (see geo.project_to_plane).
+    #   - _edges:
+    #       An integer array of shape (m, 2) holding the station indices of every edge.
+    #   - _scale:
+    #       The number of pixels per unit of _world at a zoom of 1.0.
+    #   - _center:
+    #       The point of _world shown at the centre of _area.
+    #   - _colours:
+    #       A dictionary mapping the index of every station that is not grey to its colour.
+    #   - _images:
+    #       A dictionary mapping a colour to the decoded circle image of that colour.
+    #   - _shaded:
+    #       The indices of the shaded stations.
+    #   - _shades:
+    #       The colour of every shaded station, in the same order as _shaded.
+    #   - _font:
+    #       The font cluster labels are rendered in, or None if no label was rendered yet.
+    #   - _labels:
+    #       A dictionary mapping a cluster size to its rendered label.
+    #   - _drag:
+    #       The last mouse position of the current drag, or None if the user is not dragging.
+    #   - _dragged:
+    #       Whether the mouse moved since the left mouse button was pressed.
+    _screen: pygame.Surface
+    _area: pygame.Rect
+    _names: list[str]
+    _index: dict[str, int]
+    _world: np.ndarray
+    _edges: np.ndarray
+    _scale: float
+    _center: np.ndarray
+    _colours: dict[int, str]
+    _images: dict[str, pygame.Surface]
+    _shaded: np.ndarray
+    _shades: list[pygame.Color]
+    _font: Optional[pygame.font.Font]
+    _labels: dict[int, pygame.Surface]
+    _drag: Optional[tuple[int, int]]
+    _dragged: bool
+
+    def __init__(self, screen: pygame.Surface, area: pygame.Rect,
+                 geometry: geo.StationGeometry) -> None:
+        """Initialize a view of the stations and edges of the given geometry, drawn in the
+        given area of the screen.
+
+        Preconditions:
+            - len(geometry.names) > 0
+            - screen.get_rect().contains(area)
+        """
+        self._screen = screen
+        self._area = area
+        self._names = geometry.names
+        self._index = {name: i for i, name in enumerate(geometry.names)}
+        self._edges = geometry.edges
+
+        bounds = geometry.bounding_box()
+        self._world = geo.project_to_plane(geometry.latitudes, geometry.longitudes,
+                                           (bounds[0] + bounds[2]) / 2)
+        self._scale = geo.pixels_per_degree(bounds, area.size)
+        self._center = (self._world.min(axis=0) + self._world.max(axis=0)) / 2
+        self.zoom = 1.0
+
+        self._colours = {}
+        self._images = {}
+        for colour in ('grey', 'yellow', 'red'):
+            self._images[colour] = pygame.image.load(f'images/{colour}_circle.png').convert_alpha()
+        self._shaded = np.empty(0, dtype=np.int64)
+        self._shades = []
+        self._font = None
+        self._labels = {}
+        self._drag = None
+        self._dragged = False
+
+    def set_station_colour(self, name: str, colour: str) -> None:
+        """Change the colour of the station with the given name.
+
+        Preconditions:
+            - name in self._index
+            - colour in {'grey', 'yellow', 'red'}
+        """
+        if colour == 'grey':
+            self._colours.pop(self._index[name], None)
+        else:
+            self._colours[self._index[name]] = colour
+
+    def reset_colours(self) -> None:
+        """Change the colour of every station back to grey.
+        """
+        self._colours.clear()
+
+    def shade_stations(self, distances: np.ndarray) -> None:
+        """Shade every station reached in the given distances from yellow (the closest) to red
+        (the furthest), replacing any previous shading.
+
+        Preconditions:
+            - distances was returned by a function of the isochrone module, for a snapshot of
+              the subway system this view was built from
+        """
+        self._shaded = isochrone.reached(distances)
+        values = distances[self._shaded].astype(np.float64)
+        furthest = max(float(values.max(initial=0)), 1e-9)
+        yellow, red = pygame.Color('yellow'), pygame.Color('red')
+        self._shades = [yellow.lerp(red, value / furthest) for value in values.tolist()]
+
+    def clear_shading(self) -> None:
+        """Stop shading stations.
+        """
+        self._shaded = np.empty(0, dtype=np.int64)
+        self._shades = []
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Move the contents of this view by the given number of pixels.
+        """
+        self._center -= np.array([dx, dy]) / (self._scale * self.zoom)
+
+    def zoom_at(self, factor: float, position: tuple[int, int]) -> None:
+        """Multiply the zoom of this view by factor, keeping the point under the given
+        screen position in place.
+        """
+        old_zoom = self.zoom
+        self.zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+
+        # Move the center towards the position by the amount the zoom pulled it away
+        offset = np.array(position, dtype=np.float64) - self._area.center
+        self._center += offset / self._scale * (1 / old_zoom - 1 / self.zoom)
+
+    def _to_screen(self, points: np.ndarray) -> np.ndarray:
+        """Return the screen positions of the given points of _world.
+        """
+        return (points - self._center) * (self._scale * self.zoom) + self._area.center
+
+    def _visible(self, positions: np.ndarray, padding: float) -> np.ndarray:
+        """Return a boolean mask of the given screen positions that lie within the area of this
+        view, grown by padding pixels on every side.
+        """
+        area = self._area
+        return (positions[:, 0] >= area.left - padding) & \
+               (positions[:, 0] <= area.right + padding) & \
+               (positions[:, 1] >= area.top - padding) & \
+               (positions[:, 1] <= area.bottom + padding)
+
+    def station_at(self, position: tuple[int, int]) -> Optional[str]:
+        """Return the name of the station drawn closest to the given screen position, or None
+        if no station is drawn within CLICK_RADIUS pixels of it.
+        """
+        if not self._area.collidepoint(position):
+            return None
+
+        offsets = self._to_screen(self._world) - position
+        distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        closest = int(np.argmin(distances))
+
+        if distances[closest] <= CLICK_RADIUS:
+            return self._names[closest]
+        else:
+            return None
+
+    def handle_event(self, event: pygame.event.Event) -> Optional[str]:
+        """Pan or zoom this view according to the given event.
+
+        Return the name of the station the user left-clicked (without dragging),
+        or None if the event was not such a click.
+        """
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_at(1.2 ** event.y, pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and \
+                self._area.collidepoint(event.pos):
+            # User started dragging the map
+            self._drag = event.pos
+            self._dragged = False
+        elif event.type == pygame.MOUSEMOTION and self._drag is not None:
+            self.pan(event.pos[0] - self._drag[0], event.pos[1] - self._drag[1])
+            self._drag = event.pos
+            self._dragged = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and \
+                self._drag is not None:
+            self._drag = None
+            if not self._dragged:
+                # The mouse did not move, so the user clicked instead of dragging
+                return self.station_at(event.pos)
+        elif event.type == pygame.KEYDOWN:
+            # Arrow keys pan the map by a tenth of its size
+            steps = {pygame.K_LEFT: (1, 0), pygame.K_RIGHT: (-1, 0),
+                     pygame.K_UP: (0, 1), pygame.K_DOWN: (0, -1)}
+            if event.key in steps:
+                dx, dy = steps[event.key]
+                self.pan(dx * self._area.width / 10, dy * self._area.height / 10)
+
+        return None
+
+    def draw(self) -> None:
+        """Draw the visible part of the subway system in the area of this view.
+        """
+        self._screen.set_clip(self._area)
+        self._screen.fill(THECOLORS['white'], self._area)
+
+        positions = self._to_screen(self._world)
+        # Keep stations slightly outside the area so edges leaving it are still drawn
+        nearby = self._visible(positions, max(self._area.width, self._area.height))
+
+        if np.count_nonzero(self._visible(positions, 0)) > MAX_MARKERS:
+            self._draw_clusters(positions, nearby)
+        else:
+            self._draw_edges(positions)
+            self._draw_stations(positions, np.nonzero(self._visible(positions, CLICK_RADIUS))[0])
+
+        self._draw_shading(positions)
+
+        # Coloured stations are always drawn individually, on top of everything else
+        self._draw_stations(positions, np.array(list(self._colours), dtype=np.int64))
+        self._screen.set_clip(None)
+
+    def _draw_edges(self, positions: np.ndarray) -> None:
+        """Draw the edges that cross the area of this view.
+        """
+        first, second = positions[self._edges[:, 0]], positions[self._edges[:, 1]]
+        area = self._area
+
+        # An edge can only cross the area if its bounding box overlaps the area
+        crossing = (np.minimum(first[:, 0], second[:, 0]) <= area.right) & \
+                   (np.maximum(first[:, 0], second[:, 0]) >= area.left) & \
+                   (np.minimum(first[:, 1], second[:, 1]) <= area.bottom) & \
+                   (np.maximum(first[:, 1], second[:, 1]) >= area.top)
+
+        for start, end in zip(first[crossing].tolist(), second[crossing].tolist()):
+            pygame.draw.line(self._screen, THECOLORS['gray40'], start, end, 3)
+
+    def _draw_stations(self, positions: np.ndarray, indices: np.ndarray) -> None:
+        """Draw the stations with the given indices at their positions.
+        """
+        for i, (x, y) in zip(indices.tolist(), positions[indices].tolist()):
+            image = self._images[self._colours.get(i, 'grey')]
+            self._screen.blit(image, image.get_rect(center=(round(x), round(y))))
+
+    def _draw_shading(self, positions: np.ndarray) -> None:
+        """Draw the shaded stations that are in the area of this view.
+        """
+        shaded_positions = positions[self._shaded]
+        visible = np.nonzero(self._visible(shaded_positions, CLICK_RADIUS))[0]
+
+        for k, (x, y) in zip(visible.tolist(), shaded_positions[visible].tolist()):
+            shade = self._shades[k]
+            pygame.draw.circle(self._screen, shade, (x, y), 7)
+            pygame.draw.circle(self._screen, THECOLORS['black'], (x, y), 7, 1)
+
+    def _draw_clusters(self, positions: np.ndarray, nearby: np.ndarray) -> None:
+        """Draw the stations selected by the boolean mask nearby, aggregated into clusters
+        of CLUSTER_SIZE by CLUSTER_SIZE pixels, along with the edges between the clusters.
+        """
+        indices = np.nonzero(nearby)[0]
+        cells = np.floor(positions[indices] / CLUSTER_SIZE).astype(np.int64)
+
+        # Number the grid cells densely, then give every occupied cell a cluster number
+        cells -= cells.min(axis=0)
+        keys = cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1]
+        counts = np.bincount(keys)
+        occupied = np.nonzero(counts)[0]
+        cluster_numbers = np.zeros(len(counts), dtype=np.int64)
+        cluster_numbers[occupied] = np.arange(len(occupied))
+        cluster_of = cluster_numbers[keys]
+        sizes = counts[occupied]
+
+        # Each cluster is drawn at the average position of its stations
+        centres = np.column_stack((
+            np.bincount(cluster_of, positions[indices, 0]) / sizes,
+            np.bincount(cluster_of, positions[indices, 1]) / sizes))
+        visible = self._visible(centres, CLUSTER_SIZE)
+
+        # Map every edge between two nearby stations onto the clusters containing them,
+        # keeping each pair of clusters once
+        lookup = np.full(len(self._names), -1, dtype=np.int64)
+        lookup[indices] = cluster_of
+        ends = np.sort(lookup[self._edges], axis=1)
+        ends = ends[(ends[:, 0] >= 0) & (ends[:, 0] != ends[:, 1])]
+        ends = ends[visible[ends[:, 0]] | visible[ends[:, 1]]]
+        pairs = np.unique(ends[:, 0] * len(sizes) + ends[:, 1])
+        ends = np.column_stack(np.divmod(pairs, len(sizes)))
+
+        for start, end in zip(centres[ends[:, 0]].tolist(), centres[ends[:, 1]].tolist()):
+            pygame.draw.line(self._screen, THECOLORS['gray40'], start, end, 3)
+
+        for (x, y), size in zip(centres[visible].tolist(), sizes[visible].tolist()):
+            radius = 6 + 2 * int(np.log2(size))
+            pygame.draw.circle(self._screen, THECOLORS['gray60'], (x, y), radius)
+            pygame.draw.circle(self._screen, THECOLORS['black'], (x, y), radius, 1)
+            if size > 1:
+                label = self._label(size)
+                self._screen.blit(label, label.get_rect(center=(round(x), round(y))))
+
+    def _label(self, size: int) -> pygame.Surface:
+        """Return the rendered label of a cluster of the given size.
+        """
+        if size not in self._labels:
+            if self._font is None:
+                self._font = pygame.font.SysFont('verdana', 11)
+            self._labels[size] = self._font.render(str(size), True, THECOLORS['black'])
+
+        return self._labels[size]
+
+
+def map_view_from_subway(screen: pygame.Surface, subway: subway_system.Subway,
+                         area: pygame.Rect) -> MapView:
+    """Return a MapView of the given subway system, drawn in the given area of the screen.
+
+    Preconditions:
+        - subway.get_station_names() != []
+    """
+    return MapView(screen, area, subway.snapshot().geometry())
+
+
+def run_map_visualization(screen: pygame.Surface, subway: subway_system.Subway) -> None:
+    """Run a pannable, zoomable visualization of the given subway system on the given screen.
+
+    Scroll to zoom, and drag or use the arrow keys to pan. Left click two stations to show the
+    shortest path between them, middle click a station to shade every station within
+    ISOCHRONE_HOPS stops of it, and right click to clear the selection and the shading.
+
+    The screen must have been initialized to listen for MOUSEBUTTONDOWN, MOUSEBUTTONUP,
+    MOUSEMOTION, MOUSEWHEEL and KEYDOWN events.
+    """
+    view = map_view_from_subway(screen, subway, screen.get_rect())
+    clock = pygame.time.Clock()
+    is_running = True
+    selected_stations = []
+
+    while is_running:
+        clock.tick(30)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                # X button was pressed, stop running pygame (quit)
+                is_running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+                # User right-clicked, clear the selection
+                selected_stations.clear()
+                view.reset_colours()
+                view.clear_shading()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 2:
+                # User middle-clicked, shade the stations near the clicked station
+                station_name = view.station_at(event.pos)
+                if station_name is not None:
+                    view.shade_stations(isochrone.hops_from(subway.snapshot(), station_name,
+                                                            ISOCHRONE_HOPS))
+            else:
+                station_name = view.handle_event(event)
+
+                if station_name is not None and len(selected_stations) < 2:
+                    # User selected a station
+                    selected_stations.append(station_name)
+                    view.set_station_colour(station_name, 'yellow')
+
+                    if len(selected_stations) == 2:
+                        # Show the shortest path between the two selected stations
+                        for name in subway.shortest_path(selected_stations[0],
+                                                         selected_stations[1], set()):
+                            view.set_station_colour(name, 'yellow')
+
+        view.draw()
+        pygame.display.flip()
+
+    pygame.display.quit()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'numpy', 'pygame', 'pygame.colordict',
+                              'geo', 'isochrone', 'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'generated-members': ['pygame.*']
+        }
+    )
@@ -0,0 +1,321 @@
+"""CSC111 Project 2021: The Network Updates of the Project
+
+Description
+===========
+This file is where the incremental updates of a subway system are found. It contains classes
+representing single changes to a subway system (a station being added, removed or moved, and an
+edge being added or removed), which are applied in place without reloading the subway system
+from its csv file, and a class representing the changelog of a subway system. The changelog
+applies batches of changes, numbers them with the version of the subway system, notifies
+listeners (such as derived indexes) once per batch, and can be written to and read from a
+stream of JSON lines.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import bisect
+import json
+from typing import Callable, Iterator, Optional
+import subway_system
+
+
+class Change:
+    """An abstract class representing a change to a subway system.
+    """
+
+    def apply(self, subway: subway_system.Subway) -> None:
+        """Make this change to the given subway system.
+        """
+        raise NotImplementedError
+
+    def to_json(self) -> dict:
+        """Return a JSON-compatible dictionary representing this change.
+        """
+        raise NotImplementedError
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether this change is the same as other.
+        """
+        return isinstance(other, Change) and self.to_json() == other.to_json()
+
+    def __hash__(self) -> int:
+        """Return the hash of this change, which is the same for changes that are equal.
+        """
+        return hash(tuple((key, tuple(value) if isinstance(value, list) else value)
+                          for key, value in sorted(self.to_json().items())))
+
+
+class StationAdded(Change):
+    """A station being added to a subway system.
+
+    Instance Attributes:
+        - name: The name of the station.
+        - location: The latitude and longitude of the station.
+        - coordinates: The pygame coordinates of the station.
+    """
+    name: str
+    location: tuple[float, float]
+    coordinates: tuple[int, int]
+
+    def __init__(self, name: str, location: tuple[float, float],
+                 coordinates: tuple[int, int]) -> None:
+        """Initialize the change adding the given station."""
+        self.name = name
+        self.location = location
+        self.coordinates = coordinates
+
+    def apply(self, subway: subway_system.Subway) -> None:
+        """Add this station to the given subway system."""
+        subway.add_station(self.name, self.location, self.coordinates)
+
+    def to_json(self) -> dict:
+        """Return a JSON-compatible dictionary representing this change."""
+        return {'change': 'station added', 'name': self.name,
+                'location': list(self.location), 'coordinates': list(self.coordinates)}
+
+
+class StationRemoved(Change):
+    """A station (and all of its edges) being removed from a subway system.
+
+    Instance Attributes:
+        - name: The name of the station.
+    """
+    name: str
+
+    def __init__(self, name: str) -> None:
+        """Initialize the change removing the given station."""
+        self.name = name
+
+    def apply(self, subway: subway_system.Subway) -> None:
+        """Remove this station from the given subway system."""
+        subway.remove_station(self.name)
+
+    def to_json(self) -> dict:
+        """Return a JSON-compatible dictionary representing this change."""
+        return {'change': 'station removed', 'name': self.name}
+
+
+class StationMoved(Change):
+    """The location of a station of a subway system changing.
+
+    Instance Attributes:
+        - name: The name of the station.
+        - location: The new latitude and longitude of the station.
+        - coordinates: The new pygame coordinates of the station.
+    """
+    name: str
+    location: tuple[float, float]
+    coordinates: tuple[int, int]
+
+    def __init__(self, name: str, location: tuple[float, float],
+                 coordinates: tuple[int, int]) -> None:
+        """Initialize the change moving the given station."""
+        self.name = name
+        self.location = location
+        self.coordinates = coordinates
+
+    def apply(self, subway: subway_system.Subway) -> None:
+        """Move this station in the given subway system."""
+        subway.move_station(self.name, self.location, self.coordinates)
+
+    def to_json(self) -> dict:
+        """Return a JSON-compatible dictionary representing this change."""
+        return {'change': 'station moved', 'name': self.name,
+                'location': list(self.location), 'coordinates': list(self.coordinates)}
+
+
+class EdgeAdded(Change):
+    """An edge being added between two stations of a subway system.
+
+    Instance Attributes:
+        - name1: The name of one station of the edge.
+        - name2: The name of the other station of the edge.
+    """
+    name1: str
+    name2: str
+
+    def __init__(self, name1: str, name2: str) -> None:
+        """Initialize the change adding the given edge."""
+        self.name1 = name1
+        self.name2 = name2
+
+    def apply(self, subway: subway_system.Subway) -> None:
+        """Add this edge to the given subway system."""
+        subway.add_edge(self.name1, self.name2)
+
+    def to_json(self) -> dict:
+        """Return a JSON-compatible dictionary representing this change."""
+        return {'change': 'edge added', 'name1': self.name1, 'name2': self.name2}
+
+
+class EdgeRemoved(Change):
+    """An edge between two stations being removed from a subway system.
+
+    Instance Attributes:
+        - name1: The name of one station of the edge.
+        - name2: The name of the other station of the edge.
+    """
+    name1: str
+    name2: str
+
+    def __init__(self, name1: str, name2: str) -> None:
+        """Initialize the change removing the given edge."""
+        self.name1 = name1
+        self.name2 = name2
+
+    def apply(self, subway: subway_system.Subway) -> None:
+        """Remove this edge from the given subway system."""
+        subway.remove_edge(self.name1, self.name2)
+
+    def to_json(self) -> dict:
+        """Return a JSON-compatible dictionary representing this change."""
+        return {'change': 'edge removed', 'name1': self.name1, 'name2': self.name2}
+
+
+def change_from_json(record: dict) -> Change:
+    """Return the change represented by the given JSON-compatible dictionary.
+
+    Preconditions:
+        - record was returned by the to_json method of a Change
+
+    >>> change_from_json({'change': 'edge added', 'name1': 'Main', 'name2': 'Stadium'}) == \
+        EdgeAdded('Main', 'Stadium')
+    True
+    """
+    kind = record['change']
+
+    if kind == 'station added':
+        return StationAdded(record['name'], tuple(record['location']),
+                            tuple(record['coordinates']))
+    elif kind == 'station removed':
+        return StationRemoved(record['name'])
+    elif kind == 'station moved':
+        return StationMoved(record['name'], tuple(record['location']),
+                            tuple(record['coordinates']))
+    elif kind == 'edge added':
+        return EdgeAdded(record['name1'], record['name2'])
+    else:
+        return EdgeRemoved(record['name1'], record['name2'])
+
+
+class NetworkChangelog:
+    """The log of the changes made to a subway system.
+
+    Every change is numbered with the version of the subway system right after it was
+    applied, so a reader that last saw some version can ask for exactly the changes it missed.
+    Listeners are notified once per batch of changes, after the whole batch has been applied,
+    so they never see a half-applied batch. Neither do snapshots of the subway system taken by
+    other threads while a batch is being applied.
+    """
+    # Private Instance Attributes:
+    #   - _subway:
+    #       The subway system the changes are applied to.
+    #   - _versions:
+    #       The version of the subway system after each change in _changes.
+    #   - _changes:
+    #       The changes applied to the subway system, oldest first.
+    #   - _listeners:
+    #       The functions called with the new version and the changes after every batch.
+    #   - _written:
+    #       The version of the last change written to each file by write, mapped to the
+    #       filepath of the file.
+    _subway: subway_system.Subway
+    _versions: list[int]
+    _changes: list[Change]
+    _listeners: list[Callable[[int, list[Change]], None]]
+    _written: dict[str, int]
+
+    def __init__(self, subway: subway_system.Subway) -> None:
+        """Initialize an empty changelog of the given subway system."""
+        self._subway = subway
+        self._versions = []
+        self._changes = []
+        self._listeners = []
+        self._written = {}
+
+    def subscribe(self, listener: Callable[[int, list[Change]], None]) -> None:
+        """Call listener with the new version of the subway system and the applied changes
+        after every batch of changes.
+        """
+        self._listeners.append(listener)
+
+    def apply(self, changes: list[Change]) -> int:
+        """Apply the given changes to the subway system, in order, and return the new version
+        of the subway system.
+        """
+        # Hold the writer lock for the whole batch, so no snapshot sees half of it
+        with self._subway.writing():
+            for change in changes:
+                change.apply(self._subway)
+                self._versions.append(self._subway.get_version())
+                self._changes.append(change)
+
+            version = self._subway.get_version()
+
+        for listener in self._listeners:
+            listener(version, changes)
+
+        return version
+
+    def changes_since(self, version: int) -> list[Change]:
+        """Return the changes that were applied after the subway system had the given version,
+        oldest first.
+        """
+        return self._changes[bisect.bisect_right(self._versions, version):]
+
+    def write(self, filepath: str, since: Optional[int] = None) -> None:
+        """Append the changes applied after the given version to the file at filepath,
+        one JSON object per line.
+
+        If since is None, only the changes that have not been written to the file yet by this
+        changelog are appended, so calling this after every batch never writes a change twice.
+        """
+        if since is None:
+            since = self._written.get(filepath, 0)
+
+        start = bisect.bisect_right(self._versions, since)
+        with open(filepath, 'a', encoding='utf-8') as file:
+            for change in self._changes[start:]:
+                file.write(json.dumps(change.to_json()) + '\n')
+
+        if start < len(self._versions):
+            self._written[filepath] = self._versions[-1]
+
+
+def read_changes(filepath: str) -> Iterator[Change]:
+    """Return an iterator over the changes stored in the file at filepath, which contains one
+    JSON object per line (as written by NetworkChangelog.write).
+
+    The file is read lazily, one line at a time.
+    """
+    with open(filepath, encoding='utf-8') as file:
+        for line in file:
+            if line.strip() != '':
+                yield change_from_json(json.loads(line))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'bisect', 'json', 'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': ['NetworkChangelog.write', 'read_changes'],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
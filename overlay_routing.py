@@ -0,0 +1,700 @@
+"""CSC111 Project 2021: The Overlay Routing of the Project
+
+Description
+===========
+This file is where shortest paths are found on large subway systems (such as several regional
+networks merged into one) without searching every station. The stations are partitioned into
+cells by splitting them in half, again and again, along the longer side of the area they cover,
+which keeps the number of edges between cells small for geographic networks. The halves form a
+tree of cells, from the whole subway system down to cells of at most CELL_SIZE stations.
+
+The boundary stations of a cell are those with an edge leaving the cell. For every cell, the
+overlay (a clique) holds the number of stops between every two of its boundary stations when
+only going through the cell. The overlays of the smallest cells are found by a breadth-first
+search inside the cell, and those of every larger cell by searching the overlays of its two
+halves, so a cell's overlay is recomputed on its own when a station or edge in it is added,
+removed, opened or closed, followed by the overlays of the cells containing it.
+
+A query searches every station of the cells holding the origin, the destination or an avoided
+station, and crosses every other cell through the overlay of the largest cell around it that
+holds none of them, before expanding the overlay edges of the route found back into stations.
+
+As for shortest paths, distances are numbers of stops, and closed stations and edges (and any
+avoided station) are never used.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import heapq
+import math
+import threading
+import weakref
+from array import array
+from typing import Callable, Iterable, Iterator, Optional
+import numpy as np
+import compact_graph
+import route
+import subway_system
+
+
+# The maximum number of stations of the smallest cells
+CELL_SIZE = 128
+
+# Cells with more boundary stations than this get no overlay (their overlay would take too long
+# to compute), and queries search inside them instead
+MAX_BOUNDARY = 256
+
+
+class _Cell:
+    """A private class representing a cell of an overlay router.
+
+    The stations of the cell are consecutive in the order of the stations of its router.
+
+    Instance Attributes:
+        - lo: The position of the first station of this cell in the order of its router.
+        - hi: The position after the last station of this cell in the order of its router.
+        - parent: The index of the cell this cell is a half of (-1 for the whole subway system).
+        - children: The indices of the two halves of this cell (none for the smallest cells).
+        - boundary: The stations of this cell with an edge leaving it.
+        - clique: The number of stops from every boundary station to every other boundary
+                  station it reaches through this cell only, or None if this cell has no
+                  overlay.
+        - links: The edges (neighbour, number of stops, overlay cell) from every boundary
+                 station of the halves of this cell, in the graph of the overlays of its halves
+                 and the open edges between them, or None if this cell has no halves or no
+                 overlay. The overlay cell is -1 for an edge of the subway system.
+    """
+    __slots__ = ('lo', 'hi', 'parent', 'children', 'boundary', 'clique', 'links')
+    lo: int
+    hi: int
+    parent: int
+    children: list[int]
+    boundary: list[int]
+    clique: Optional[dict[int, dict[int, int]]]
+    links: Optional[dict[int, list[tuple[int, int, int]]]]
+
+    def __init__(self, lo: int, parent: int) -> None:
+        """Initialize a cell starting at lo, with no stations, children or overlay yet."""
+        self.lo = self.hi = lo
+        self.parent = parent
+        self.children = []
+        self.boundary = []
+        self.clique = self.links = None
+
+
+class OverlayRouter:
+    """A router finding shortest paths on the snapshots of a subway system through the overlays
+    of its cells.
+
+    Routes have as few stations as those of CompactGraph.path_indices, but may differ from them
+    when there are several shortest routes.
+
+    Instance Attributes:
+        - cell_size: The maximum number of stations of the smallest cells.
+        - max_boundary: The maximum number of boundary stations of a cell with an overlay.
+    """
+    cell_size: int
+    max_boundary: int
+
+    # Private Instance Attributes:
+    #   - _graph:
+    #       The snapshot the overlays were computed on.
+    #   - _cells:
+    #       Every cell, with the cell of the whole subway system first and the two halves of a
+    #       cell after it.
+    #   - _position:
+    #       The position of every station in an order of the stations where the stations of
+    #       every cell are consecutive.
+    #   - _leaf:
+    #       The index of the smallest cell of every station.
+    #   - _lock:
+    #       The lock held while the overlays are searched or changed.
+    _graph: Optional[compact_graph.CompactGraph]
+    _cells: list[_Cell]
+    _position: array
+    _leaf: array
+    _lock: threading.Lock
+
+    def __init__(self, cell_size: int = CELL_SIZE, max_boundary: int = MAX_BOUNDARY) -> None:
+        """Initialize a router with no snapshot yet.
+
+        Preconditions:
+            - cell_size >= 1
+            - max_boundary >= 0
+        """
+        self.cell_size = cell_size
+        self.max_boundary = max_boundary
+        self._graph = None
+        self._cells = []
+        self._position = self._leaf = array('i')
+        self._lock = threading.Lock()
+
+    def update(self, graph: compact_graph.CompactGraph) -> int:
+        """Make this router find routes on the given snapshot, and return the number of cells
+        whose overlay was recomputed.
+
+        If the snapshot only has different closures than the previous one (its stations and
+        edges are the same), only the overlays of the cells holding a changed station or
+        both ends of a changed edge are recomputed. If stations or edges were added or
+        removed, the stations keep their cells (a new station joins the smallest cell of one
+        of its neighbours), and only the overlays of the cells holding a changed station or
+        either end of a changed edge are recomputed. The stations are only partitioned again
+        (and every overlay recomputed) for the first snapshot, or once a smallest cell has
+        grown to more than twice cell_size stations.
+        """
+        with self._lock:
+            return self._update(graph)
+
+    def _update(self, graph: compact_graph.CompactGraph) -> int:
+        """Make this router find routes on the given snapshot, as in update.
+
+        Preconditions:
+            - self._lock is held
+        """
+        previous = self._graph
+        if graph is previous:
+            return 0
+
+        self._graph = graph
+        if previous is not None and graph.indices is previous.indices:
+            # Only closures changed (a copy of a snapshot shares its arrays)
+            dirty = self._changed_cells(previous)
+        else:
+            dirty = None if previous is None else self._move_stations(previous)
+            if dirty is None:
+                self._partition()
+                dirty = range(len(self._cells))
+
+        # Every cell comes after the cell it is a half of, so this recomputes halves first
+        for i in sorted(dirty, reverse=True):
+            self._compute_overlay(self._cells[i])
+
+        return len(dirty)
+
+    def _partition(self) -> None:
+        """Split the stations of the snapshot of this router into cells."""
+        graph = self._graph
+        self._cells, order = [], []
+        self._split(list(range(len(graph.names))), -1, order)
+
+        self._position = array('i', [0]) * len(order)
+        for position, station in enumerate(order):
+            self._position[station] = position
+
+        self._leaf = array('i', [0]) * len(order)
+        for i, cell in enumerate(self._cells):
+            if cell.children == []:
+                for station in order[cell.lo:cell.hi]:
+                    self._leaf[station] = i
+
+        for cell in reversed(self._cells):
+            self._compute_boundary(cell, order)
+
+    def _compute_boundary(self, cell: _Cell, order: list[int]) -> None:
+        """Recompute the boundary of the given cell, whose halves' boundaries are up to date,
+        where order is the order of the stations of this router.
+        """
+        stations = order[cell.lo:cell.hi] if cell.children == [] else \
+            [b for child in cell.children for b in self._cells[child].boundary]
+        cell.boundary = [v for v in stations if self._leaves_cell(cell, v)]
+
+    def _move_stations(self, previous: compact_graph.CompactGraph) -> Optional[set[int]]:
+        """Move the cells of this router from the given snapshot to self._graph, which may have
+        different stations and edges, and return the indices of the cells whose overlays depend
+        on a station or edge added, removed, opened or closed (or on a station whose index
+        changed) since the given snapshot. Their boundaries are recomputed as well.
+
+        Every remaining station stays in its smallest cell, and every new station joins the
+        smallest cell of one of its neighbours. Return None, changing nothing, if a smallest cell
+        would then hold more than twice cell_size stations.
+        """
+        graph, cells = self._graph, self._cells
+        n = len(graph.names)
+        old_leaf = np.asarray(self._leaf, dtype=np.int64)
+
+        # The index of every station of previous in graph, or -1 if it was removed
+        mapping = np.array([graph.index_of(name) if graph.has_station(name) else -1
+                            for name in previous.names], dtype=np.int64)
+        kept = mapping >= 0
+        leaf = np.full(n, -1, dtype=np.int64)
+        leaf[mapping[kept]] = old_leaf[kept]
+        new = np.flatnonzero(leaf < 0).tolist()
+
+        pending = new
+        while pending != []:
+            remaining = []
+            for v in pending:
+                leaves = [leaf[u] for u in graph.indices[graph.indptr[v]:graph.indptr[v + 1]]
+                          if leaf[u] >= 0]
+                if leaves == []:
+                    remaining.append(v)
+                else:
+                    leaf[v] = leaves[0]
+
+            if len(remaining) == len(pending):
+                # These stations have no path to any other station, so any cell will do
+                leaf[remaining] = next(i for i, cell in enumerate(cells) if cell.children == [])
+                break
+            pending = remaining
+
+        sizes = np.bincount(leaf, minlength=len(cells)).tolist()
+        if n > 0 and max(sizes) > 2 * self.cell_size:
+            return None
+
+        # Removed stations, stations whose index changed and new stations
+        changed = set(old_leaf[mapping != np.arange(len(mapping))].tolist())
+        changed.update(leaf[new].tolist())
+        # Opened and closed stations
+        old_open = np.frombuffer(previous.station_open, dtype=np.uint8)[kept]
+        new_open = np.frombuffer(graph.station_open, dtype=np.uint8)[mapping[kept]]
+        changed.update(old_leaf[np.flatnonzero(kept)[old_open != new_open]].tolist())
+        # Added, removed, opened and closed edges, from each end
+        old_rows, old_keys = _slot_keys(previous, n, mapping)
+        new_rows, new_keys = _slot_keys(graph, n, None)
+        changed.update(old_leaf[old_rows[~np.isin(old_keys, new_keys)]].tolist())
+        changed.update(leaf[new_rows[~np.isin(new_keys, old_keys)]].tolist())
+
+        # The smallest cells are numbered in the order of their stations, and the remaining
+        # stations keep their order within them
+        order_key = np.full(n, len(mapping), dtype=np.int64)
+        order_key[mapping[kept]] = np.asarray(self._position, dtype=np.int64)[kept]
+        order = np.lexsort((order_key, leaf)).tolist()
+
+        # Every cell comes before its halves, and its first half right after it
+        for i in range(len(cells) - 1, -1, -1):
+            if cells[i].children != []:
+                sizes[i] = sum(sizes[child] for child in cells[i].children)
+        cells[0].lo = 0
+        for i, cell in enumerate(cells):
+            cell.hi = cell.lo + sizes[i]
+            if cell.children != []:
+                cells[cell.children[0]].lo = cell.lo
+                cells[cell.children[1]].lo = cell.lo + sizes[cell.children[0]]
+
+        self._position = array('i', [0]) * n
+        for position, station in enumerate(order):
+            self._position[station] = position
+        self._leaf = array('i', leaf.tolist())
+
+        # The overlay of a cell depends on the overlays of its halves
+        dirty = set()
+        for i in changed:
+            while i >= 0 and i not in dirty:
+                dirty.add(i)
+                i = cells[i].parent
+
+        for i in sorted(dirty, reverse=True):
+            self._compute_boundary(cells[i], order)
+
+        return dirty
+
+    def _split(self, stations: list[int], parent: int, order: list[int]) -> None:
+        """Add the cell of the given stations, and (recursively) its halves, to the cells of
+        this router, appending its stations to the given order of the stations.
+        """
+        cell = _Cell(len(order), parent)
+        index = len(self._cells)
+        self._cells.append(cell)
+
+        if len(stations) <= self.cell_size:
+            order.extend(stations)
+        else:
+            latitudes, longitudes = self._graph.latitudes, self._graph.longitudes
+            lats = [latitudes[v] for v in stations]
+            lons = [longitudes[v] for v in stations]
+            # A degree of longitude is shorter than a degree of latitude away from the equator
+            scale = math.cos(math.radians((min(lats) + max(lats)) / 2))
+            if (max(lons) - min(lons)) * scale > max(lats) - min(lats):
+                stations.sort(key=longitudes.__getitem__)
+            else:
+                stations.sort(key=latitudes.__getitem__)
+
+            half = len(stations) // 2
+            for part in (stations[:half], stations[half:]):
+                cell.children.append(len(self._cells))
+                self._split(part, index, order)
+
+        cell.hi = len(order)
+
+    def _contains(self, cell: _Cell, station: int) -> bool:
+        """Return whether the given cell holds the given station."""
+        return cell.lo <= self._position[station] < cell.hi
+
+    def _leaves_cell(self, cell: _Cell, station: int) -> bool:
+        """Return whether the given station has an edge (open or closed) leaving the given
+        cell.
+        """
+        graph = self._graph
+        return any(not self._contains(cell, graph.indices[slot])
+                   for slot in range(graph.indptr[station], graph.indptr[station + 1]))
+
+    def _changed_cells(self, previous: compact_graph.CompactGraph) -> set[int]:
+        """Return the indices of the cells whose overlays depend on a station or edge opened
+        or closed since the given snapshot.
+
+        Preconditions:
+            - previous has the same stations and edges as self._graph
+        """
+        graph = self._graph
+        changed = set()
+        if graph.station_open != previous.station_open:
+            for v in range(len(graph.names)):
+                if graph.station_open[v] != previous.station_open[v]:
+                    changed.add(self._leaf[v])
+
+        if graph.edge_open != previous.edge_open:
+            for u in range(len(graph.names)):
+                for slot in range(graph.indptr[u], graph.indptr[u + 1]):
+                    if graph.edge_open[slot] != previous.edge_open[slot]:
+                        changed.add(self._common_cell(u, graph.indices[slot]))
+
+        # The overlay of a cell depends on the overlays of its halves
+        dirty = set()
+        for i in changed:
+            while i >= 0 and i not in dirty:
+                dirty.add(i)
+                i = self._cells[i].parent
+
+        return dirty
+
+    def _common_cell(self, u: int, v: int) -> int:
+        """Return the index of the smallest cell holding both given stations."""
+        i = self._leaf[u]
+        while not self._contains(self._cells[i], v):
+            i = self._cells[i].parent
+
+        return i
+
+    def _compute_overlay(self, cell: _Cell) -> None:
+        """Recompute the overlay of the given cell, whose halves' overlays are up to date."""
+        children = [self._cells[child] for child in cell.children]
+        if len(cell.boundary) > self.max_boundary \
+                or any(child.clique is None for child in children):
+            cell.clique = cell.links = None
+            return
+
+        cell.links = self._links(cell) if children != [] else None
+        cell.clique = {}
+        boundary = set(cell.boundary)
+        for b in cell.boundary:
+            if not self._graph.station_open[b]:
+                cell.clique[b] = {}
+                continue
+
+            if children == []:
+                parents, distances = self._cell_search(cell, b, None)
+            else:
+                distances, parent = _dijkstra(b, None, cell.links.__getitem__)
+                parents = {v: u for v, (u, _) in parent.items()}
+
+            # A boundary station whose route from b goes through another boundary station is
+            # reached through the overlay edges to and from that station, so searches of this
+            # overlay relax fewer edges for the same numbers of stops
+            cell.clique[b] = {b2: distances[b2] for b2 in cell.boundary
+                              if b2 != b and b2 in distances
+                              and not _passes_through(parents, b, b2, boundary)}
+
+    def _cell_search(self, cell: _Cell, source: int,
+                     target: Optional[int]) -> tuple[dict[int, int], dict[int, int]]:
+        """Return the parent and the number of stops from source of every station reached by
+        a breadth-first search from source that stays in the given cell and avoids every
+        closed station and edge. The search stops once target is reached.
+        """
+        graph = self._graph
+        parent, hops = {source: source}, {source: 0}
+        if not graph.station_open[source]:
+            return parent, hops
+
+        indptr, indices = graph.indptr, graph.indices
+        station_open, edge_open, position = graph.station_open, graph.edge_open, self._position
+        lo, hi = cell.lo, cell.hi
+        frontier = [source]
+
+        while frontier != [] and target not in parent:
+            next_frontier = []
+
+            for u in frontier:
+                for slot in range(indptr[u], indptr[u + 1]):
+                    v = indices[slot]
+                    if edge_open[slot] and v not in parent and station_open[v] \
+                            and lo <= position[v] < hi:
+                        parent[v] = u
+                        hops[v] = hops[u] + 1
+                        next_frontier.append(v)
+
+            frontier = next_frontier
+
+        return parent, hops
+
+    def _links(self, cell: _Cell) -> dict[int, list[tuple[int, int, int]]]:
+        """Return the edges of the graph of the overlays of the halves of the given cell and
+        the open edges between them (see _Cell.links).
+
+        Preconditions:
+            - all(self._cells[child].clique is not None for child in cell.children)
+        """
+        links = {}
+        for child in cell.children:
+            half = self._cells[child]
+            for v in half.boundary:
+                links[v] = [(b, hops, child) for b, hops in half.clique[v].items()]
+                links[v].extend(self._crossing_edges(half, v, cell, ()))
+
+        return links
+
+    def _crossing_edges(self, cell: _Cell, v: int, within: Optional[_Cell],
+                        avoid: Iterable[int]) -> Iterator[tuple[int, int, int]]:
+        """Yield the open edges (neighbour, 1, -1) from station v leaving the given cell, to
+        open stations in within (if it is not None) that are not in avoid.
+        """
+        graph = self._graph
+        for slot in range(graph.indptr[v], graph.indptr[v + 1]):
+            u = graph.indices[slot]
+            if graph.edge_open[slot] and graph.station_open[u] \
+                    and not self._contains(cell, u) \
+                    and (within is None or self._contains(within, u)) and u not in avoid:
+                yield u, 1, -1
+
+    def path_indices(self, graph: compact_graph.CompactGraph, source: int, target: int,
+                     avoid: set[int]) -> Optional[list[int]]:
+        """Return the indices of the stations on a shortest path of the given snapshot from
+        source to target that avoids the stations in avoid and every closed station and edge,
+        or None if there is no such path.
+
+        The router is first updated to the given snapshot (see update).
+        """
+        with self._lock:
+            self._update(graph)
+            if source in avoid or target in avoid or not graph.station_open[source] \
+                    or not graph.station_open[target]:
+                return None
+
+            # The cells holding the origin, the destination or an avoided station are searched
+            # station by station
+            searched = set()
+            for station in {source, target} | avoid:
+                i = self._leaf[station]
+                while i >= 0 and i not in searched:
+                    searched.add(i)
+                    i = self._cells[i].parent
+
+            crossed = {}
+            _, parent = _dijkstra(source, target,
+                                  lambda v: self._query_edges(v, searched, crossed, avoid))
+
+            if target not in parent and target != source:
+                return None
+
+            return self._expand(parent, source, target)
+
+    def _crossing_cell(self, v: int, searched: set[int], crossed: dict[int, int]) -> int:
+        """Return the index of the largest cell with an overlay that holds station v and none
+        of the searched cells, or -1 if the smallest cell of v is searched or has no overlay.
+        The answer is remembered in crossed.
+        """
+        if v not in crossed:
+            i = self._leaf[v]
+            if i in searched or self._cells[i].clique is None:
+                i = -1
+            else:
+                while self._cells[i].parent not in searched \
+                        and self._cells[self._cells[i].parent].clique is not None:
+                    i = self._cells[i].parent
+            crossed[v] = i
+
+        return crossed[v]
+
+    def _query_edges(self, v: int, searched: set[int], crossed: dict[int, int],
+                     avoid: set[int]) -> Iterator[tuple[int, int, int]]:
+        """Yield the edges (neighbour, number of stops, overlay cell) from station v in the
+        graph searched by path_indices. The overlay cell is -1 for an edge of the subway
+        system.
+        """
+        i = self._crossing_cell(v, searched, crossed)
+        if i < 0:
+            graph = self._graph
+            for slot in range(graph.indptr[v], graph.indptr[v + 1]):
+                u = graph.indices[slot]
+                if graph.edge_open[slot] and graph.station_open[u] and u not in avoid:
+                    yield u, 1, -1
+        else:
+            cell = self._cells[i]
+            for b, hops in cell.clique.get(v, {}).items():
+                yield b, hops, i
+            yield from self._crossing_edges(cell, v, None, avoid)
+
+    def _expand(self, parent: dict[int, tuple[int, int]], source: int,
+                target: int) -> list[int]:
+        """Return the stations of the path from source to target in the given search tree
+        (mapping every station to its parent and the overlay cell of the edge from it), with
+        every overlay edge expanded into the stations it goes through.
+        """
+        edges = []
+        v = target
+        while v != source:
+            u, cell = parent[v]
+            edges.append((u, v, cell))
+            v = u
+        edges.reverse()
+
+        path = [source]
+        for u, v, cell in edges:
+            if cell < 0:
+                path.append(v)
+            else:
+                path.extend(self._expand_overlay_edge(self._cells[cell], u, v)[1:])
+
+        return path
+
+    def _expand_overlay_edge(self, cell: _Cell, u: int, v: int) -> list[int]:
+        """Return the stations of a shortest path from u to v through the given cell.
+
+        Preconditions:
+            - v in cell.clique[u]
+        """
+        if cell.children == []:
+            parent, _ = self._cell_search(cell, u, v)
+            return compact_graph.tree_path(parent, u, v)
+        else:
+            _, parent = _dijkstra(u, v, cell.links.__getitem__)
+            return self._expand(parent, u, v)
+
+    def boundary_edges(self) -> int:
+        """Return the number of edges between different smallest cells."""
+        with self._lock:
+            graph = self._graph
+            if graph is None:
+                return 0
+
+            return sum(1 for i, j in graph.edges() if self._leaf[i] != self._leaf[j])
+
+    def overlay_cells(self) -> int:
+        """Return the number of cells with an overlay."""
+        with self._lock:
+            return sum(1 for cell in self._cells if cell.clique is not None)
+
+
+def _slot_keys(graph: compact_graph.CompactGraph, n: int,
+               mapping: Optional[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Return the station of every slot of indices of the given graph, and a key identifying
+    the edge in the slot, its direction and whether it is open, in a graph of n stations where
+    station i of the given graph has index mapping[i] (or i, if mapping is None).
+
+    The key is -1 for an edge with a station that is not in the graph of n stations (whose
+    index in mapping is -1).
+    """
+    indptr = np.asarray(graph.indptr, dtype=np.int64)
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    u, v = rows, np.asarray(graph.indices, dtype=np.int64)
+    if mapping is not None:
+        u, v = mapping[u], mapping[v]
+
+    keys = (u * n + v) * 2 + np.frombuffer(graph.edge_open, dtype=np.uint8)
+    keys[(u < 0) | (v < 0)] = -1
+
+    return rows, keys
+
+
+def _passes_through(parents: dict[int, int], source: int, target: int,
+                    stations: set[int]) -> bool:
+    """Return whether the path from source to target in the search tree with the given parents
+    goes through any of the given stations (other than source and target).
+    """
+    v = parents[target]
+    while v != source:
+        if v in stations:
+            return True
+        v = parents[v]
+
+    return False
+
+
+def _dijkstra(source: int, target: Optional[int],
+              edges: Callable[[int], Iterable[tuple[int, int, int]]]) \
+        -> tuple[dict[int, int], dict[int, tuple[int, int]]]:
+    """Return the number of stops from source to every station reached by Dijkstra's algorithm,
+    where edges(v) are the edges (neighbour, number of stops, overlay cell) from station v, and
+    the parent and the overlay cell of the edge from it of every station but source. The search
+    stops once target is reached.
+    """
+    distances, parent = {source: 0}, {}
+    heap = [(0, source)]
+    done = set()
+
+    while heap != []:
+        distance, v = heapq.heappop(heap)
+        if v in done:
+            continue
+        done.add(v)
+        if v == target:
+            break
+
+        for u, hops, cell in edges(v):
+            if distance + hops < distances.get(u, math.inf):
+                distances[u] = distance + hops
+                parent[u] = (v, cell)
+                heapq.heappush(heap, (distance + hops, u))
+
+    return distances, parent
+
+
+# The overlay router of every subway system given to get_overlay_router
+_routers = weakref.WeakKeyDictionary()
+
+
+def get_overlay_router(subway: subway_system.Subway) -> OverlayRouter:
+    """Return the overlay router of the given subway system, creating it the first time this
+    function is called with that subway system.
+    """
+    if subway not in _routers:
+        _routers[subway] = OverlayRouter()
+
+    return _routers[subway]
+
+
+def find_route(subway: subway_system.Subway, name1: str, name2: str,
+               visited: Iterable[str]) -> route.Route:
+    """Return a shortest route between the two stations with the given names of the given
+    subway system without visiting any of the stations in visited, or any closed station or
+    edge, found by its overlay router.
+
+    Return a route with no stations if no such route exists.
+
+    Preconditions:
+        - subway.is_station_in_subway(name1) and subway.is_station_in_subway(name2)
+        - all(subway.is_station_in_subway(name) for name in visited)
+    """
+    graph = subway.snapshot()
+    avoid = {graph.index_of(name) for name in visited}
+    path = get_overlay_router(subway).path_indices(graph, graph.index_of(name1),
+                                                   graph.index_of(name2), avoid)
+
+    return route.Route(graph, [] if path is None else path)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'heapq', 'math', 'threading', 'weakref',
+                              'array', 'numpy', 'compact_graph', 'route', 'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -17,18 +17,31 @@ without changes to this code, are prohibited.
 This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
 and Jennifer Cao.
 """
+import os
+import webbrowser
 import pygame
 from pygame.colordict import THECOLORS
+import audio
 import pygame_visualization
 import pygame_buttons
 import subway_system
-import plotly_visualization
+import map_export
+import route
+import route_cache
+
+
+# The time (in milliseconds) between displaying two stations of a shortest path
+PATH_ANIMATION_DELAY = 350
+
+# Whether MAP VIEW opens the map of the shortest path in the web browser (otherwise the map is
+# only written)
+OPEN_MAPS_IN_BROWSER = True
 
 
 def handle_mouse_click(screen: pygame.Surface, subway: subway_system.Subway,
                        buttons: pygame_buttons.Buttons, event: pygame.event.Event,
                        selected_stations: list[str], removed_stations: set[str],
-                       path: list[str]) -> list[str]:
+                       path: route.Route) -> route.Route:
     """Handle the given mouse click event.
 
     screen is the pygame Surface the subway system is displayed on.
@@ -36,8 +49,8 @@ def handle_mouse_click(screen: pygame.Surface, subway: subway_system.Subway,
     buttons are the group of buttons being used in this visualization.
     selected_stations is the stations the user selected.
     removed_stations is the stations the user wants to avoid.
-    path is the current "shortest path" between two stations (it is an empty list
-    if no path has been created yet or no path was found). It is a list of stations names.
+    path is the current "shortest path" between two stations (it has no stations
+    if no path has been created yet or no path was found).
 
     selected_stations and removed_stations may be mutated.
 
@@ -155,7 +168,7 @@ def handle_right_click_station(screen: pygame.Surface, subway: subway_system.Sub
 def handle_click_reset(screen: pygame.Surface, subway: subway_system.Subway,
                        buttons: pygame_buttons.Buttons, event: pygame.event.Event,
                        selected_stations: list[str], removed_stations: set[str],
-                       shortest_path: list[str]) -> None:
+                       shortest_path: route.Route) -> None:
     """Handle the given mouse click event, checking if the user left-clicked and pressed the RESET
     button.
 
@@ -164,8 +177,8 @@ def handle_click_reset(screen: pygame.Surface, subway: subway_system.Subway,
     buttons are the group of buttons being used in this visualization.
     selected_stations is the stations the user selected.
     removed_stations is the stations the user wants to avoid.
-    shortest_path is the shortest path between two stations (it is an empty list if no path has
-    been created yet or no path was found). It is a list of stations names.
+    shortest_path is the shortest path between two stations (it has no stations if no path has
+    been created yet or no path was found).
 
     selected_stations and removed_stations may be mutated.
 
@@ -183,7 +196,7 @@ def handle_click_reset(screen: pygame.Surface, subway: subway_system.Subway,
         buttons.update_button('map view', 'grey')
 
         # Change yellow- and red-coloured stations back to grey-coloured stations
-        stations = set.union(set(shortest_path + selected_stations), removed_stations)
+        stations = set.union(set(shortest_path.names + selected_stations), removed_stations)
         for station_name in stations:
             subway.update_selected_station(station_name, 'grey')
 
@@ -199,20 +212,20 @@ def handle_click_reset(screen: pygame.Surface, subway: subway_system.Subway,
 def handle_click_go(screen: pygame.Surface, subway: subway_system.Subway,
                     buttons: pygame_buttons.Buttons, event: pygame.event.Event,
                     selected_stations: list[str], removed_stations: set[str],
-                    path: list[str]) -> list[str]:
+                    path: route.Route) -> route.Route:
     """Handle the given mouse click event, checking if the user left-clicked and pressed the GO!
     button.
 
-    Return a list of station names representing the shortest path from selected_stations[0] and
-    selected_stations[1]. Return the given path passed in if the user did not press GO!.
+    Return the shortest route from selected_stations[0] to selected_stations[1]. Return the
+    given path passed in if the user did not press GO!.
 
     screen is the pygame Surface the subway system is displayed on.
     subway is a Subway class representing the subway system being visualized.
     buttons are the group of buttons being used in this visualization.
     selected_stations is the stations the user selected.
     removed_stations is the stations the user wants to avoid.
-    path is the current "shortest path" between two stations (it is an empty list
-    if no path has been created yet or no path was found). It is a list of stations names.
+    path is the current "shortest path" between two stations (it has no stations
+    if no path has been created yet or no path was found).
 
     Preconditions:
         - event.type == pygame.MOUSEBUTTONDOWN
@@ -224,9 +237,11 @@ def handle_click_go(screen: pygame.Surface, subway: subway_system.Subway,
     # and if the user actually pressed the GO! button
     if event.button == 1 and buttons.get_button_colour('go') == 'blue' and \
             buttons.was_pressed('go', event.pos):
-        shortest_path = subway.shortest_path(selected_stations[0],
-                                             selected_stations[1],
-                                             removed_stations)
+        # Avoiding one more station usually leaves the previous route unchanged, so the
+        # route cache only searches again when it has to
+        shortest_path = route_cache.get_route_cache(subway).find_route(selected_stations[0],
+                                                                       selected_stations[1],
+                                                                       removed_stations)
 
         # User can no longer press the GO! and RESET button
         buttons.update_button('go', 'grey')
@@ -234,24 +249,23 @@ def handle_click_go(screen: pygame.Surface, subway: subway_system.Subway,
         buttons.draw_buttons()
         pygame_visualization.draw_button_text(screen)
 
-        if shortest_path == []:
+        if len(shortest_path) == 0:
             # No path was found between the two stations, display message
             pygame_visualization.draw_no_path_found_message(screen, True)
         else:
-            # Initiate and load sounds
-            pygame.mixer.init()
-            path_sound = pygame.mixer.Sound('sounds/path.mp3')          # From www.zapsplat.com
-            complete_sound = pygame.mixer.Sound('sounds/complete.mp3')  # From www.zapsplat.com
+            # The sounds were decoded once by the audio bank when the visualization started
+            sounds = audio.get_audio_bank()
 
             # Display the shortest path for the user
-            for station_name in shortest_path:
+            for station_name in shortest_path.names:
                 subway.update_selected_station(station_name, 'yellow')
-                pygame.event.wait(350)  # Wait before drawing next station
+                if PATH_ANIMATION_DELAY > 0:
+                    pygame.event.wait(PATH_ANIMATION_DELAY)  # Wait before drawing next station
                 subway.draw_stations()
-                path_sound.play()  # Play a sound when a station in the path is displayed
+                sounds.play('path')  # Play a sound when a station in the path is displayed
                 pygame.display.flip()
 
-            complete_sound.play()  # Play a sound when path is completed
+            sounds.play('complete')  # Play a sound when path is completed
 
             # User can now press the MAP VIEW button
             buttons.update_button('map view', 'blue')
@@ -263,14 +277,13 @@ def handle_click_go(screen: pygame.Surface, subway: subway_system.Subway,
 
 
 def handle_click_map_view(subway: subway_system.Subway, buttons: pygame_buttons.Buttons,
-                          event: pygame.event.Event, shortest_path: list[str]) -> None:
+                          event: pygame.event.Event, shortest_path: route.Route) -> None:
     """Handle the given mouse click event, checking if the user left-clicked and pressed the
      MAP VIEW button.
 
     subway is a Subway class representing the subway system being visualized.
     buttons are the group of buttons being used in this visualization.
-    shortest_path is a list of station names that are the shortest path between the
-    start and end station names in the list.
+    shortest_path is the shortest route between the two selected stations.
 
     Preconditions:
         - event.type == pygame.MOUSEBUTTONDOWN
@@ -279,10 +292,11 @@ def handle_click_map_view(subway: subway_system.Subway, buttons: pygame_buttons.
     # and if the user actually pressed the MAP VIEW button
     if event.button == 1 and buttons.get_button_colour('map view') == 'blue' and \
             buttons.was_pressed('map view', event.pos):
-        # Get the locations of the stations in the shortest path
-        locations = subway.get_locations(shortest_path)
-        # Plot the shortest path on a map in plotly
-        plotly_visualization.plot_shortest_path(shortest_path, locations)
+        # Write the map of the shortest path (reusing it if it was already written)
+        filepath = map_export.get_exporter(subway).export_route(shortest_path)
+        if OPEN_MAPS_IN_BROWSER:
+            # Open the map in the browser
+            webbrowser.open('file://' + os.path.abspath(filepath))
 
 
 if __name__ == '__main__':
@@ -296,9 +310,10 @@ if __name__ == '__main__':
     python_ta.check_all(
         config={
             # The names (strs) of imported modules
-            'extra-imports': ['python_ta.contracts', 'pygame', 'pygame.colordict',
-                              'pygame_visualization', 'pygame_buttons', 'subway_system',
-                              'plotly_visualization'],
+            'extra-imports': ['python_ta.contracts', 'os', 'webbrowser', 'pygame',
+                              'pygame.colordict', 'audio', 'pygame_visualization',
+                              'pygame_buttons', 'subway_system', 'map_export', 'route',
+                              'route_cache'],
             # The names (strs) of functions that call print/open/input
             'allowed-io': [],
             'max-line-length': 100,
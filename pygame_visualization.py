@@ -17,10 +17,15 @@ without changes to this code, are prohibited.
 This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
 and Jennifer Cao.
 """
+import functools
+from typing import Optional
 import pygame
 from pygame.colordict import THECOLORS
+import audio
+import input_recording
 import pygame_buttons
 import pygame_mouse_click_handling
+import schematic_layout
 import subway_system
 
 
@@ -48,29 +53,33 @@ def initialize_screen(screen_size: tuple[int, int], allowed: list, colour: str)
 
 
 def run_visualization(screen: pygame.Surface, subway: subway_system.Subway,
-                      subway_image_filename: str) -> None:
+                      subway_image_filename: Optional[str],
+                      recorder: Optional[input_recording.InputRecorder] = None) -> None:
     """Run the subway system visualization with the given subway system
     on the given screen.
 
-    subway_image_filename is the filepath for the image of the subway system.
+    subway_image_filename is the filepath for the image of the subway system, or None to draw
+    the edges of the subway system instead (e.g. if it was laid out by schematic_layout).
+    If recorder is not None, every mouse click of the user is recorded with it.
     """
-    # Initiate and load music and sound
-    pygame.mixer.init()
-    pygame.mixer.music.load("sounds/background_music.mp3")  # From www.bensound.com
-    pygame.mixer.music.set_volume(0.2)
-    pygame.mixer.music.play(-1)  # Loop music
-    click_sound = pygame.mixer.Sound('sounds/click.mp3')  # Sound from www.zapsplat.com
-
     # Draw the background on the given screen and assign 'buttons' the return group
     # of Buttons for this visualization
-    buttons = draw_background(screen, subway_image_filename)
+    buttons = draw_background(screen, subway_image_filename, subway)
+
+    # Display the first frame before doing anything that is not needed to draw it
+    draw_frame(screen, subway, buttons)
+
+    # Initiate the mixer and load music and sounds in the background (sounds are played once
+    # loaded)
+    sounds = audio.get_audio_bank()
+    sounds.start()
 
     # Set up initial variables needed for this visualization
     clock = pygame.time.Clock()
     is_running = True
     selected_stations = []
     removed_stations = set()
-    shortest_path = []
+    shortest_path = subway.empty_route()
 
     while is_running:
         clock.tick(30)
@@ -78,11 +87,14 @@ def run_visualization(screen: pygame.Surface, subway: subway_system.Subway,
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 # X button was pressed, stop running pygame (quit)
-                pygame.mixer.music.fadeout(700)  # Fadeout music
+                sounds.fadeout(700)  # Fadeout music
                 is_running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                # Play a clicking sound
-                click_sound.play()
+                if recorder is not None:
+                    recorder.record(event)
+
+                # Play a clicking sound (if it has been loaded)
+                sounds.play('click')
 
                 # User clicked the mouse, call handle_mouse_click
                 shortest_path = pygame_mouse_click_handling.handle_mouse_click(
@@ -90,31 +102,49 @@ def run_visualization(screen: pygame.Surface, subway: subway_system.Subway,
                     selected_stations, removed_stations, shortest_path)
 
         # Display changes
-        subway.draw_stations()
-        buttons.draw_buttons()
-        draw_button_text(screen)
-        pygame.display.flip()
+        draw_frame(screen, subway, buttons)
 
     pygame.display.quit()
 
 
-def draw_background(screen: pygame.Surface, subway_image_filename: str) -> pygame_buttons.Buttons:
-    """Draw the background with the given filename onto the given screen.
+def draw_frame(screen: pygame.Surface, subway: subway_system.Subway,
+               buttons: pygame_buttons.Buttons) -> None:
+    """Draw the stations of the given subway system and the given buttons (with their text)
+    onto the given screen, and display them.
+    """
+    subway.draw_stations()
+    buttons.draw_buttons()
+    draw_button_text(screen)
+    pygame.display.flip()
+
+
+def draw_background(screen: pygame.Surface, subway_image_filename: Optional[str],
+                    subway: Optional[subway_system.Subway] = None) -> pygame_buttons.Buttons:
+    """Draw the background with the given filename onto the given screen, or if
+    subway_image_filename is None, the edges of the given subway system.
 
     Return a pygame_buttons.Buttons class containing all the buttons needed for
     this visualization.
+
+    Preconditions:
+        - subway_image_filename is not None or subway is not None
     """
-    # Load the image of the subway system
-    subway_background = pygame.image.load(subway_image_filename)
-    # Convert the image into the same pixel format as the screen
-    subway_background = subway_background.convert_alpha()
+    width, height = screen.get_size()
+    if subway_image_filename is None:
+        # Draw the edges of the subway system where the image would be
+        subway_background = schematic_layout.draw_network(
+            subway, (width - schematic_layout.SIDEBAR_WIDTH, height))
+    else:
+        # Load the image of the subway system
+        subway_background = pygame.image.load(subway_image_filename)
+        # Convert the image into the same pixel format as the screen
+        subway_background = subway_background.convert_alpha()
     # Draw the background on the screen
     screen.blit(subway_background, (0, 0))
 
     # Draw the sidebar on the screen and assign 'buttons' the group of Buttons on the sidebar
     buttons = draw_sidebar(screen)
 
-    width, height = screen.get_size()
     # Draw a vertical line between the subway system and the sidebar
     pygame.draw.line(screen, THECOLORS['black'], (width - 300, 0), (width - 300, height), 2)
 
@@ -192,12 +222,23 @@ def draw_text(screen: pygame.Surface, text: str, font_size: int,
     Preconditions:
         - colour in THECOLORS
     """
-    font = pygame.font.SysFont('verdana', font_size)
+    font = get_font(font_size)
     text_surface = font.render(text, True, THECOLORS[colour])
     width, height = text_surface.get_size()
     screen.blit(text_surface, pygame.Rect(pos, (pos[0] + width, pos[1] + height)))
 
 
+@functools.lru_cache(maxsize=None)
+def get_font(font_size: int) -> pygame.font.Font:
+    """Return the font of the given size that all the text in the pygame visualization
+    is drawn with.
+
+    Fonts are looked up and loaded only once per size, since searching the system fonts
+    is slow.
+    """
+    return pygame.font.SysFont('verdana', font_size)
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
@@ -209,8 +250,9 @@ if __name__ == '__main__':
     python_ta.check_all(
         config={
             # The names (strs) of imported modules
-            'extra-imports': ['python_ta.contracts', 'pygame', 'pygame.colordict',
-                              'pygame_buttons', 'pygame_mouse_click_handling', 'subway_system'],
+            'extra-imports': ['python_ta.contracts', 'functools', 'pygame',
+                              'pygame.colordict', 'audio', 'input_recording', 'pygame_buttons',
+                              'pygame_mouse_click_handling', 'schematic_layout', 'subway_system'],
             # The names (strs) of functions that call print/open/input
             'allowed-io': [],
             'max-line-length': 100,
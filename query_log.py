@@ -0,0 +1,180 @@
+"""CSC111 Project 2021: The Query Log of the Project
+
+Description
+===========
+This file is where the routes asked for by users are logged. It contains a class that appends
+every query (an origin and a destination) to a compact binary log file, and functions that read
+such a file back and find the most popular routes and origins in it, so that they can be
+computed ahead of time when the program starts (see RouteCache.start_warming).
+
+A log file starts with the bytes of _MAGIC, followed by records of two kinds: a name record (the
+byte b'N', the length of a name as 2 bytes and the name in UTF-8) gives the next station id to a
+station name, and a query record (the byte b'Q' and two 4-byte station ids) logs one query.
+Every name is written once, so a query takes 9 bytes no matter how long the names are.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import collections
+import os
+import struct
+import threading
+from typing import BinaryIO
+
+
+_MAGIC = b'SQL1'
+_NAME = struct.Struct('<cH')
+_QUERY = struct.Struct('<cII')
+
+
+def _read(filepath: str) -> tuple[list[str], collections.Counter, int]:
+    """Return the station names (in the order of their ids) and the number of times every
+    (origin, destination) pair was queried in the log file with the given filepath, and the
+    number of bytes of the file up to the end of its last complete record.
+
+    A record cut short (e.g. by a crash while it was being written) is ignored, and so is
+    everything after a record that cannot be read (such as a query of a station id that was
+    never named).
+
+    Raise a ValueError if the file is not a query log (it does not start with _MAGIC, and is
+    not a part of _MAGIC cut short).
+    """
+    with open(filepath, 'rb') as file:
+        contents = file.read()
+
+    names, counts = [], collections.Counter()
+    if not contents.startswith(_MAGIC):
+        if _MAGIC.startswith(contents):
+            return names, counts, 0
+        raise ValueError(f'{filepath} is not a query log')
+
+    offset = len(_MAGIC)
+    while offset < len(contents):
+        kind = contents[offset:offset + 1]
+        if kind == b'N' and offset + _NAME.size <= len(contents):
+            _, length = _NAME.unpack_from(contents, offset)
+            end = offset + _NAME.size + length
+            if end > len(contents):
+                break
+            names.append(contents[offset + _NAME.size:end].decode('utf-8'))
+        elif kind == b'Q' and offset + _QUERY.size <= len(contents):
+            _, origin, destination = _QUERY.unpack_from(contents, offset)
+            if origin >= len(names) or destination >= len(names):
+                break
+            end = offset + _QUERY.size
+            counts[(names[origin], names[destination])] += 1
+        else:
+            break
+        offset = end
+
+    return names, counts, offset
+
+
+def read_queries(filepath: str) -> collections.Counter:
+    """Return the number of times every (origin, destination) pair of station names was
+    queried in the log file with the given filepath (or no queries if there is no such file).
+
+    Raise a ValueError if the file is not a query log.
+    """
+    if not os.path.exists(filepath):
+        return collections.Counter()
+
+    return _read(filepath)[1]
+
+
+def popular_routes(counts: collections.Counter, n: int) -> list[tuple[str, str]]:
+    """Return the n most queried (origin, destination) pairs of the given query counts, most
+    queried first.
+    """
+    return [pair for pair, _ in counts.most_common(n)]
+
+
+def popular_origins(counts: collections.Counter, n: int) -> list[str]:
+    """Return the n most common origins of the given query counts, most common first."""
+    origins = collections.Counter()
+    for (origin, _), count in counts.items():
+        origins[origin] += count
+
+    return [origin for origin, _ in origins.most_common(n)]
+
+
+class QueryLog:
+    """An append-only log file of route queries.
+
+    Queries can be logged from any thread. Every query is flushed to the file as soon as it is
+    logged.
+    """
+    # Private Instance Attributes:
+    #   - _file:
+    #       The log file, open for appending.
+    #   - _ids:
+    #       The id of every station name written to the log file.
+    #   - _lock:
+    #       The lock held while a query is written.
+    _file: BinaryIO
+    _ids: dict[str, int]
+    _lock: threading.Lock
+
+    def __init__(self, filepath: str) -> None:
+        """Open the log file with the given filepath, creating it if it does not exist, so
+        that new queries are appended to it.
+
+        Raise a ValueError (and leave the file as it is) if the file exists but is not a query
+        log.
+        """
+        names, _, valid = _read(filepath) if os.path.exists(filepath) else ([], None, 0)
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._lock = threading.Lock()
+
+        self._file = open(filepath, 'ab')
+        # Drop any record cut short, so that new records start where a complete one ended
+        self._file.truncate(valid)
+        if valid == 0:
+            self._file.write(_MAGIC)
+            self._file.flush()
+
+    def record(self, origin: str, destination: str) -> None:
+        """Log a query of the route from origin to destination."""
+        with self._lock:
+            ids = []
+            for name in (origin, destination):
+                if name not in self._ids:
+                    encoded = name.encode('utf-8')
+                    self._file.write(_NAME.pack(b'N', len(encoded)) + encoded)
+                    self._ids[name] = len(self._ids)
+                ids.append(self._ids[name])
+
+            self._file.write(_QUERY.pack(b'Q', ids[0], ids[1]))
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the log file. No query may be logged afterwards."""
+        with self._lock:
+            self._file.close()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'collections', 'os', 'struct', 'threading'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': ['_read', 'QueryLog.__init__'],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
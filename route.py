@@ -0,0 +1,173 @@
+"""CSC111 Project 2021: The Routes of the Project
+
+Description
+===========
+This file is where the route result type of this project is found. A route holds only the
+indices of its stations in a compact graph, the cumulative length of the route at every station,
+and its number of hops. Everything else (the station names, their locations and the GeoJSON of
+the route) is built from the graph the first time it is asked for. Routes can also be serialized
+to JSON or GeoJSON as a stream of small text chunks, without building the whole document (or any
+intermediate dictionaries) in memory first.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao.
+"""
+from __future__ import annotations
+import json
+from array import array
+from typing import Iterator, Optional, TextIO
+import compact_graph
+
+
+class Route:
+    """A route through the stations of a compact graph.
+
+    A route with no stations means that no route was found.
+
+    Instance Attributes:
+        - graph: The graph this route goes through.
+        - stations: The indices of the stations of this route, in order.
+        - costs: The length (in kilometres) of this route from its first station to every
+                 station of it.
+        - hops: The number of edges of this route.
+
+    Representation Invariants:
+        - len(self.costs) == len(self.stations)
+        - self.hops == max(len(self.stations) - 1, 0)
+    """
+    graph: compact_graph.CompactGraph
+    stations: array
+    costs: array
+    hops: int
+
+    # Private Instance Attributes:
+    #   - _names:
+    #       The names of the stations of this route, or None if they were not needed yet.
+    _names: Optional[list[str]]
+
+    def __init__(self, graph: compact_graph.CompactGraph, stations: list[int]) -> None:
+        """Initialize the route through the stations of the given graph with the given indices.
+
+        Preconditions:
+            - all(0 <= i < len(graph.names) for i in stations)
+            - every two consecutive stations are joined by an edge of graph
+        """
+        self.graph = graph
+        self.stations = array('i', stations)
+        self.hops = max(len(stations) - 1, 0)
+        self._names = None
+
+        self.costs = array('d', [0.0] * len(stations))
+        for k in range(1, len(stations)):
+            self.costs[k] = self.costs[k - 1] + graph.edge_weight(stations[k - 1], stations[k])
+
+    def __len__(self) -> int:
+        """Return the number of stations of this route."""
+        return len(self.stations)
+
+    @property
+    def total_cost(self) -> float:
+        """The length (in kilometres) of this route."""
+        return self.costs[-1] if len(self.costs) > 0 else 0.0
+
+    @property
+    def names(self) -> list[str]:
+        """The names of the stations of this route, in order."""
+        if self._names is None:
+            self._names = [self.graph.names[i] for i in self.stations]
+
+        return self._names
+
+    def locations(self) -> Iterator[tuple[float, float]]:
+        """Return an iterator over the locations (latitude, longitude) of the stations of
+        this route, in order.
+        """
+        latitudes, longitudes = self.graph.latitudes, self.graph.longitudes
+        return ((latitudes[i], longitudes[i]) for i in self.stations)
+
+    def to_geojson(self) -> dict:
+        """Return the GeoJSON Feature (a LineString) of this route, as a dictionary.
+        """
+        return json.loads(''.join(self.geojson_chunks()))
+
+    def json_chunks(self) -> Iterator[str]:
+        """Return an iterator over the chunks of text of the JSON object representing this
+        route, with its station names, cumulative costs and number of hops.
+        """
+        yield '{"stations":['
+        yield from _joined(json.dumps(self.graph.names[i]) for i in self.stations)
+        yield '],"costs":['
+        yield from _joined(repr(cost) for cost in self.costs)
+        yield f'],"hops":{self.hops}}}'
+
+    def geojson_chunks(self) -> Iterator[str]:
+        """Return an iterator over the chunks of text of the GeoJSON Feature (a LineString)
+        of this route. Its properties are the station names, cumulative costs and number of
+        hops.
+
+        GeoJSON positions are (longitude, latitude).
+        """
+        yield '{"type":"Feature","geometry":{"type":"LineString","coordinates":['
+        yield from _joined(f'[{longitude!r},{latitude!r}]'
+                           for latitude, longitude in self.locations())
+        yield ']},"properties":'
+        yield from self.json_chunks()
+        yield '}'
+
+    def write_json(self, file: TextIO) -> None:
+        """Write the JSON object representing this route to the given file."""
+        file.writelines(self.json_chunks())
+
+    def write_geojson(self, file: TextIO) -> None:
+        """Write the GeoJSON Feature of this route to the given file."""
+        file.writelines(self.geojson_chunks())
+
+
+def _joined(items: Iterator[str]) -> Iterator[str]:
+    """Return an iterator over the given items with a comma between every two of them.
+    """
+    first = True
+    for item in items:
+        if first:
+            first = False
+            yield item
+        else:
+            yield ',' + item
+
+
+def write_geojson_collection(routes: Iterator[Route], file: TextIO) -> None:
+    """Write a GeoJSON FeatureCollection of the given routes to the given file, one route at
+    a time, so that any number of routes can be exported.
+    """
+    file.write('{"type":"FeatureCollection","features":[')
+    for k, route in enumerate(routes):
+        if k > 0:
+            file.write(',')
+        route.write_geojson(file)
+    file.write(']}')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'json', 'array', 'compact_graph'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
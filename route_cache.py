@@ -0,0 +1,421 @@
+"""CSC111 Project 2021: The Route Cache of the Project
+
+Description
+===========
+This file is where the route cache of this project is found. Users usually ask "what if I also
+avoid this station?" one station at a time, re-pressing GO! between clicks, so the same origin
+and destination are routed again and again with a growing set of avoided stations. The cache
+remembers the route found for every (origin, destination, avoided stations) query. The shortest
+route avoiding a set of stations is still the shortest route avoiding any larger set, as long as
+it goes through none of the extra stations, so most of those queries are answered by checking
+the stations of a cached route instead of searching again. Likewise, if no route avoided a set
+of stations, no route avoids any larger set.
+
+The cache can also keep the breadth-first search tree of a few origins, which holds the shortest
+route from that origin to every station. These trees, and the routes most often asked for in a
+query log (see query_log.py), can be computed in a background thread when the program starts, so
+that the first queries of a session are as fast as later ones.
+
+The cache keeps statistics of how often its routes were reused.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import collections
+import threading
+import weakref
+from typing import Iterable, Optional
+import compact_graph
+import overlay_routing
+import query_log
+import route
+import subway_system
+
+
+# New searches on subway systems with at least this many stations go through their overlay
+# router (see overlay_routing.py), which is faster than a breadth-first search from about there
+OVERLAY_MIN_STATIONS = 10000
+
+
+class CacheStats:
+    """The statistics of a route cache.
+
+    Instance Attributes:
+        - exact_hits: The number of queries answered by a route cached for the same set of
+                      avoided stations.
+        - subset_hits: The number of queries answered by a route cached for a smaller set of
+                       avoided stations.
+        - tree_hits: The number of queries answered by the search tree of their origin.
+        - searches: The number of queries that needed a new search.
+        - invalidations: The number of times the cache was emptied because its subway system
+                         changed.
+
+    Representation Invariants:
+        - self.exact_hits >= 0 and self.subset_hits >= 0 and self.tree_hits >= 0
+        - self.searches >= 0 and self.invalidations >= 0
+    """
+    exact_hits: int
+    subset_hits: int
+    tree_hits: int
+    searches: int
+    invalidations: int
+
+    def __init__(self) -> None:
+        """Initialize the statistics of an unused cache."""
+        self.exact_hits = self.subset_hits = self.tree_hits = 0
+        self.searches = self.invalidations = 0
+
+    def queries(self) -> int:
+        """Return the number of queries made to the cache."""
+        return self.exact_hits + self.subset_hits + self.tree_hits + self.searches
+
+    def reuse_rate(self) -> float:
+        """Return the fraction of queries answered without a new search (0.0 if no query was
+        made yet).
+        """
+        queries = self.queries()
+        reused = self.exact_hits + self.subset_hits + self.tree_hits
+        return reused / queries if queries > 0 else 0.0
+
+
+class _Entry:
+    """A private class representing the cached result of one query of a route cache.
+
+    Instance Attributes:
+        - avoid: The indices of the stations avoided by the query.
+        - route: The route found for the query (with no stations if there was none).
+        - on_route: The indices of the stations of route.
+    """
+    __slots__ = ('avoid', 'route', 'on_route')
+    avoid: frozenset[int]
+    route: route.Route
+    on_route: frozenset[int]
+
+    def __init__(self, avoid: frozenset[int], found: route.Route) -> None:
+        """Initialize the entry of the given query result."""
+        self.avoid = avoid
+        self.route = found
+        self.on_route = frozenset(found.stations)
+
+
+class RouteCache:
+    """A cache of the routes found between the stations of a subway system.
+
+    The cache is emptied whenever the snapshot of its subway system changes (a station, edge or
+    closure changed), so it never returns a route of an older version of the subway system.
+    A route reused from a smaller set of avoided stations is as short as the one a new search
+    would find, but may differ from it when there are several shortest routes.
+
+    Instance Attributes:
+        - stats: The statistics of this cache.
+        - log: The query log every query is written to, if any.
+    """
+    stats: CacheStats
+    log: Optional[query_log.QueryLog]
+
+    # Private Instance Attributes:
+    #   - _subway:
+    #       The subway system whose routes are cached.
+    #   - _graph:
+    #       The snapshot of _subway that the cached routes go through.
+    #   - _entries:
+    #       The cached results of every (origin, destination) pair of station indices, most
+    #       recently used first. The pairs themselves are kept from least to most recently
+    #       used.
+    #   - _max_pairs:
+    #       The maximum number of (origin, destination) pairs in _entries.
+    #   - _max_avoid_sets:
+    #       The maximum number of sets of avoided stations cached for one pair.
+    #   - _trees:
+    #       The parent of every station reached by a breadth-first search from every origin
+    #       index (avoiding no station) in _graph, least recently added first.
+    #   - _max_trees:
+    #       The maximum number of origins in _trees.
+    #   - _lock:
+    #       The lock held while the cache is looked up or changed.
+    _subway: subway_system.Subway
+    _graph: Optional[compact_graph.CompactGraph]
+    _entries: dict[tuple[int, int], list[_Entry]]
+    _max_pairs: int
+    _max_avoid_sets: int
+    _trees: dict[int, dict[int, int]]
+    _max_trees: int
+    _lock: threading.Lock
+
+    def __init__(self, subway: subway_system.Subway, max_pairs: int = 1024,
+                 max_avoid_sets: int = 32, max_trees: int = 16) -> None:
+        """Initialize an empty cache of the routes of the given subway system.
+
+        Preconditions:
+            - max_pairs >= 1
+            - max_avoid_sets >= 1
+            - max_trees >= 0
+        """
+        self.stats = CacheStats()
+        self.log = None
+        self._subway = subway
+        self._graph = None
+        self._entries = {}
+        self._max_pairs = max_pairs
+        self._max_avoid_sets = max_avoid_sets
+        self._trees = {}
+        self._max_trees = max_trees
+        self._lock = threading.Lock()
+
+    def find_route(self, name1: str, name2: str, visited: Iterable[str]) -> route.Route:
+        """Return the shortest route between the two stations with the given names
+        without visiting any of the stations in visited, or any closed station or edge.
+
+        Return a route with no stations if no such route exists.
+
+        Preconditions:
+            - self._subway.is_station_in_subway(name1)
+            - self._subway.is_station_in_subway(name2)
+            - all(self._subway.is_station_in_subway(name) for name in visited)
+        """
+        if self.log is not None:
+            self.log.record(name1, name2)
+
+        return self._find_route(name1, name2, visited, self.stats)
+
+    def _find_route(self, name1: str, name2: str, visited: Iterable[str],
+                    stats: CacheStats) -> route.Route:
+        """Return the shortest route between the two stations with the given names, as in
+        find_route, and count how it was found in the given statistics.
+        """
+        graph = self._subway.snapshot()
+        pair = (graph.index_of(name1), graph.index_of(name2))
+        avoid = frozenset(graph.index_of(name) for name in visited)
+
+        with self._lock:
+            self._refresh(graph)
+
+            cached = _reusable(self._entries.get(pair, []), avoid)
+            if cached is not None:
+                # The entry is kept as it is: its smaller set of avoided stations makes it
+                # reusable by more queries than an entry for avoid would be
+                if cached.avoid == avoid:
+                    stats.exact_hits += 1
+                else:
+                    stats.subset_hits += 1
+                self._insert(pair, cached)
+                return cached.route
+
+            path = self._tree_path(pair, avoid)
+            if path is not None:
+                stats.tree_hits += 1
+                cached = _Entry(avoid, route.Route(graph, path))
+                self._insert(pair, cached)
+                return cached.route
+
+            stats.searches += 1
+
+        # The search is done outside the lock, so that other queries are not held up by it
+        cached = _Entry(avoid, route.Route(graph, self._search(graph, pair, avoid)))
+
+        with self._lock:
+            # Another thread may have found the same route, or moved the cache on to a newer
+            # snapshot, in the meantime
+            if graph is self._graph \
+                    and all(entry.avoid != avoid for entry in self._entries.get(pair, [])):
+                self._insert(pair, cached)
+
+        return cached.route
+
+    def _insert(self, pair: tuple[int, int], entry: _Entry) -> None:
+        """Make the given entry the most recently used one of the given pair, and the pair the
+        most recently used one, forgetting the least recently used entries beyond the limits of
+        this cache.
+
+        Preconditions:
+            - self._lock is held
+        """
+        entries = self._entries.pop(pair, [])
+        # Reinsert the pair, so that it becomes the most recently used one
+        self._entries[pair] = entries
+
+        if entry in entries:
+            entries.remove(entry)
+        entries.insert(0, entry)
+        del entries[self._max_avoid_sets:]
+
+        if len(self._entries) > self._max_pairs:
+            # Forget the least recently used pair
+            del self._entries[next(iter(self._entries))]
+
+    def _search(self, graph: compact_graph.CompactGraph, pair: tuple[int, int],
+                avoid: frozenset[int]) -> list[int]:
+        """Return the shortest route (as station indices, or [] if there is none) for the
+        given pair avoiding the given stations, found by a new search of the given snapshot.
+        """
+        if len(graph.names) >= OVERLAY_MIN_STATIONS:
+            router = overlay_routing.get_overlay_router(self._subway)
+            path = router.path_indices(graph, pair[0], pair[1], set(avoid))
+        else:
+            path = graph.path_indices(pair[0], pair[1], set(avoid))
+
+        return [] if path is None else path
+
+    def _tree_path(self, pair: tuple[int, int], avoid: frozenset[int]) -> Optional[list[int]]:
+        """Return the route (as station indices, or [] if there is none) for the given pair
+        avoiding the given stations, as found in the search tree of the origin of the pair, or
+        None if the tree does not answer this query.
+
+        Like a cached route, the route in the tree is still the shortest one if it goes through
+        none of the avoided stations, and if the tree reaches no destination, no route does.
+        """
+        tree = self._trees.get(pair[0])
+        if tree is None:
+            return None
+        elif pair[1] not in tree:
+            return []
+
+        path = compact_graph.tree_path(tree, pair[0], pair[1])
+        return path if avoid.isdisjoint(path) else None
+
+    def _refresh(self, graph: compact_graph.CompactGraph) -> None:
+        """Empty this cache if its routes do not go through the given snapshot.
+
+        Preconditions:
+            - self._lock is held
+        """
+        if graph is not self._graph:
+            if self._entries != {} or self._trees != {}:
+                self.stats.invalidations += 1
+            self._entries = {}
+            self._trees = {}
+            self._graph = graph
+
+    def warm_tree(self, name: str) -> None:
+        """Keep the search tree of the station with the given name, so that every later
+        query from it that avoids none of the stations of its route needs no new search.
+
+        Preconditions:
+            - self._subway.is_station_in_subway(name)
+        """
+        graph = self._subway.snapshot()
+        source = graph.index_of(name)
+        # The search is done outside the lock, so that queries are not held up by it
+        tree, _ = graph.search_tree(source, set())
+
+        with self._lock:
+            self._refresh(graph)
+            if self._max_trees > 0:
+                self._trees.pop(source, None)
+                self._trees[source] = tree
+                if len(self._trees) > self._max_trees:
+                    del self._trees[next(iter(self._trees))]
+
+    def warm(self, queries: collections.Counter, routes: int, origins: int) -> None:
+        """Keep the search trees of the given number of most common origins, and then the
+        routes of the given number of most common (origin, destination) pairs, of the given
+        query counts (see query_log.read_queries).
+
+        Queries of stations that are no longer in the subway system are skipped. Warming is
+        not counted in the statistics of this cache, and is not written to its query log.
+        The overlays of a large subway system (see OVERLAY_MIN_STATIONS) are computed first.
+        """
+        graph = self._subway.snapshot()
+        if len(graph.names) >= OVERLAY_MIN_STATIONS:
+            overlay_routing.get_overlay_router(self._subway).update(graph)
+
+        for name in query_log.popular_origins(queries, min(origins, self._max_trees)):
+            if self._subway.is_station_in_subway(name):
+                self.warm_tree(name)
+
+        unused = CacheStats()
+        for name1, name2 in query_log.popular_routes(queries, routes):
+            if self._subway.is_station_in_subway(name1) \
+                    and self._subway.is_station_in_subway(name2):
+                self._find_route(name1, name2, (), unused)
+
+    def start_warming(self, queries: collections.Counter, routes: int = 256,
+                      origins: int = 8) -> threading.Thread:
+        """Start warming this cache (see warm) in a background thread, and return the thread.
+
+        The thread is a daemon thread, so it never keeps the program from exiting. Queries
+        made while it runs are answered as usual (and may already use what it has cached).
+        """
+        thread = threading.Thread(target=self.warm, args=(queries, routes, origins),
+                                  daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        """Forget every cached route and search tree (but keep the statistics of this
+        cache).
+        """
+        with self._lock:
+            self._entries = {}
+            self._trees = {}
+            self._graph = None
+
+
+def _reusable(entries: list[_Entry], avoid: frozenset[int]) -> Optional[_Entry]:
+    """Return the first of the given entries whose route is also the answer of the query
+    avoiding the given stations, or None if there is no such entry.
+
+    An entry is reusable if it avoided only stations of avoid, and its route goes through none
+    of the stations of avoid (or it found no route at all).
+    """
+    for entry in entries:
+        if entry.avoid <= avoid and (len(entry.route) == 0 or entry.on_route.isdisjoint(avoid)):
+            return entry
+
+    return None
+
+
+# The route cache of every subway system given to get_route_cache
+_caches = weakref.WeakKeyDictionary()
+
+
+def get_route_cache(subway: subway_system.Subway) -> RouteCache:
+    """Return the route cache of the given subway system, creating it the first time this
+    function is called with that subway system.
+    """
+    if subway not in _caches:
+        _caches[subway] = RouteCache(subway)
+
+    return _caches[subway]
+
+
+def start_query_log(subway: subway_system.Subway, filepath: str, routes: int = 256,
+                    origins: int = 8) -> threading.Thread:
+    """Write every query of the route cache of the given subway system to the query log file
+    with the given filepath, and start warming that cache with the queries already logged in
+    it (see RouteCache.start_warming). Return the warming thread.
+    """
+    cache = get_route_cache(subway)
+    queries = query_log.read_queries(filepath)
+    cache.log = query_log.QueryLog(filepath)
+
+    return cache.start_warming(queries, routes, origins)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'collections', 'threading', 'weakref',
+                              'compact_graph', 'overlay_routing', 'query_log', 'route',
+                              'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
@@ -0,0 +1,207 @@
+"""CSC111 Project 2021: The Route Rendering of the Project
+
+Description
+===========
+This file is where the headless rendering of route diagrams of this project occurs. It contains
+a class that draws routes over the background image of a subway system, with the stations of
+each route coloured like the pygame visualization colours them, and saves the diagrams as PNG
+files without opening a window. The background and station images are decoded, and the
+position of every station is computed, only once per renderer, so each diagram only costs a
+copy of the background, one blit per station and the PNG encoding. It also contains a function
+that renders many routes at once on a pool of worker processes.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+import multiprocessing
+import os
+from typing import Iterable, Optional
+import pygame
+import route
+import subway_system
+
+
+# The colours of the stations in a route diagram, matching the pygame visualization
+STATION_COLOUR = 'grey'
+ROUTE_COLOUR = 'yellow'
+AVOIDED_COLOUR = 'red'
+
+
+# The environment variables SDL is initialized with by init_headless_display: the dummy video
+# driver, and no signal handlers (without a window there is nothing to close, so SIGTERM should
+# stop the process, as it must for a pool to stop its workers, instead of becoming a QUIT event)
+_HEADLESS_ENVIRONMENT = {'SDL_VIDEODRIVER': 'dummy', 'SDL_NO_SIGNAL_HANDLERS': '1'}
+
+
+def init_headless_display() -> None:
+    """Initialize pygame's display with SDL's dummy video driver, so that images can be
+    converted and drawn without a window. Do nothing if the display is already initialized.
+
+    The environment variables this needs are only set while the display is initialized, so
+    a display initialized later on (after this one is quit) opens a window as usual.
+    """
+    if not pygame.display.get_init():
+        previous = {name: os.environ.get(name) for name in _HEADLESS_ENVIRONMENT}
+        os.environ.update(_HEADLESS_ENVIRONMENT)
+        try:
+            pygame.display.init()
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    del os.environ[name]
+                else:
+                    os.environ[name] = value
+
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+class RouteRenderer:
+    """A renderer of route diagrams over the background image of a subway system.
+
+    The display must be initialized (e.g. by init_headless_display) before a renderer is
+    created.
+    """
+    # Private Instance Attributes:
+    #   - _station_images:
+    #       The decoded image of a station of every colour, mapped to the colour.
+    #   - _rects:
+    #       Where the image of every station is drawn, mapped to the name of the station, in
+    #       the order the pygame visualization draws them.
+    #   - _background:
+    #       The decoded background image.
+    _station_images: dict[str, pygame.Surface]
+    _rects: dict[str, pygame.Rect]
+    _background: pygame.Surface
+
+    def __init__(self, background_filepath: str,
+                 coordinates: dict[str, tuple[int, int]]) -> None:
+        """Initialize a renderer of routes through the stations with the given pygame
+        coordinates (mapped to their names, in the order of their indices), over the image
+        with the given filepath.
+        """
+        self._station_images = {
+            colour: pygame.image.load(f'images/{colour}_circle.png').convert_alpha()
+            for colour in (STATION_COLOUR, ROUTE_COLOUR, AVOIDED_COLOUR)}
+
+        rect = self._station_images[STATION_COLOUR].get_rect()
+        self._rects = {name: rect.move(x - rect.centerx, y - rect.centery)
+                       for name, (x, y) in coordinates.items()}
+
+        # The background has no alpha channel, like the screen, so that the stations blend
+        # into it exactly as they do in the pygame visualization
+        self._background = pygame.image.load(background_filepath).convert()
+
+    def render(self, stations: list[str], avoided: Iterable[str] = ()) -> pygame.Surface:
+        """Return a new diagram of the route through the given stations, with the given
+        avoided stations marked as well.
+
+        Stations that are not in the subway system of this renderer are ignored.
+        """
+        colours = dict.fromkeys(avoided, AVOIDED_COLOUR)
+        colours.update(dict.fromkeys(stations, ROUTE_COLOUR))
+
+        # Every station is drawn once, in its final colour, like the sprites of the pygame
+        # visualization (drawing a grey station under a yellow one would change its edges)
+        diagram = self._background.copy()
+        diagram.blits([(self._station_images[colours.get(name, STATION_COLOUR)], rect)
+                       for name, rect in self._rects.items()], doreturn=False)
+
+        return diagram
+
+    def save(self, stations: list[str], filepath: str, avoided: Iterable[str] = ()) -> None:
+        """Save the diagram of the route through the given stations (see render) as a PNG
+        file with the given filepath.
+        """
+        pygame.image.save(self.render(stations, avoided), filepath)
+
+
+# The renderer of the current worker process of render_routes
+_worker_renderer: Optional[RouteRenderer] = None
+
+
+def _init_worker(background_filepath: str, coordinates: dict[str, tuple[int, int]]) -> None:
+    """Create the renderer of the current worker process."""
+    global _worker_renderer
+    init_headless_display()
+    _worker_renderer = RouteRenderer(background_filepath, coordinates)
+
+
+def _render_jobs(jobs: list[tuple[list[str], list[str], str]]) -> None:
+    """Save the diagram of every (stations, avoided stations, filepath) job with the current
+    worker's renderer.
+    """
+    for stations, avoided, filepath in jobs:
+        _worker_renderer.save(stations, filepath, avoided)
+
+
+def render_routes(subway: subway_system.Subway, background_filepath: str,
+                  routes: list[route.Route], directory: str,
+                  avoided: Iterable[str] = (), processes: int = 1,
+                  chunk_size: int = 32) -> list[str]:
+    """Save the diagram of every given route through the given subway system as a PNG file in
+    the given directory, and return their filepaths (in the same order as routes).
+
+    background_filepath is the filepath of the image of the subway system. avoided are the
+    stations marked as avoided in every diagram. With more than one process, the diagrams are
+    rendered by a pool of worker processes, each decoding the images once.
+
+    Preconditions:
+        - processes >= 1
+        - chunk_size >= 1
+        - os.path.isdir(directory)
+    """
+    coordinates = subway.get_coordinates()
+    avoided = list(avoided)
+    width = len(str(max(len(routes) - 1, 0)))
+    filepaths = [os.path.join(directory, f'route_{k:0{width}}.png') for k in range(len(routes))]
+    jobs = [(found.names, avoided, filepath) for found, filepath in zip(routes, filepaths)]
+
+    if processes == 1:
+        # Leave the display as it was, so that this process can still open a window later on
+        display_was_initialized = pygame.display.get_init()
+        init_headless_display()
+        try:
+            renderer = RouteRenderer(background_filepath, coordinates)
+            for stations, avoided_stations, filepath in jobs:
+                renderer.save(stations, filepath, avoided_stations)
+        finally:
+            if not display_was_initialized:
+                pygame.display.quit()
+    else:
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        # Workers are spawned rather than forked, so that none of them inherits the SDL state
+        # (such as an open window) of this process
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes, initializer=_init_worker,
+                          initargs=(background_filepath, coordinates)) as pool:
+            pool.map(_render_jobs, chunks)
+
+    return filepaths
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'multiprocessing', 'os', 'pygame', 'route',
+                              'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136', 'W0603']
+        }
+    )
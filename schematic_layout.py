@@ -0,0 +1,404 @@
+"""CSC111 Project 2021: The Schematic Layout of the Project
+
+Description
+===========
+This file is where the pygame coordinates of subway systems without hand-measured coordinates
+(and without a background image drawn to match them) are computed. Stations start at their
+geographic locations, and are then moved by a force-directed layout (Fruchterman-Reingold,
+vectorized with numpy): every two stations push each other apart, every edge pulls its stations
+towards each other, and every station is pulled back towards its location (and every part of
+the subway system not joined to the rest is kept centred on its locations). For large
+subway systems, the push of far away stations is approximated with a Barnes-Hut scheme: stations
+are grouped into the cells of a quadtree, and a cell that is far enough away pushes like a
+single station of its total weight at its centre. Finally, the edges are straightened: every
+edge is turned to the nearest multiple of 45 degrees, like the lines of a schematic subway map,
+by moving every station to the average of where its edges would put it.
+
+Layouts are cached by a hash of the locations and edges they were computed from, in memory and
+in a cache directory, so a subway system is only laid out once. This file also contains a
+function that draws the edges of a subway system, as the background of its visualization.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import hashlib
+import math
+import os
+from typing import Optional
+import numpy as np
+import pygame
+from pygame.colordict import THECOLORS
+import subway_system
+
+
+DEFAULT_CACHE_DIRECTORY = 'layout_cache'
+
+# The width of the sidebar of the pygame visualization, which layouts stay clear of
+SIDEBAR_WIDTH = 300
+
+# The number of pixels left free on every side of a layout (a station is 18 pixels wide)
+MARGIN = 20
+
+# The number of steps of the force-directed layout, and of rounds of straightening its edges
+ITERATIONS = 100
+OCTILINEAR_ROUNDS = 50
+
+# Subway systems with at least this many stations are laid out with the Barnes-Hut scheme
+BARNES_HUT_MIN_STATIONS = 1000
+
+# The average number of stations a station shares its cell with at the finest level of the
+# Barnes-Hut quadtree, and the deepest that level may be (with 2^level by 2^level cells)
+CELL_STATIONS = 4
+MAX_LEVEL = 12
+
+# How strongly stations are pulled back towards their locations, compared to the other forces
+ANCHOR_STRENGTH = 0.05
+
+# The colours of the background and of the edges drawn by draw_network
+BACKGROUND_COLOUR = 'white'
+EDGE_COLOUR = 'grey40'
+
+
+def layout_network(locations: list[tuple[float, float]], edges: list[tuple[int, int]],
+                   size: tuple[int, int],
+                   cache_directory: Optional[str] = DEFAULT_CACHE_DIRECTORY) \
+        -> list[tuple[int, int]]:
+    """Return the pygame coordinates of stations with the given locations (latitude,
+    longitude), joined by the given edges (pairs of indices into locations), laid out in an
+    area of the given size (width, height).
+
+    The layout is looked up in memory and then in cache_directory (unless it is None) first,
+    and saved to both once it is computed.
+
+    Preconditions:
+        - len(locations) >= 1
+        - all(0 <= i < len(locations) and 0 <= j < len(locations) for i, j in edges)
+        - size[0] > 2 * MARGIN and size[1] > 2 * MARGIN
+    """
+    points = np.array(locations, dtype=np.float64).reshape(-1, 2)
+    pairs = np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+    digest = hashlib.sha256()
+    for part in (points, pairs, np.array(size), np.array([MARGIN, ITERATIONS, OCTILINEAR_ROUNDS]),
+                 np.array([BARNES_HUT_MIN_STATIONS, CELL_STATIONS, MAX_LEVEL, ANCHOR_STRENGTH])):
+        digest.update(part.tobytes())
+    key = digest.hexdigest()
+
+    if key not in _layouts:
+        filepath = None if cache_directory is None else os.path.join(cache_directory,
+                                                                      f'{key}.npy')
+        if filepath is not None and os.path.exists(filepath):
+            _layouts[key] = np.load(filepath)
+        else:
+            _layouts[key] = compute_layout(points, pairs, size)
+            if filepath is not None:
+                os.makedirs(cache_directory, exist_ok=True)
+                # Save to a temporary file first so that a half-written layout is never read
+                temporary_filepath = f'{filepath}.{os.getpid()}.tmp.npy'
+                np.save(temporary_filepath, _layouts[key])
+                os.replace(temporary_filepath, filepath)
+
+    return [(int(x), int(y)) for x, y in _layouts[key]]
+
+
+# The layouts computed or loaded by layout_network, mapped to their hashes
+_layouts = {}
+
+
+def compute_layout(locations: np.ndarray, edges: np.ndarray, size: tuple[int, int],
+                   iterations: int = ITERATIONS, barnes_hut: Optional[bool] = None,
+                   octilinear_rounds: int = OCTILINEAR_ROUNDS) -> np.ndarray:
+    """Return the pygame coordinates (an array of n rows x, y) of the n stations with the
+    given locations (an array of n rows latitude, longitude), joined by the given edges (an
+    array of rows i, j of station indices), laid out in an area of the given size.
+
+    The force-directed layout takes the given number of iterations, and its edges are then
+    straightened for octilinear_rounds rounds. The push between stations is approximated with
+    the Barnes-Hut scheme if barnes_hut is True, or if it is None and there are at least
+    BARNES_HUT_MIN_STATIONS stations.
+
+    Preconditions:
+        - len(locations) >= 1
+        - size[0] > 2 * MARGIN and size[1] > 2 * MARGIN
+        - iterations >= 0 and octilinear_rounds >= 0
+    """
+    n = len(locations)
+    if barnes_hut is None:
+        barnes_hut = n >= BARNES_HUT_MIN_STATIONS
+
+    anchors = _project(locations)
+    # Stations at the same location would push each other in no direction
+    positions = anchors + np.random.default_rng(111).normal(0.0, 1e-4, anchors.shape)
+    u, v = edges[:, 0], edges[:, 1]
+    components = _components(n, u, v)
+    sizes = np.bincount(components)
+
+    # The ideal length of an edge, and the furthest a station moves in the first step
+    k = math.sqrt(1.0 / n)
+    temperature = 0.1
+
+    for step in range(iterations):
+        if barnes_hut:
+            displacement = _push_barnes_hut(positions, k)
+        else:
+            displacement = _push(positions, k)
+
+        # Every edge pulls its stations together with a force of its length squared over k
+        delta = positions[v] - positions[u]
+        lengths = np.sqrt((delta ** 2).sum(axis=1))
+        pull = delta * (lengths / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(u, pull[:, axis], minlength=n)
+            displacement[:, axis] -= np.bincount(v, pull[:, axis], minlength=n)
+
+        displacement += (anchors - positions) * ANCHOR_STRENGTH
+
+        # No station moves further than the current temperature
+        distances = np.sqrt((displacement ** 2).sum(axis=1))
+        scale = np.minimum(distances, temperature) / np.maximum(distances, 1e-12)
+        positions += displacement * scale[:, None]
+        # The rest of the subway system would push a small part of it not joined to the rest
+        # far away, so the centre of every part is kept at the centre of its locations
+        for axis in range(2):
+            drift = np.bincount(components, anchors[:, axis] - positions[:, axis]) / sizes
+            positions[:, axis] += drift[components]
+        temperature = 0.1 * (1 - (step + 1) / iterations) + 1e-3
+
+    return _fit(_straighten(positions, u, v, octilinear_rounds), size)
+
+
+def _components(n: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Return the component of every one of n stations joined by the edges from station u[e]
+    to station v[e], numbered from 0.
+    """
+    labels = np.arange(n)
+    while True:
+        # Every station takes the smallest label of its neighbours and of its label's station
+        new = labels.copy()
+        np.minimum.at(new, u, labels[v])
+        np.minimum.at(new, v, labels[u])
+        new = new[new]
+        if np.array_equal(new, labels):
+            return np.unique(labels, return_inverse=True)[1]
+        labels = new
+
+
+def _straighten(positions: np.ndarray, u: np.ndarray, v: np.ndarray,
+                rounds: int) -> np.ndarray:
+    """Return the given positions after the given number of rounds of turning every edge
+    (from station u[e] to station v[e]) towards the nearest multiple of 45 degrees.
+
+    In every round, every station moves to the average of its own position and of where
+    each of its edges, turned and keeping its length, would put it from its other station.
+    No edge gets shorter than half of its length before the first round.
+    """
+    n = len(positions)
+    weight = (1 + np.bincount(u, minlength=n) + np.bincount(v, minlength=n))[:, None]
+    # Edges pulled different ways at a busy station would otherwise shrink round by round
+    shortest = np.sqrt(((positions[v] - positions[u]) ** 2).sum(axis=1)) / 2
+
+    for _ in range(rounds):
+        delta = positions[v] - positions[u]
+        lengths = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), shortest)
+        snapped = np.round(np.arctan2(delta[:, 1], delta[:, 0]) / (math.pi / 4)) * math.pi / 4
+        turned = np.stack([np.cos(snapped), np.sin(snapped)], axis=1) * lengths[:, None]
+
+        total = positions.copy()
+        for axis in range(2):
+            total[:, axis] += np.bincount(v, positions[u, axis] + turned[:, axis], minlength=n)
+            total[:, axis] += np.bincount(u, positions[v, axis] - turned[:, axis], minlength=n)
+        positions = total / weight
+
+    return positions
+
+
+def _project(locations: np.ndarray) -> np.ndarray:
+    """Return the given locations (rows of latitude, longitude) projected onto a plane with
+    y pointing south (like pygame coordinates), scaled so that they span at most 1 in both
+    directions.
+    """
+    latitudes, longitudes = locations[:, 0], locations[:, 1]
+    # A degree of longitude is shorter than a degree of latitude away from the equator
+    scale = math.cos(math.radians((latitudes.min() + latitudes.max()) / 2))
+    points = np.stack([longitudes * scale, -latitudes], axis=1)
+    points -= points.min(axis=0)
+
+    return points / max(points.max(), 1e-12)
+
+
+def _fit(positions: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    """Return the given positions scaled (by the same factor in both directions) and moved to
+    fill an area of the given size, leaving MARGIN pixels free on every side, and rounded to
+    whole pixels.
+    """
+    positions = positions - positions.min(axis=0)
+    span = positions.max(axis=0)
+    room = np.array(size, dtype=np.float64) - 2 * MARGIN
+    scale = (room / np.maximum(span, 1e-12)).min()
+    offset = MARGIN + (room - span * scale) / 2
+
+    return np.rint(positions * scale + offset).astype(np.int64)
+
+
+def _push(positions: np.ndarray, k: float) -> np.ndarray:
+    """Return the displacement of every station pushed by every other station with a force
+    of k squared over their distance.
+    """
+    displacement = np.zeros_like(positions)
+    # Stations are handled in blocks, so that only a block of pairwise distances is in memory
+    for start in range(0, len(positions), 512):
+        delta = positions[start:start + 512, None, :] - positions[None, :, :]
+        squared = (delta ** 2).sum(axis=2) + (0.01 * k) ** 2
+        displacement[start:start + 512] = (delta / squared[:, :, None]).sum(axis=1)
+
+    return displacement * k ** 2
+
+
+def _push_barnes_hut(positions: np.ndarray, k: float) -> np.ndarray:
+    """Return the displacement of every station pushed by every other station with a force
+    of k squared over their distance (see _push), approximated with a quadtree.
+
+    At every level of the quadtree (with 2^level by 2^level cells), a station is pushed by the
+    cells that are not next to its own cell, but whose parents are next to its own cell's
+    parent, as if every station of such a cell were at the cell's centre. This push, and how
+    fast it changes in every direction, are computed once for every cell, at its centre, and
+    extrapolated from there to every station of the cell. At the finest level, with a few
+    stations per cell, every station is also pushed by its own cell and the cells next to it.
+    """
+    n = len(positions)
+    corner = positions.min(axis=0)
+    span = max(float((positions.max(axis=0) - corner).max()), 1e-12)
+    unit = (positions - corner) / span * (1 - 1e-9)
+    displacement = np.zeros_like(positions)
+
+    level, finest = 2, False
+    while not finest:
+        side = 1 << level
+        cells = np.floor(unit * side).astype(np.int64)
+        ids = cells[:, 0] * side + cells[:, 1]
+        weight = np.bincount(ids, minlength=side * side).astype(np.float64)
+        # Stations crowd into a few cells of a city, so the finest level is the first one at
+        # which a station shares its cell with few other stations on average
+        finest = (weight ** 2).sum() <= CELL_STATIONS * n or level == MAX_LEVEL
+        level += 1
+        sums = np.stack([np.bincount(ids, positions[:, axis], minlength=side * side)
+                         for axis in range(2)], axis=1)
+
+        occupied = np.flatnonzero(weight)
+        centres = sums / np.maximum(weight, 1.0)[:, None]
+        occupied_cells = np.stack([occupied // side, occupied % side], axis=1)
+        push, gradient = np.zeros((side * side, 2)), np.zeros((side * side, 2, 2))
+        push[occupied], gradient[occupied] = _cell_push(centres[occupied], occupied_cells,
+                                                        _FAR_MASKS, side, weight, sums, k)
+        offsets = positions - centres[ids]
+        displacement += push[ids] + (gradient[ids] @ offsets[:, :, None])[:, :, 0]
+
+        if finest:
+            displacement += _cell_push(positions, cells, _NEAR_MASKS, side, weight, sums,
+                                       k)[0]
+
+            # A station's own cell pushes it like its other stations, at their centre
+            count = weight[ids] - 1
+            centres = (sums[ids] - positions) / np.maximum(count, 1.0)[:, None]
+            delta = positions - centres
+            squared = (delta ** 2).sum(axis=1) + (0.01 * k) ** 2
+            displacement += delta * (count * k ** 2 / squared)[:, None]
+
+    return displacement
+
+
+# Whether a cell pushes a station at every level of _push_barnes_hut: _FAR_MASKS[p][dx, dy] for
+# the cell dx, dy cells right and down of the first child of the cell before and above the
+# parent of the station's cell (leaving out the cells next to the station's cell), where p is
+# the position of the station's cell in its parent (0 to 3), and _NEAR_MASKS[p][dx, dy] for
+# the cell dx - 1, dy - 1 cells right and down of the station's cell
+_FAR_MASKS = np.array([[[abs(dx - 2 - p // 2) > 1 or abs(dy - 2 - p % 2) > 1 for dy in range(6)]
+                        for dx in range(6)] for p in range(4)])
+_NEAR_MASKS = np.array([[[(dx, dy) != (1, 1) for dy in range(3)] for dx in range(3)]] * 4)
+
+
+def _cell_push(points: np.ndarray, cells: np.ndarray, masks: np.ndarray, side: int,
+               weight: np.ndarray, sums: np.ndarray, k: float) -> tuple[np.ndarray, np.ndarray]:
+    """Return the displacement of every given point, in the given cell (a row x, y) of a side
+    by side grid, pushed by the cells chosen by masks (_FAR_MASKS or _NEAR_MASKS), as if every
+    station of such a cell were at its centre, and the gradient (a 2 by 2 matrix) of that
+    displacement at the point. The cells of the grid hold weight stations whose positions add
+    up to sums.
+    """
+    width = masks.shape[1]
+    if masks is _FAR_MASKS:
+        first = (cells // 2 - 1) * 2
+    else:
+        first = cells - 1
+    xs = first[:, 0, None] + np.arange(width)
+    ys = first[:, 1, None] + np.arange(width)
+    chosen = masks[(cells[:, 0] % 2) * 2 + cells[:, 1] % 2]
+    chosen &= ((xs >= 0) & (xs < side))[:, :, None] & ((ys >= 0) & (ys < side))[:, None, :]
+
+    # Only the pairs of a point and an occupied cell pushing it are computed
+    rows, dxs, dys = np.nonzero(chosen)
+    ids = xs[rows, dxs] * side + ys[rows, dys]
+    occupied = weight[ids] > 0
+    rows, ids = rows[occupied], ids[occupied]
+
+    count = weight[ids]
+    delta = points[rows] - sums[ids] / count[:, None]
+    squared = (delta ** 2).sum(axis=1) + (0.01 * k) ** 2
+    strength = count * k ** 2 / squared
+
+    # The push of a cell is strength * delta, whose gradient is strength * (I - 2 delta
+    # delta^T / squared)
+    m = len(points)
+    push = np.stack([np.bincount(rows, delta[:, axis] * strength, minlength=m)
+                     for axis in range(2)], axis=1)
+    gradient = np.empty((m, 2, 2))
+    for i in range(2):
+        for j in range(i, 2):
+            terms = strength * ((i == j) - 2 * delta[:, i] * delta[:, j] / squared)
+            gradient[:, i, j] = gradient[:, j, i] = np.bincount(rows, terms, minlength=m)
+
+    return push, gradient
+
+
+def draw_network(subway: subway_system.Subway, size: tuple[int, int]) -> pygame.Surface:
+    """Return a background of the given size for the visualization of the given subway
+    system: every one of its edges drawn as a line between the pygame coordinates of its
+    stations.
+    """
+    graph = subway.snapshot()
+    coordinates = list(subway.get_coordinates().values())
+
+    surface = pygame.Surface(size)
+    surface.fill(THECOLORS[BACKGROUND_COLOUR])
+    for i, j in graph.edges():
+        pygame.draw.line(surface, THECOLORS[EDGE_COLOUR], coordinates[i], coordinates[j], 3)
+
+    return surface
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'hashlib', 'math', 'os', 'numpy', 'pygame',
+                              'pygame.colordict', 'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
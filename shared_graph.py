@@ -0,0 +1,286 @@
+"""CSC111 Project 2021: The Shared Graph of the Project
+
+Description
+===========
+This file is where the shared-memory graph of a subway system is found. It contains a class that
+copies the arrays of a compact graph (station names, locations, adjacency and edge lengths) into
+one block of shared memory, which any number of routing worker processes then attach to without
+copying it. Each worker only keeps a handful of Python objects of its own, so the memory used
+per worker stays close to zero no matter how large the subway system is. It also contains a
+function that routes many trips on a pool of such workers.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao.
+"""
+from __future__ import annotations
+import multiprocessing
+import struct
+from array import array
+from multiprocessing import shared_memory
+from typing import Optional
+import compact_graph
+
+
+# The header of a shared graph: the number of stations, the number of slots of indices, the
+# number of bytes of station names, and the version of the subway system
+_HEADER = struct.Struct('<qqqq')
+
+
+def _layout(n: int, m: int, name_bytes: int) -> dict[str, tuple[int, int, str]]:
+    """Return the (offset, number of items, format) of every array of a shared graph with n
+    stations, m slots of indices and name_bytes bytes of station names.
+
+    Arrays of 8-byte items come first, so every array is aligned to the size of its items.
+    """
+    sections = [('latitudes', n, 'd'), ('longitudes', n, 'd'), ('weights', m, 'd'),
+                ('indptr', n + 1, 'i'), ('indices', m, 'i'), ('name_offsets', n + 1, 'i'),
+                ('name_order', n, 'i'), ('station_open', n, 'B'), ('edge_open', m, 'B'),
+                ('name_blob', name_bytes, 'B')]
+    layout = {}
+    offset = _HEADER.size
+
+    for section, count, item_format in sections:
+        layout[section] = (offset, count, item_format)
+        offset += count * struct.calcsize(item_format)
+
+    layout['size'] = (offset, 0, 'B')
+
+    return layout
+
+
+class _SharedNames:
+    """The station names of a shared graph, decoded one at a time when they are used.
+    """
+    # Private Instance Attributes:
+    #   - _offsets:
+    #       Where the name of every station starts in _blob (and ends, for the last station).
+    #   - _blob:
+    #       The UTF-8 encoded names of all the stations, one after another.
+    _offsets: memoryview
+    _blob: memoryview
+
+    def __init__(self, offsets: memoryview, blob: memoryview) -> None:
+        """Initialize the names stored in the given offsets and blob."""
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        """Return the number of stations."""
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        """Return the name of the station with index i."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+
+class SharedGraph(compact_graph.CompactGraph):
+    """A compact graph whose arrays are stored in a block of shared memory.
+
+    A SharedGraph is created with SharedGraph.create (which copies a compact graph into a new
+    block) and attached to with SharedGraph.attach (which copies nothing). Its arrays are
+    memoryviews of the block, and its station names are decoded on demand, so attaching to
+    even a very large subway system takes constant time and memory.
+
+    The open flags are shared as well: a graph attached in a worker sees closures made
+    through the graph it was created from. Workers that change flags themselves (e.g. to
+    evaluate a scenario) must change those of a copy.
+
+    Instance Attributes:
+        - block: The shared memory block holding the arrays of this graph.
+    """
+    block: shared_memory.SharedMemory
+
+    # Private Instance Attributes:
+    #   - _name_order:
+    #       The indices of the stations, sorted by station name.
+    #   - _views:
+    #       Every view of the block held by this graph.
+    _name_order: memoryview
+    _views: list[memoryview]
+
+    def __init__(self, block: shared_memory.SharedMemory) -> None:
+        """Initialize a graph whose arrays are the ones stored in the given block.
+
+        Preconditions:
+            - block was filled in by SharedGraph.create
+        """
+        # The arrays are views of the block, so nothing from CompactGraph.__init__ is needed
+        # pylint: disable=super-init-not-called
+        self.block = block
+        n, m, name_bytes, self.version = _HEADER.unpack_from(block.buf)
+        views = {}
+
+        for section, (offset, count, item_format) in _layout(n, m, name_bytes).items():
+            size = count * struct.calcsize(item_format)
+            views[section] = block.buf[offset:offset + size].cast(item_format)
+
+        self.latitudes, self.longitudes = views['latitudes'], views['longitudes']
+        self.indptr, self.indices = views['indptr'], views['indices']
+        self.weights = views['weights']
+        self.station_open, self.edge_open = views['station_open'], views['edge_open']
+        self.names = _SharedNames(views['name_offsets'], views['name_blob'])
+        self._name_order = views['name_order']
+        self._views = list(views.values())
+
+    @classmethod
+    def create(cls, graph: compact_graph.CompactGraph) -> SharedGraph:
+        """Return a new shared graph holding a copy of the given compact graph.
+
+        The caller owns the new block of shared memory: it must call unlink once no process
+        needs the graph any more.
+
+        >>> graph = compact_graph.CompactGraph(['A', 'B', 'C'], array('d', [49.0, 49.01, 49.02]),
+        ...                                    array('d', [-123.0] * 3), [[1], [0, 2], [1]])
+        >>> shared = SharedGraph.create(graph)
+        >>> shared.has_edge('B', 'A'), shared.has_edge('A', 'C')
+        (True, False)
+        >>> shared.edge_weight(2, 1) == graph.edge_weight(1, 2)
+        True
+        >>> scenario = shared.copy()
+        >>> scenario.set_edge_open('C', 'B', False)
+        >>> scenario.is_edge_open('B', 'C'), shared.is_edge_open('B', 'C')
+        (False, True)
+        >>> scenario.shortest_path('A', 'C'), shared.shortest_path('A', 'C')
+        ([], ['A', 'B', 'C'])
+        >>> shared.unlink()
+        """
+        encoded = [name.encode('utf-8') for name in graph.names]
+        n, m = len(encoded), len(graph.indices)
+        name_offsets = [0]
+        for name in encoded:
+            name_offsets.append(name_offsets[-1] + len(name))
+
+        layout = _layout(n, m, name_offsets[-1])
+        block = shared_memory.SharedMemory(create=True, size=max(layout['size'][0], 1))
+        _HEADER.pack_into(block.buf, 0, n, m, name_offsets[-1], graph.version)
+
+        contents = {'latitudes': graph.latitudes, 'longitudes': graph.longitudes,
+                    'weights': graph.weights, 'indptr': graph.indptr, 'indices': graph.indices,
+                    'name_offsets': name_offsets,
+                    'name_order': sorted(range(n), key=graph.names.__getitem__),
+                    'station_open': graph.station_open, 'edge_open': graph.edge_open,
+                    'name_blob': b''.join(encoded)}
+
+        for section, values in contents.items():
+            offset, _, item_format = layout[section]
+            packed = array(item_format, values).tobytes()
+            block.buf[offset:offset + len(packed)] = packed
+
+        return cls(block)
+
+    @classmethod
+    def attach(cls, name: str) -> SharedGraph:
+        """Return the shared graph stored in the block of shared memory with the given name.
+        """
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def close(self) -> None:
+        """Stop using the block of shared memory of this graph in the current process.
+
+        This graph (and any copy of it) must not be used afterwards.
+        """
+        # The block can only be closed once nothing refers to its memory any more
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.block.close()
+
+    def unlink(self) -> None:
+        """Close this graph and free its block of shared memory.
+
+        Only the process that created the graph should call this method.
+        """
+        self.close()
+        self.block.unlink()
+
+    def index_of(self, name: str) -> int:
+        """Return the index of the station with the given name.
+
+        Preconditions:
+            - self.has_station(name)
+        """
+        return self._name_order[self._order_position(name)]
+
+    def has_station(self, name: str) -> bool:
+        """Return whether this graph has a station with the given name."""
+        position = self._order_position(name)
+        return position < len(self._name_order) and \
+            self.names[self._name_order[position]] == name
+
+    def _order_position(self, name: str) -> int:
+        """Return the first position of _name_order whose station name is not less than the
+        given name.
+        """
+        lo, hi = 0, len(self._name_order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.names[self._name_order[mid]] < name:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+
+# The shared graph attached to by the current worker process of route_in_workers
+_worker_graph: Optional[SharedGraph] = None
+
+
+def _attach_worker(name: str) -> None:
+    """Attach the current worker process to the shared graph with the given block name."""
+    global _worker_graph
+    _worker_graph = SharedGraph.attach(name)
+
+
+def _route_trips(trips: list[tuple[str, str]]) -> list[list[str]]:
+    """Return the shortest path of every trip in the current worker's shared graph."""
+    return [_worker_graph.shortest_path(name1, name2) for name1, name2 in trips]
+
+
+def route_in_workers(graph: SharedGraph, trips: list[tuple[str, str]], processes: int,
+                     chunk_size: int = 64) -> list[list[str]]:
+    """Return the shortest path of every trip (a pair of station names) in the given shared
+    graph, routed by the given number of worker processes that all attach to its block.
+
+    Preconditions:
+        - processes >= 1
+        - chunk_size >= 1
+        - all(graph.has_station(a) and graph.has_station(b) for a, b in trips)
+    """
+    chunks = [trips[i:i + chunk_size] for i in range(0, len(trips), chunk_size)]
+
+    with multiprocessing.Pool(processes, initializer=_attach_worker,
+                              initargs=(graph.block.name,)) as pool:
+        routed = pool.map(_route_trips, chunks)
+
+    return [path for chunk in routed for path in chunk]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'multiprocessing', 'struct', 'array',
+                              'multiprocessing.shared_memory', 'compact_graph'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136', 'W0603']
+        }
+    )
@@ -0,0 +1,291 @@
+"""CSC111 Project 2021: The Station Index of the Project
+
+Description
+===========
+This file is where the geographic nearest-neighbour index of this project is found. It contains
+a class representing a k-d tree built over the locations of the stations of a subway system,
+which answers k-nearest and within-radius queries for arbitrary (latitude, longitude) points,
+and a function that finds the shortest path between two arbitrary points by first snapping
+them to their nearest stations.
+
+Copyright and Usage Information
+===============================
+This file is for the personal and private use of Katherine Luo, Alissa Lozhkin,
+Ayanaa Rahman, and Jennifer Cao. Any forms of distribution of this code, with or
+without changes to this code, are prohibited.
+
+This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
+and Jennifer Cao.
+"""
+from __future__ import annotations
+import heapq
+import math
+import weakref
+from typing import Optional
+import numpy as np
+import geo
+import subway_system
+
+
+# Ranges of at most this many stations are scanned directly instead of being split further
+_LEAF_SIZE = 8
+
+
+def _to_unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    """Return the point on the unit sphere with the given latitude and longitude (in degrees).
+    """
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(chord: float) -> float:
+    """Return the great-circle distance (in kilometres) matching the given straight-line
+    distance between two points on the unit sphere.
+    """
+    return 2 * geo.EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def _km_to_chord(distance: float) -> float:
+    """Return the straight-line distance between two points on the unit sphere matching the
+    given great-circle distance (in kilometres).
+    """
+    return 2 * math.sin(min(distance / (2 * geo.EARTH_RADIUS_KM), math.pi / 2))
+
+
+class StationIndex:
+    """A k-d tree over the locations of the stations of a subway system.
+
+    The stations are stored as points on the unit sphere, so the straight-line distance
+    between two points grows with their great-circle distance. This keeps the tree exact
+    everywhere on Earth, including across the antimeridian.
+    """
+    # Private Instance Attributes:
+    #   - _names:
+    #       The names of the stations in this index, in tree order.
+    #   - _points:
+    #       The unit-sphere points of the stations, in tree order.
+    #   - _axes:
+    #       The split axis (0, 1 or 2) of the node stored at each position of the tree.
+    #       The node of the range [lo, hi) is stored at position (lo + hi) // 2.
+    _names: list[str]
+    _points: list[tuple[float, float, float]]
+    _axes: list[int]
+
+    def __init__(self, names: list[str], latitudes: np.ndarray, longitudes: np.ndarray) -> None:
+        """Build an index over the stations with the given names and locations.
+
+        Preconditions:
+            - len(names) == len(latitudes) == len(longitudes)
+        """
+        lat, lon = np.radians(latitudes), np.radians(longitudes)
+        points = np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon),
+                                  np.sin(lat)))
+
+        order = np.arange(len(names))
+        axes = np.zeros(len(names), dtype=np.int64)
+        self._build(points, order, axes, 0, len(names))
+
+        self._names = [names[i] for i in order]
+        self._points = [tuple(point) for point in points[order].tolist()]
+        self._axes = axes.tolist()
+
+    def _build(self, points: np.ndarray, order: np.ndarray, axes: np.ndarray,
+               lo: int, hi: int) -> None:
+        """Arrange order[lo:hi] into a k-d tree, recording the split axis of each node in axes.
+        """
+        if hi - lo <= _LEAF_SIZE:
+            return
+
+        # Split on the axis along which the stations in this range are most spread out
+        chunk = points[order[lo:hi]]
+        axis = int(np.argmax(chunk.max(axis=0) - chunk.min(axis=0)))
+        mid = (lo + hi) // 2
+
+        # Move the median station to mid, with smaller stations before it and larger after it
+        order[lo:hi] = order[lo:hi][np.argpartition(chunk[:, axis], mid - lo)]
+        axes[mid] = axis
+
+        self._build(points, order, axes, lo, mid)
+        self._build(points, order, axes, mid + 1, hi)
+
+    def __len__(self) -> int:
+        """Return the number of stations in this index.
+        """
+        return len(self._names)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> list[tuple[str, float]]:
+        """Return the k stations closest to the given point, closest first, as a list of
+        (station name, distance in kilometres).
+
+        Return every station if there are fewer than k stations in this index.
+
+        Preconditions:
+            - k >= 1
+        """
+        target = _to_unit_vector(latitude, longitude)
+        # A max-heap (by negated squared distance) of the closest stations found so far
+        best = []
+        self._search_nearest(target, k, best, 0, len(self._names))
+
+        return [(self._names[i], _chord_to_km(math.sqrt(-d)))
+                for d, i in sorted(best, reverse=True)]
+
+    def _search_nearest(self, target: tuple[float, float, float], k: int,
+                        best: list[tuple[float, int]], lo: int, hi: int) -> None:
+        """Add the stations in the tree range [lo, hi) that are among the k closest
+        to target to best.
+        """
+        if hi - lo <= _LEAF_SIZE:
+            for i in range(lo, hi):
+                self._offer(target, k, best, i)
+            return
+
+        mid = (lo + hi) // 2
+        self._offer(target, k, best, mid)
+
+        # Search the side of the split containing the target first
+        difference = target[self._axes[mid]] - self._points[mid][self._axes[mid]]
+        if difference < 0:
+            near, far = (lo, mid), (mid + 1, hi)
+        else:
+            near, far = (mid + 1, hi), (lo, mid)
+
+        self._search_nearest(target, k, best, *near)
+        # Only search the other side if it can contain a closer station
+        if len(best) < k or difference * difference < -best[0][0]:
+            self._search_nearest(target, k, best, *far)
+
+    def _offer(self, target: tuple[float, float, float], k: int,
+               best: list[tuple[float, int]], i: int) -> None:
+        """Add the station at tree position i to best if it is among the k closest so far.
+        """
+        point = self._points[i]
+        d = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + \
+            (point[2] - target[2]) ** 2
+
+        if len(best) < k:
+            heapq.heappush(best, (-d, i))
+        elif d < -best[0][0]:
+            heapq.heapreplace(best, (-d, i))
+
+    def within_radius(self, latitude: float, longitude: float,
+                      radius: float) -> list[tuple[str, float]]:
+        """Return all the stations within radius kilometres of the given point, closest first,
+        as a list of (station name, distance in kilometres).
+
+        Preconditions:
+            - radius >= 0
+        """
+        target = _to_unit_vector(latitude, longitude)
+        chord = _km_to_chord(radius)
+        found = []
+        self._search_radius(target, chord * chord, found, 0, len(self._names))
+        found.sort()
+
+        return [(self._names[i], _chord_to_km(math.sqrt(d))) for d, i in found]
+
+    def _search_radius(self, target: tuple[float, float, float], limit: float,
+                       found: list[tuple[float, int]], lo: int, hi: int) -> None:
+        """Add the stations in the tree range [lo, hi) whose squared distance to target is at
+        most limit to found.
+        """
+        if hi - lo <= _LEAF_SIZE:
+            positions = range(lo, hi)
+        else:
+            mid = (lo + hi) // 2
+            positions = (mid,)
+
+            difference = target[self._axes[mid]] - self._points[mid][self._axes[mid]]
+            if difference < 0 or difference * difference <= limit:
+                self._search_radius(target, limit, found, lo, mid)
+            if difference >= 0 or difference * difference <= limit:
+                self._search_radius(target, limit, found, mid + 1, hi)
+
+        for i in positions:
+            point = self._points[i]
+            d = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + \
+                (point[2] - target[2]) ** 2
+            if d <= limit:
+                found.append((d, i))
+
+
+def index_from_subway(subway: subway_system.Subway) -> StationIndex:
+    """Return a StationIndex over all the stations of the given subway system.
+    """
+    geometry = subway.snapshot().geometry()
+    return StationIndex(geometry.names, geometry.latitudes, geometry.longitudes)
+
+
+# The StationIndex of every subway system an index was requested for, with the version of
+# the subway system it was built at
+_indexes = weakref.WeakKeyDictionary()
+
+
+def get_station_index(subway: subway_system.Subway) -> StationIndex:
+    """Return a StationIndex over all the stations of the given subway system, building it the
+    first time this function is called with that subway system, and again whenever the subway
+    system changed.
+    """
+    if subway not in _indexes or _indexes[subway][0] != subway.get_version():
+        # Key the index with the version of the snapshot it was actually built from
+        graph = subway.snapshot()
+        geometry = graph.geometry()
+        _indexes[subway] = (graph.version, StationIndex(geometry.names, geometry.latitudes,
+                                                        geometry.longitudes))
+
+    return _indexes[subway][1]
+
+
+def route_between_points(subway: subway_system.Subway, index: StationIndex,
+                         origin: tuple[float, float], destination: tuple[float, float],
+                         visited: set[str], max_snap_distance: Optional[float] = None) \
+        -> list[str]:
+    """Return the shortest path between the stations closest to the given origin and
+    destination points without visiting any of the stations in visited.
+
+    origin and destination are (latitude, longitude) points. Stations in visited are never
+    chosen as the start or end of the path. Return [] if either point is more than
+    max_snap_distance kilometres from every station it could be snapped to, or if no path
+    was found.
+
+    Preconditions:
+        - index was built over the stations of subway
+        - all(subway.is_station_in_subway(name) for name in visited)
+    """
+    ends = []
+
+    for latitude, longitude in (origin, destination):
+        # Ask for one more station than there are avoided stations so that at least
+        # one candidate is not avoided
+        candidates = index.nearest(latitude, longitude, len(visited) + 1)
+        allowed = [(name, distance) for name, distance in candidates if name not in visited]
+
+        if allowed == [] or (max_snap_distance is not None
+                             and allowed[0][1] > max_snap_distance):
+            # This point is too far from every station, return []
+            return []
+
+        ends.append(allowed[0][0])
+
+    return subway.shortest_path(ends[0], ends[1], visited)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+
+    import python_ta
+    python_ta.check_all(
+        config={
+            # The names (strs) of imported modules
+            'extra-imports': ['python_ta.contracts', 'heapq', 'math', 'weakref', 'numpy',
+                              'geo', 'subway_system'],
+            # The names (strs) of functions that call print/open/input
+            'allowed-io': [],
+            'max-line-length': 100,
+            'disable': ['E1136']
+        }
+    )
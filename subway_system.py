@@ -3,7 +3,8 @@
 Description
 ===========
 This file is where the classes for the subway system are found. It contains a private class
-representing a station of the subway system and a public class representing the subway system.
+representing a station of the subway system, a private sprite class representing a station that is
+displayed in pygame, and a public class representing the subway system.
 This file contains adapted code from the University of Toronto, Department of Computer Science,
 David Liu's CSC111 Lecture 14 slides, 2021:
 www.teach.cs.toronto.edu/~csc111h/winter/lectures/14-representing-graphs/david/14-slides.html#
@@ -19,55 +20,95 @@ This file is Copyright (c) 2021 Katherine Luo, Alissa Lozhkin, Ayanaa Rahman,
 and Jennifer Cao.
 """
 from __future__ import annotations
+import sys
+import threading
+from array import array
 from typing import Optional
 import pygame
+import compact_graph
+import itinerary
+import route
 
 
-class _Station(pygame.sprite.Sprite):
-    """A private sprite class representing a station of the subway system.
+# A dictionary mapping a colour to the decoded image of a station of that colour.
+# Every station sprite of the same colour shares the same image.
+_station_images = {}
+
+
+def _station_image(colour: str) -> pygame.Surface:
+    """Return the image of a station of the given colour, loading it the first time
+    it is needed.
+
+    Preconditions:
+        - colour in {'grey', 'yellow', 'red'}
+    """
+    if colour not in _station_images:
+        image = pygame.image.load(f'images/{colour}_circle.png')
+        # Convert the image into the same pixel format as the screen
+        _station_images[colour] = image.convert_alpha()
+
+    return _station_images[colour]
+
+
+class _Station:
+    """A private class representing a station of the subway system.
+
+    The location and pygame coordinates of a station are stored in the packed arrays of its
+    Subway (at position index), and its sprite is only created once it is drawn, so a station
+    that is never displayed stays small.
 
     Instance Attributes:
         - name: The name of the station.
-        - location: The latitude and longitude of the station.
+        - index: The position of the station in the arrays of its subway system.
         - neighbours: The station's neighbouring stations.
-        - image: The current image of the station (either a grey, yellow, or red circle).
-        - rect: The "rectangle" representation of the image of the station
-                (mainly used to keep track of the station's coordinates in pygame).
 
     Representation Invariants:
         - self not in self.neighbours
         - all(self in u.neighbours for u in self.neighbours)
-        - self.location[0] is the latitude and self.location[1] is the longitude
+        - self.index >= 0
     """
+    __slots__ = ('name', 'index', 'neighbours')
     name: str
-    location: tuple[float, float]
+    index: int
     neighbours: set[_Station]
+
+    def __init__(self, name: str, index: int) -> None:
+        """Initiate the name, index, and neighbours of a station.
+        """
+        self.name = name
+        self.index = index
+        self.neighbours = set()
+
+
+class _StationSprite(pygame.sprite.Sprite):
+    """A private sprite class representing a station of the subway system that is displayed
+    in pygame.
+
+    Instance Attributes:
+        - name: The name of the station.
+        - image: The current image of the station (either a grey, yellow, or red circle).
+        - rect: The "rectangle" representation of the image of the station
+                (mainly used to keep track of the station's coordinates in pygame).
+    """
+    name: str
     image: pygame.Surface
     rect: pygame.Rect
 
-    def __init__(self, name: str, location: tuple[float, float],
-                 coordinates: tuple[int, int]) -> None:
-        """Initiate the name, location, and neighbours of a station.
-        Also initiate the image and "rectangle" representation of the station in pygame with
-        the given coordinates of the station.
+    def __init__(self, name: str, coordinates: tuple[int, int]) -> None:
+        """Initiate the image and "rectangle" representation of the station with the given
+        name in pygame, with the given coordinates of the station.
 
         Preconditions:
-            - location[0] is the latitude and location[1] is the longitude
             - coordinates[0] is the x-coordinate and coordinates[1] is the y-coordinate
         """
         # Call the parent __init__() method
         pygame.sprite.Sprite.__init__(self)
 
-        # Initiate the general information about this station
         self.name = name
-        self.location = location
-        self.neighbours = set()
 
         # Initiate the image and "rectangle" representation of this station in pygame
         # (station is initially a grey circle)
-        self.image = pygame.image.load('images/grey_circle.png')
-        # Convert the background into the same pixel format as the screen
-        self.image = self.image.convert_alpha()
+        self.image = _station_image('grey')
         self.rect = self.image.get_rect()
         # Place station in its correct location in pygame
         self.rect.center = coordinates
@@ -93,9 +134,7 @@ class _Station(pygame.sprite.Sprite):
         if mouse_position is None or self.rect.collidepoint(mouse_position):
             # Change the colour of the station to grey, yellow, or red
             # (depending on the value of colour)
-            self.image = pygame.image.load(f'images/{colour}_circle.png')
-            # Convert the background into the same pixel format as the screen
-            self.image = self.image.convert_alpha()
+            self.image = _station_image(colour)
 
             # Return the name of the station
             return self.name
@@ -103,37 +142,15 @@ class _Station(pygame.sprite.Sprite):
         # User did not select this station, return None
         return None
 
-    def possible_paths(self, target_station: str, visited: set[str]) -> list[list[str]]:
-        """Return all paths between this station and the target station without using
-        any stations in visited.
-
-        Preconditions:
-            - self.name not in visited
-            - target_station not in visited
-        """
-        if self.name == target_station:
-            return [[self.name]]
-        else:
-            # Create a new set of visited stations with this station's name included
-            new_visited = visited.union({self.name})
-            # Accumulator: keep track of the possible paths so far
-            paths_so_far = []
-
-            for station in self.neighbours:
-                if station.name not in new_visited:
-                    # Find the paths between this station and the target station,
-                    # avoiding the stations in new_visited
-                    paths = station.possible_paths(target_station, new_visited)
-
-                    # Append the paths to paths_so_far
-                    for path in paths:
-                        paths_so_far.append([self.name] + path)
-
-            return paths_so_far
-
 
 class Subway:
     """A graph representation of a subway system with stations.
+
+    Changes to the stations, edges and closures all go through one writer path guarded by a
+    lock. Readers never look at the changing data directly: they use the latest published
+    snapshot (an immutable CompactGraph), which is replaced by a new one after every change,
+    so any number of threads can route at the same time as changes are made. The pygame
+    methods (the ones updating or drawing stations) must only be called from the main thread.
     """
     # Private Instance Attributes:
     #   - _screen:
@@ -141,12 +158,55 @@ class Subway:
     # 	- _stations:
     # 		A dictionary of the stations contained in this subway system.
     # 		Maps the station's name to the corresponding _Station object.
+    #   - _names:
+    #       The name of every station, indexed by _Station.index.
+    #   - _latitudes, _longitudes:
+    #       The latitude and longitude of every station, indexed by _Station.index.
+    #   - _x_coordinates, _y_coordinates:
+    #       The pygame coordinates of every station, indexed by _Station.index.
+    #   - _station_sprites:
+    #       A dictionary mapping the name of every station that is displayed on _screen
+    #       to its sprite. Only used from the main thread.
+    #   - _unchecked:
+    #       The stations that have not been checked for being displayed on _screen yet
+    #       (so their sprites may still need to be created or moved), used as an ordered set.
+    #   - _removed:
+    #       The names of the stations removed since their sprites were last checked (so their
+    #       sprites may still need to be removed).
     #   - _sprites:
     #       A pygame.sprite.Group whose purpose is to draw the stations of
-    #       this subway system on _screen.
+    #       this subway system on _screen. Only used from the main thread.
+    #   - _version:
+    #       The number of changes made to the stations and edges of this subway system.
+    #   - _closed_stations:
+    #       The names of the stations that are closed.
+    #   - _closed_edges:
+    #       The edges that are closed, as pairs of station names in sorted order.
+    #   - _closures_version:
+    #       The number of times a station or edge of this subway system was opened or closed.
+    #   - _published:
+    #       The latest published snapshot of this subway system (or None if no snapshot was
+    #       published yet), together with the (_version, _closures_version) it was built at.
+    #   - _write_lock:
+    #       The lock held while the stations, edges or closures of this subway system change,
+    #       and while a new snapshot is built.
     _screen: pygame.Surface
     _stations: dict[str, _Station]
+    _names: list[str]
+    _latitudes: array
+    _longitudes: array
+    _x_coordinates: array
+    _y_coordinates: array
+    _station_sprites: dict[str, _StationSprite]
+    _unchecked: dict[_Station, None]
+    _removed: set[str]
     _sprites: pygame.sprite.Group
+    _version: int
+    _closed_stations: set[str]
+    _closed_edges: set[tuple[str, str]]
+    _closures_version: int
+    _published: Optional[tuple[tuple[int, int], compact_graph.CompactGraph]]
+    _write_lock: threading.RLock
 
     def __init__(self, screen: pygame.Surface) -> None:
         """Initialize an empty subway system (no stations or edges).
@@ -155,7 +215,29 @@ class Subway:
         """
         self._screen = screen
         self._stations = {}
+        self._names = []
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+        self._x_coordinates = array('i')
+        self._y_coordinates = array('i')
+        self._station_sprites = {}
+        self._unchecked = {}
+        self._removed = set()
         self._sprites = pygame.sprite.Group()
+        self._version = 0
+        self._closed_stations = set()
+        self._closed_edges = set()
+        self._closures_version = 0
+        self._published = None
+        self._write_lock = threading.RLock()
+
+    def get_version(self) -> int:
+        """Return the version of this subway system.
+
+        The version grows every time a station or edge is added, removed or moved, so anything
+        computed from this subway system is up to date if its version is unchanged.
+        """
+        return self._version
 
     def is_station_in_subway(self, station_name: str) -> bool:
         """Return True if the given station name is in this subway system
@@ -174,10 +256,20 @@ class Subway:
             - location[0] is the latitude and location[1] is the longitude
             - coordinates[0] is the x-coordinate and coordinates[1] is the y-coordinate
         """
-        if not self.is_station_in_subway(name):
-            station = _Station(name, location, coordinates)
-            self._stations[name] = station
-            self._sprites.add(station)
+        with self._write_lock:
+            if not self.is_station_in_subway(name):
+                # Station names are interned so that every copy of a name shares one string
+                name = sys.intern(name)
+                station = _Station(name, len(self._names))
+                self._stations[name] = station
+                self._names.append(name)
+
+                self._latitudes.append(location[0])
+                self._longitudes.append(location[1])
+                self._x_coordinates.append(coordinates[0])
+                self._y_coordinates.append(coordinates[1])
+                self._unchecked[station] = None
+                self._version += 1
 
     def add_edge(self, name1: str, name2: str) -> None:
         """Add an edge between the two stations with the given station names in this subway system.
@@ -187,12 +279,143 @@ class Subway:
         Preconditions:
             - name1 != name2
         """
-        if self.is_station_in_subway(name1) and self.is_station_in_subway(name2):
-            station1 = self._stations[name1]
-            station2 = self._stations[name2]
+        with self._write_lock:
+            if self.is_station_in_subway(name1) and self.is_station_in_subway(name2):
+                station1 = self._stations[name1]
+                station2 = self._stations[name2]
+
+                if station2 not in station1.neighbours:
+                    station1.neighbours.add(station2)
+                    station2.neighbours.add(station1)
+                    self._version += 1
+
+    def add_network(self, stations: list[tuple[str, tuple[float, float], tuple[int, int]]],
+                    edges: list[tuple[str, str]]) -> None:
+        """Add the given stations (name, location, coordinates) and then the given edges
+        (name1, name2) to this subway system, as a single change.
+
+        Stations whose name is already in this subway system, and edges whose stations are not
+        both in this subway system (after adding the given stations), are skipped.
+
+        Preconditions:
+            - all(name1 != name2 for name1, name2 in edges)
+        """
+        with self._write_lock:
+            new_stations = []
+            for name, location, coordinates in stations:
+                if name not in self._stations:
+                    # Station names are interned so that every copy of a name shares one string
+                    name = sys.intern(name)
+                    station = _Station(name, len(self._names))
+                    self._stations[name] = station
+                    self._names.append(name)
+                    new_stations.append((location, coordinates))
+                    self._unchecked[station] = None
+
+            # Fill in the columns of the new stations all at once
+            self._latitudes.extend(location[0] for location, _ in new_stations)
+            self._longitudes.extend(location[1] for location, _ in new_stations)
+            self._x_coordinates.extend(coordinates[0] for _, coordinates in new_stations)
+            self._y_coordinates.extend(coordinates[1] for _, coordinates in new_stations)
+
+            lookup = self._stations.get
+            for name1, name2 in edges:
+                station1, station2 = lookup(name1), lookup(name2)
+                if station1 is not None and station2 is not None:
+                    station1.neighbours.add(station2)
+                    station2.neighbours.add(station1)
+
+            self._version += 1
+
+    def remove_edge(self, name1: str, name2: str) -> None:
+        """Remove the edge between the two stations with the given station names from this
+        subway system.
+
+        Do nothing if there is no such edge.
+        """
+        with self._write_lock:
+            if self.is_station_in_subway(name1) and self.is_station_in_subway(name2):
+                station1 = self._stations[name1]
+                station2 = self._stations[name2]
+
+                if station2 in station1.neighbours:
+                    station1.neighbours.remove(station2)
+                    station2.neighbours.remove(station1)
+                    self._version += 1
+
+    def remove_station(self, name: str) -> None:
+        """Remove the station with the given name, and all of its edges, from this
+        subway system.
+
+        Do nothing if the given station name is not in this subway system.
+        """
+        with self._write_lock:
+            if self.is_station_in_subway(name):
+                station = self._stations.pop(name)
+
+                for neighbour in station.neighbours:
+                    neighbour.neighbours.remove(station)
+
+                # Move the last station into the removed station's place in the arrays
+                i, last = station.index, len(self._names) - 1
+                if i != last:
+                    moved = self._stations[self._names[last]]
+                    moved.index = i
+                    self._names[i] = moved.name
+                    for column in (self._latitudes, self._longitudes,
+                                   self._x_coordinates, self._y_coordinates):
+                        column[i] = column[last]
+
+                for column in (self._names, self._latitudes, self._longitudes,
+                               self._x_coordinates, self._y_coordinates):
+                    column.pop()
+
+                self._remove_sprite(station)
+                self._version += 1
+
+    def move_station(self, name: str, location: tuple[float, float],
+                     coordinates: tuple[int, int]) -> None:
+        """Change the location and pygame coordinates of the station with the given name.
+
+        Do nothing if the given station name is not in this subway system.
+
+        Preconditions:
+            - location[0] is the latitude and location[1] is the longitude
+            - coordinates[0] is the x-coordinate and coordinates[1] is the y-coordinate
+        """
+        with self._write_lock:
+            if self.is_station_in_subway(name):
+                station = self._stations[name]
+                i = station.index
+
+                self._latitudes[i], self._longitudes[i] = location
+                self._x_coordinates[i], self._y_coordinates[i] = coordinates
+
+                # The station may have moved onto or off the screen, so check it again
+                self._unchecked[station] = None
+
+                self._version += 1
+
+    def get_station_names(self) -> list[str]:
+        """Return the names of all the stations in this subway system, in the order
+        of their indices.
+        """
+        return list(self.snapshot().names)
+
+    def get_edges(self) -> list[tuple[str, str]]:
+        """Return every edge of this subway system exactly once, as a pair of station names.
+        """
+        graph = self.snapshot()
+        return [(graph.names[i], graph.names[j]) for i, j in graph.edges()]
+
+    def get_location_arrays(self) -> tuple[array, array]:
+        """Return the packed arrays of the latitudes and longitudes of the stations in this
+        subway system, in the same order as get_station_names().
 
-            station1.neighbours.add(station2)
-            station2.neighbours.add(station1)
+        The arrays are copies, so they may be kept after this subway system changes.
+        """
+        graph = self.snapshot()
+        return array('d', graph.latitudes), array('d', graph.longitudes)
 
     def get_locations(self, stations: list[str]) -> dict[str, tuple[float, float]]:
         """Return a dictionary of the given stations mapping to their locations
@@ -201,13 +424,24 @@ class Subway:
         Preconditions:
             - all(self.is_station_in_subway(station) for station in stations)
         """
+        graph = self.snapshot()
         station_locations = {}
 
         for station_name in stations:
-            station_locations[station_name] = self._stations[station_name].location
+            i = graph.index_of(station_name)
+            station_locations[station_name] = (graph.latitudes[i], graph.longitudes[i])
 
         return station_locations
 
+    def get_coordinates(self) -> dict[str, tuple[int, int]]:
+        """Return a dictionary mapping the name of every station of this subway system to its
+        pygame coordinates (x, y).
+        """
+        # The coordinates are not part of the snapshots, so read them under the lock
+        with self._write_lock:
+            return {name: (self._x_coordinates[i], self._y_coordinates[i])
+                    for i, name in enumerate(self._names)}
+
     def update_all_stations(self, colour: str, mouse_position: tuple[int, int]) -> Optional[str]:
         """Update the image-representation of the stations in pygame to the given
          colour (if necessary).
@@ -215,9 +449,11 @@ class Subway:
          Preconditions:
             - colour in {'grey', 'yellow', 'red'}
         """
-        for name in self._stations:
+        self._create_visible_sprites()
+
+        for sprite in self._station_sprites.values():
             # Update the station's image-representation in pygame (if necessary)
-            station_name = self._stations[name].update(colour, mouse_position)
+            station_name = sprite.update(colour, mouse_position)
 
             if station_name is not None:
                 # User selected this station, return the station's name
@@ -230,45 +466,240 @@ class Subway:
         """Update the image-representation of the station with the given station name
         in pygame to the given colour.
 
-        Do nothing if the given station name is not in this subway system.
+        Do nothing if the given station name is not in this subway system, or if the station
+        is not displayed on the pygame screen.
 
         Precondition:
             - colour in {'grey', 'yellow', 'red'}
         """
-        if self.is_station_in_subway(name):
-            station = self._stations[name]
-            station.update(colour)
+        self._create_visible_sprites()
+
+        if name in self._station_sprites:
+            self._station_sprites[name].update(colour)
 
     def draw_stations(self) -> None:
         """Draw the stations of this subway system onto the pygame screen.
         """
+        self._create_visible_sprites()
         self._sprites.draw(self._screen)
 
+    def _remove_sprite(self, station: _Station) -> None:
+        """Stop the given station from being checked for a sprite, and have its sprite (if it
+        has one) removed the next time the sprites are checked.
+
+        Preconditions:
+            - the current thread holds self._write_lock
+        """
+        self._unchecked.pop(station, None)
+        self._removed.add(station.name)
+
+    def _create_visible_sprites(self) -> None:
+        """Create, move or remove the sprites of the stations that were added, moved or
+        removed since the sprites were last checked.
+
+        The changes are taken under the lock, and the sprites are then changed without it, so
+        writer threads never touch a sprite while it is being drawn. While another thread is
+        in the middle of changing this subway system, the sprites are left as they are until
+        the next check.
+        """
+        if self._unchecked == {} and self._removed == set():
+            return
+
+        if not self._write_lock.acquire(blocking=False):
+            return
+
+        try:
+            removed = self._removed
+            self._removed = set()
+            unchecked = [(station.name, (self._x_coordinates[station.index],
+                                         self._y_coordinates[station.index]))
+                         for station in self._unchecked]
+            self._unchecked.clear()
+        finally:
+            self._write_lock.release()
+
+        for name in removed:
+            if name in self._station_sprites:
+                self._station_sprites.pop(name).kill()
+
+        # A station is displayed if any part of its image is on the screen
+        bounds = self._screen.get_rect().inflate(_station_image('grey').get_size())
+
+        for name, coordinates in unchecked:
+            sprite = self._station_sprites.get(name)
+            if not bounds.collidepoint(coordinates):
+                if sprite is not None:
+                    self._station_sprites.pop(name).kill()
+            elif sprite is not None:
+                sprite.rect.center = coordinates
+            else:
+                sprite = _StationSprite(name, coordinates)
+                self._station_sprites[name] = sprite
+                self._sprites.add(sprite)
+
+    def set_station_open(self, name: str, is_open: bool) -> None:
+        """Open or close the station with the given name. Closed stations are never part of
+        a shortest path.
+
+        Do nothing if the given station name is not in this subway system.
+        """
+        with self._write_lock:
+            if self.is_station_in_subway(name):
+                if is_open:
+                    self._closed_stations.discard(name)
+                else:
+                    self._closed_stations.add(name)
+
+                self._closures_version += 1
+
+    def set_edge_open(self, name1: str, name2: str, is_open: bool) -> None:
+        """Open or close the edge between the two stations with the given names (e.g. for
+        track maintenance). Closed edges are never part of a shortest path.
+
+        Do nothing if there is no such edge.
+        """
+        with self._write_lock:
+            if self.is_station_in_subway(name1) and self.is_station_in_subway(name2) and \
+                    self._stations[name2] in self._stations[name1].neighbours:
+                edge = (min(name1, name2), max(name1, name2))
+                if is_open:
+                    self._closed_edges.discard(edge)
+                else:
+                    self._closed_edges.add(edge)
+
+                self._closures_version += 1
+
+    def writing(self) -> threading.RLock:
+        """Return the lock that must be held while changing this subway system.
+
+        Every method changing this subway system already holds it; hold it around a batch of
+        changes (with subway.writing(): ...) so that no snapshot is published in the middle
+        of the batch. Snapshots taken during the batch, even by the thread applying it, are
+        the one published before it started.
+        """
+        if self._published is None:
+            # Publish the state before the batch, so there is a snapshot to return during it
+            self.snapshot()
+
+        return self._write_lock
+
+    def snapshot(self) -> compact_graph.CompactGraph:
+        """Return the latest snapshot of this subway system: a compact graph of its stations,
+        edges and closures that never changes once it is returned.
+
+        A new snapshot is only built when this subway system changed since the last one was
+        published, and then only its open flags are copied unless stations or edges changed.
+        While another thread is in the middle of changing this subway system, the previous
+        snapshot is returned instead of waiting for the change to finish. So is it while the
+        current thread holds the writer lock (see writing), since the batch of changes it is
+        applying may be only half done.
+        """
+        published = self._published
+        if published is not None and published[0] == (self._version, self._closures_version):
+            return published[1]
+
+        # The writer lock is reentrant, so acquiring it below would succeed for its owner too
+        # pylint: disable=protected-access
+        if published is not None and self._write_lock._is_owned():
+            return published[1]
+
+        if not self._write_lock.acquire(blocking=published is None):
+            # A writer is busy, so the previous snapshot is the latest consistent one
+            return published[1]
+
+        try:
+            return self._publish()
+        finally:
+            self._write_lock.release()
+
+    def _publish(self) -> compact_graph.CompactGraph:
+        """Build a snapshot of the current state of this subway system, publish it and
+        return it.
+
+        Preconditions:
+            - the current thread holds self._write_lock
+        """
+        key = (self._version, self._closures_version)
+        published = self._published
+
+        if published is not None and published[0] == key:
+            return published[1]
+
+        # Forget closures of stations and edges that no longer exist
+        self._closed_stations.intersection_update(self._stations)
+        self._closed_edges = {(name1, name2) for name1, name2 in self._closed_edges
+                              if name1 in self._stations and name2 in self._stations
+                              and self._stations[name2] in self._stations[name1].neighbours}
+
+        if published is not None and published[1].version == self._version:
+            # Only closures changed, so share the stations and edges of the last snapshot
+            graph = published[1].copy()
+            graph.station_open[:] = b'\x01' * len(graph.station_open)
+            graph.edge_open[:] = b'\x01' * len(graph.edge_open)
+        else:
+            adjacency = [[neighbour.index for neighbour in self._stations[name].neighbours]
+                         for name in self._names]
+            graph = compact_graph.CompactGraph(list(self._names), array('d', self._latitudes),
+                                               array('d', self._longitudes), adjacency,
+                                               self._version)
+
+        for name in self._closed_stations:
+            graph.set_station_open(name, False)
+        for name1, name2 in self._closed_edges:
+            graph.set_edge_open(name1, name2, False)
+
+        # Publishing is a single assignment, so readers see either the old or the new snapshot
+        self._published = (key, graph)
+
+        return graph
+
     def shortest_path(self, name1: str, name2: str, visited: set[str]) -> list[str]:
         """Return the shortest path between the two stations with the given names
-        without visiting any of the stations in visited.
+        without visiting any of the stations in visited, or any closed station or edge.
+
+        Return [] if no such path exists.
 
         Preconditions:
             - name1 not in visited and name2 not in visited
             - self.is_station_in_subway(name1) and self.is_station_in_subway(name2)
             - all(self.is_station_in_subway(name) for name in visited)
         """
-        possible_paths = self._stations[name1].possible_paths(name2, visited)
+        return self.find_route(name1, name2, visited).names
 
-        if possible_paths == []:
-            # No path was found between the two stations, return []
-            return []
-        else:
-            # Assign shortest_path the last path in possible_paths for now
-            # and reassign later if another path is shorter
-            shortest_path = possible_paths.pop()
+    def find_route(self, name1: str, name2: str, visited: set[str]) -> route.Route:
+        """Return the shortest route between the two stations with the given names
+        without visiting any of the stations in visited, or any closed station or edge.
+
+        Return a route with no stations if no such route exists.
+
+        Preconditions:
+            - name1 not in visited and name2 not in visited
+            - self.is_station_in_subway(name1) and self.is_station_in_subway(name2)
+            - all(self.is_station_in_subway(name) for name in visited)
+        """
+        graph = self.snapshot()
+        avoid = {graph.index_of(name) for name in visited}
+        path = graph.path_indices(graph.index_of(name1), graph.index_of(name2), avoid)
+
+        return route.Route(graph, [] if path is None else path)
+
+    def find_itinerary(self, start: str, stops: list[str], end: Optional[str],
+                       visited: set[str]) -> itinerary.Itinerary:
+        """Return the shortest itinerary from start through every station of stops (in the
+        best order found), ending at end (or at the last stop, if end is None), without
+        visiting any of the stations in visited, or any closed station or edge.
 
-            # Find the shortest path out of all possible paths
-            for path in possible_paths:
-                if len(path) < len(shortest_path):
-                    shortest_path = path
+        Preconditions:
+            - self.is_station_in_subway(start)
+            - all(self.is_station_in_subway(name) for name in stops)
+            - end is None or self.is_station_in_subway(end)
+            - all(self.is_station_in_subway(name) for name in visited)
+        """
+        return itinerary.plan_itinerary(self.snapshot(), start, stops, end, visited)
 
-            return shortest_path
+    def empty_route(self) -> route.Route:
+        """Return a route with no stations through this subway system."""
+        return route.Route(self.snapshot(), [])
 
 
 if __name__ == '__main__':
@@ -282,7 +713,8 @@ if __name__ == '__main__':
     python_ta.check_all(
         config={
             # The names (strs) of imported modules
-            'extra-imports': ['python_ta.contracts', 'pygame'],
+            'extra-imports': ['python_ta.contracts', 'sys', 'threading', 'array', 'pygame',
+                              'compact_graph', 'itinerary', 'route'],
             # The names (strs) of functions that call print/open/input
             'allowed-io': [],
             'max-line-length': 100,